@@ -0,0 +1,163 @@
+"""
+Audio as binary assets, next to (or instead of) the C headers.
+
+A header makes avr-gcc parse every sample as a decimal literal, and the
+clip can only change by reflashing. The same bytes can also go out as:
+
+    .bin    the array's bytes as they are
+    .hex    Intel HEX (for avrdude -U eeprom:w:..., or an external flash
+            programmer), 16 data bytes per record, with extended linear
+            address records past 64 KB
+    .pak    an SD card pack: a directory of named clips, each starting on
+            a 512-byte sector so the sketch reads them a block at a time
+
+Pack layout, all little-endian (wpak.h has the structs for the sketch):
+
+    header     "WPAK", version u16, count u16, sample rate u32, 4 reserved bytes
+    directory  count x (name 16 bytes NUL-padded, offset u32, length u32,
+               samples u32, encoding u8, 3 reserved bytes)
+    clips      each at a multiple of SECTOR
+
+Each writer goes over the data once, a whole block of records at a time
+with NumPy for the HEX file. .bin and .hex take anything with the buffer
+protocol without copying it, so an np.memmap of a cached clip is streamed
+from disk rather than loaded.
+
+Usage:
+    export_assets("speech", data, ["bin", "hex"])            # speech.bin, speech.hex
+    write_pack("phrases.pak", [("hello", data, samples, "ima4"), ...])
+"""
+
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from audio_codecs import ENCODINGS
+
+FORMATS = ("bin", "hex", "pak")
+HEX_RECORD = 16     # data bytes per Intel HEX record
+SECTOR = 512        # SD card block
+PAK_MAGIC = b"WPAK"
+PAK_VERSION = 1
+PAK_HEADER = struct.Struct("<4sHHI4x")
+PAK_ENTRY = struct.Struct("<16sIIIB3x")
+NAME_BYTES = 16
+
+_HEX_DIGITS = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+
+def write_bin(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+def _hex_records(address, data):
+    """Intel HEX data records for data starting at a 16-bit address, as bytes."""
+    full = len(data) // HEX_RECORD
+    out = b""
+    if full:
+        # length, address hi, address lo, type 00, data..., checksum; then two hex digits per byte
+        body = np.empty((full, 4 + HEX_RECORD + 1), dtype=np.uint8)
+        addresses = address + np.arange(full) * HEX_RECORD
+        body[:, 0] = HEX_RECORD
+        body[:, 1] = addresses >> 8
+        body[:, 2] = addresses & 0xFF
+        body[:, 3] = 0
+        body[:, 4:-1] = np.frombuffer(data, dtype=np.uint8, count=full * HEX_RECORD).reshape(full, HEX_RECORD)
+        body[:, -1] = (-body[:, :-1].sum(axis=1, dtype=np.int64)) & 0xFF
+        lines = np.empty((full, 2 + 2 * body.shape[1]), dtype=np.uint8)
+        lines[:, 0] = ord(":")
+        lines[:, 1:-1:2] = _HEX_DIGITS[body >> 4]
+        lines[:, 2:-1:2] = _HEX_DIGITS[body & 0x0F]
+        lines[:, -1] = ord("\n")
+        out = lines.tobytes()
+    if len(data) > full * HEX_RECORD:
+        out += _hex_line(0, address + full * HEX_RECORD, data[full * HEX_RECORD:])
+    return out
+
+def _hex_line(kind, address, payload):
+    record = bytes([len(payload), address >> 8, address & 0xFF, kind]) + payload
+    return f":{record.hex().upper()}{(-sum(record)) & 0xFF:02X}\n".encode("ascii")
+
+def write_hex(path, data, address=0):
+    """Intel HEX of data loaded at address. Returns the number of data bytes."""
+    data = memoryview(data)
+    with open(path, "wb") as f:
+        position, upper = 0, 0
+        while position < len(data):
+            absolute = address + position
+            if absolute >> 16 != upper:
+                upper = absolute >> 16
+                f.write(_hex_line(4, 0, struct.pack(">H", upper)))  # extended linear address
+            segment = min(len(data) - position, 0x10000 - (absolute & 0xFFFF))
+            f.write(_hex_records(absolute & 0xFFFF, data[position:position + segment]))
+            position += segment
+        f.write(b":00000001FF\n")
+    return len(data)
+
+def _pack_name(name):
+    encoded = name.encode("ascii", "replace")
+    if len(encoded) > NAME_BYTES - 1:
+        raise ValueError(f"Clip name {name!r} is longer than {NAME_BYTES - 1} characters")
+    return encoded
+
+def write_pack(path, clips, sample_rate=8000):
+    """SD card pack of (name, data, samples, encoding) clips. Returns the file size."""
+    clips = list(clips)
+    names = [_pack_name(name) for name, _, _, _ in clips]
+    if len(set(names)) != len(names):
+        raise ValueError("Two clips in a pack have the same name")
+    offset = -(-(PAK_HEADER.size + PAK_ENTRY.size * len(clips)) // SECTOR) * SECTOR
+    entries, placed = [], {}  # identical clips are stored once
+    for name, (_, data, samples, encoding) in zip(names, clips):
+        data = bytes(data)
+        if data not in placed:
+            placed[data] = offset
+            offset += -(-len(data) // SECTOR) * SECTOR
+        entries.append(PAK_ENTRY.pack(name, placed[data], len(data), samples, ENCODINGS.index(encoding)))
+    with open(path, "wb") as f:
+        f.write(PAK_HEADER.pack(PAK_MAGIC, PAK_VERSION, len(clips), sample_rate))
+        f.write(b"".join(entries))
+        for data, at in placed.items():
+            f.seek(at)
+            f.write(data)
+        f.truncate(offset)
+    return offset
+
+def read_pack(path):
+    """{name: (data, samples, encoding)} of a pack, to check one."""
+    raw = Path(path).read_bytes()
+    magic, version, count, _ = PAK_HEADER.unpack_from(raw)
+    if magic != PAK_MAGIC or version != PAK_VERSION:
+        raise ValueError(f"{path} is not a version {PAK_VERSION} pack")
+    clips = {}
+    for i in range(count):
+        name, offset, length, samples, encoding = PAK_ENTRY.unpack_from(raw, PAK_HEADER.size + i * PAK_ENTRY.size)
+        clips[name.rstrip(b"\0").decode("ascii")] = (raw[offset:offset + length], samples, ENCODINGS[encoding])
+    return clips
+
+def export_arg(argv):
+    """The --export=bin,hex,pak command line option of the header tools."""
+    for arg in argv:
+        if arg.startswith("--export="):
+            formats = [f for f in arg.split("=", 1)[1].split(",") if f]
+            if not set(formats) <= set(FORMATS):
+                raise SystemExit(f"--export takes a comma-separated list of {', '.join(FORMATS)}")
+            return formats
+    return []
+
+def export_assets(stem, data, formats, samples=None, encoding="pcm", name=None):
+    """Write data as <stem>.bin / .hex / .pak (a pack of this one clip). Returns the paths."""
+    stem = Path(stem)
+    paths = []
+    for fmt in formats:
+        path = stem.with_suffix(f".{fmt}")
+        if fmt == "bin":
+            write_bin(path, data)
+        elif fmt == "hex":
+            write_hex(path, data)
+        else:
+            write_pack(path, [((name or stem.name)[:NAME_BYTES - 1], data,
+                               len(data) if samples is None else samples, encoding)])
+        paths.append(path)
+    return paths
@@ -0,0 +1,243 @@
+"""
+Compressed PROGMEM audio: more seconds of speech per kilobyte of flash.
+
+Raw 8-bit PCM costs 8000 bytes a second. The header tools can instead
+write one of:
+
+    ima4    4-bit IMA-ADPCM                         ~2x smaller
+    adpcm2  2-bit ADPCM on the same step table      ~3.8x smaller
+    ulaw    8-bit mu-law with runs of silence       1x, plus whatever is silent
+            stored as (ULAW_RUN, count)
+
+ADPCM is coded in blocks of BLOCK samples. A block starts with a 3-byte
+header (the first sample as int16 little-endian, then the step index) and
+carries the other BLOCK - 1 samples as codes packed from the low bits of
+each byte up. Blocks are independent, so the encoder codes every block at
+once with NumPy, stepping through the BLOCK sample positions.
+
+Samples are 8 kHz unsigned 8-bit in and out; internally (u - 128) << 8.
+The decoders here are the reference for audio_decode.h, which plays the
+arrays on the Arduino and must give the same samples.
+
+Usage from a tool:
+    from audio_codecs import write_encoded_header
+    write_encoded_header("speech.h", samples, "speech", "ima4")
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from c_header import INCLUDE, ROW, c_identifier, write_header
+
+ENCODINGS = ("pcm", "ima4", "adpcm2", "ulaw")
+VERSION = "audio_codecs/1"  # bump when an encoder's output changes, to miss the build cache
+BLOCK = 256        # ADPCM samples per block, header included
+ULAW_RUN = 0x7F    # escape byte: the next byte is a count of silent samples
+SILENCE = 256      # |sample| at or below this counts as silence (one 8-bit step)
+MIN_RUN = 3        # shorter silences are cheaper as plain samples
+
+STEP = np.array([
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45, 50, 55, 60, 66, 73, 80,
+    88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230, 253, 279, 307, 337, 371, 408, 449, 494, 544,
+    598, 658, 724, 796, 876, 963, 1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749,
+    3024, 3327, 3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442, 11487, 12635,
+    13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794, 32767], dtype=np.int32)
+ADJUST = {4: np.array([-1, -1, -1, -1, 2, 4, 6, 8], dtype=np.int32),  # by magnitude bits of the code
+          2: np.array([-1, 3], dtype=np.int32)}
+
+def _to_wide(samples):
+    return (np.asarray(samples, dtype=np.int32) - 128) << 8
+
+def _to_u8(wide):
+    return np.clip(((wide + 128) >> 8) + 128, 0, 255).astype(np.uint8)
+
+# ---------------- ADPCM ----------------
+def _block_bytes(bits, samples=None):
+    """Bytes of a block holding this many samples (a whole block by default)."""
+    return 3 + (((samples or BLOCK) - 1) * bits + 7) // 8
+
+def _step_code(x, pred, index, bits):
+    """One sample position of every block: (code, new pred, new index)."""
+    step = STEP[index]
+    diff = x - pred
+    sign = diff < 0
+    diff = np.abs(diff)
+    if bits == 4:
+        code = np.zeros(len(x), dtype=np.int32)
+        vpdiff = step >> 3
+        for bit, shift in ((4, 0), (2, 1), (1, 2)):
+            part = step >> shift
+            hit = diff >= part
+            code |= np.where(hit, bit, 0)
+            diff = np.where(hit, diff - part, diff)
+            vpdiff = vpdiff + np.where(hit, part, 0)
+        magnitude = code
+    else:
+        magnitude = (diff >= step).astype(np.int32)
+        vpdiff = (step >> 1) + np.where(magnitude, step, 0)
+    pred = np.clip(pred + np.where(sign, -vpdiff, vpdiff), -32768, 32767)
+    index = np.clip(index + ADJUST[bits][magnitude], 0, len(STEP) - 1)
+    code = magnitude | np.where(sign, 1 << (bits - 1), 0)
+    return code, pred, index
+
+def adpcm_encode(samples, bits=4):
+    """uint8 samples -> ADPCM bytes (bits = 4 for IMA, 2 for adpcm2)."""
+    samples = np.asarray(samples, dtype=np.uint8)
+    n = len(samples)
+    if n == 0:
+        return b""
+    blocks = -(-n // BLOCK)
+    x = np.pad(_to_wide(samples), (0, blocks * BLOCK - n), mode="edge").reshape(blocks, BLOCK)
+    pred = x[:, 0].copy()
+    # Start each block at the step size of its first few changes
+    index = np.clip(np.searchsorted(STEP, np.abs(np.diff(x[:, :9], axis=1)).mean(axis=1)), 0, len(STEP) - 1)
+    header = np.empty((blocks, 3), dtype=np.uint8)
+    header[:, :2] = pred.astype("<i2").view(np.uint8).reshape(blocks, 2)
+    header[:, 2] = index
+    per_byte = 8 // bits
+    codes = np.zeros((blocks, -(-(BLOCK - 1) // per_byte) * per_byte), dtype=np.uint8)
+    for j in range(1, BLOCK):
+        codes[:, j - 1], pred, index = _step_code(x[:, j], pred, index, bits)
+    codes = codes.reshape(blocks, -1, per_byte).astype(np.uint16)
+    packed = (codes << (np.arange(per_byte) * bits)).sum(axis=2).astype(np.uint8)
+    data = np.concatenate([header, packed], axis=1).ravel()
+    return data[:(blocks - 1) * _block_bytes(bits) + _block_bytes(bits, n - (blocks - 1) * BLOCK)].tobytes()
+
+def adpcm_decode(data, n, bits=4):
+    """ADPCM bytes -> n uint8 samples."""
+    if n == 0:
+        return np.zeros(0, dtype=np.uint8)
+    blocks = -(-n // BLOCK)
+    size = _block_bytes(bits)
+    raw = np.frombuffer(bytes(data), dtype=np.uint8)
+    raw = np.pad(raw, (0, blocks * size - len(raw))).reshape(blocks, size)
+    pred = raw[:, :2].copy().view("<i2")[:, 0].astype(np.int32)
+    index = raw[:, 2].astype(np.int32)
+    per_byte = 8 // bits
+    codes = ((raw[:, 3:, None] >> (np.arange(per_byte) * bits)) & ((1 << bits) - 1)).reshape(blocks, -1)
+    out = np.empty((blocks, BLOCK), dtype=np.int32)
+    out[:, 0] = pred
+    magnitude_mask = (1 << (bits - 1)) - 1
+    for j in range(1, BLOCK):
+        code = codes[:, j - 1].astype(np.int32)
+        magnitude = code & magnitude_mask
+        step = STEP[index]
+        if bits == 4:
+            vpdiff = (step >> 3) + np.where(magnitude & 4, step, 0) + np.where(magnitude & 2, step >> 1, 0) \
+                + np.where(magnitude & 1, step >> 2, 0)
+        else:
+            vpdiff = (step >> 1) + np.where(magnitude, step, 0)
+        sign = code >> (bits - 1)
+        pred = np.clip(pred + np.where(sign, -vpdiff, vpdiff), -32768, 32767)
+        index = np.clip(index + ADJUST[bits][magnitude], 0, len(STEP) - 1)
+        out[:, j] = pred
+    return _to_u8(out.ravel()[:n])
+
+# ---------------- MU-LAW ----------------
+def ulaw_encode(samples):
+    """uint8 samples -> mu-law bytes, silent stretches as (ULAW_RUN, count)."""
+    x = _to_wide(samples)
+    n = len(x)
+    magnitude = np.minimum(np.abs(x), 32635) + 0x84
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 7
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    code = ~(np.where(x < 0, 0x80, 0) | (exponent << 4) | mantissa) & 0xFF
+    code[code == ULAW_RUN] = 0xFF  # -0 becomes +0, so ULAW_RUN only ever means a run
+
+    # Runs of silence of MIN_RUN or more, cut into counts of at most 255
+    silent = np.concatenate([[0], (np.abs(x) <= SILENCE).astype(np.int8), [0]])
+    edges = np.flatnonzero(np.diff(silent))
+    starts, lengths = edges[::2], edges[1::2] - edges[::2]
+    keep = lengths >= MIN_RUN
+    starts, lengths = starts[keep], lengths[keep]
+    in_run = np.zeros(n + 1, dtype=np.int32)
+    np.add.at(in_run, starts, 1)
+    np.add.at(in_run, starts + lengths, -1)
+    in_run = np.cumsum(in_run[:n]).astype(bool)
+    run_start = np.repeat(starts, lengths)
+    offset = np.flatnonzero(in_run) - run_start  # position within its run
+    run_left = np.repeat(starts + lengths, lengths) - np.flatnonzero(in_run)
+    # Each input sample's output bytes: 1 for a plain sample, 2 where a count starts
+    width = np.where(in_run, 0, 1)
+    chunk_start = np.flatnonzero(in_run)[offset % 255 == 0]
+    width[chunk_start] = 2
+    position = np.cumsum(width) - width
+    out = np.empty(int(width.sum()), dtype=np.uint8)
+    plain = ~in_run
+    out[position[plain]] = code[plain]
+    out[position[chunk_start]] = ULAW_RUN
+    out[position[chunk_start] + 1] = np.minimum(run_left[offset % 255 == 0], 255)
+    return out.tobytes()
+
+def ulaw_decode(data, n=None):
+    """mu-law bytes -> uint8 samples (the first n, if given)."""
+    raw = np.frombuffer(bytes(data), dtype=np.uint8)
+    # In a stretch of ULAW_RUN bytes the first is an escape, the next its count, and so on
+    is_run = np.concatenate([[False], raw == ULAW_RUN])
+    edges = np.flatnonzero(np.diff(is_run.astype(np.int8)))
+    first = np.zeros(len(raw), dtype=np.int64)
+    first[edges[edges < len(raw)][::2]] = 1
+    stretch_start = np.maximum.accumulate(np.where(first.astype(bool), np.arange(len(raw)), 0))
+    escape = (raw == ULAW_RUN) & ((np.arange(len(raw)) - stretch_start) % 2 == 0)
+    count = np.concatenate([[False], escape[:-1]])
+    plain = ~escape & ~count
+    code = ~raw.astype(np.int32) & 0xFF
+    exponent = (code >> 4) & 0x07
+    magnitude = (((code & 0x0F) << 3) + 0x84 << exponent) - 0x84
+    value = np.where(code & 0x80, -magnitude, magnitude)
+    value[escape] = 0
+    repeat = np.where(plain, 1, 0)
+    repeat[escape] = raw[np.flatnonzero(escape) + 1]
+    out = _to_u8(np.repeat(value, repeat))
+    return out if n is None else out[:n]
+
+# ---------------- TOOLS ----------------
+def encode(samples, encoding):
+    """uint8 samples -> bytes in the given encoding."""
+    samples = np.asarray(samples, dtype=np.uint8)
+    if encoding == "pcm":
+        return samples.tobytes()
+    if encoding == "ima4":
+        return adpcm_encode(samples, 4)
+    if encoding == "adpcm2":
+        return adpcm_encode(samples, 2)
+    if encoding == "ulaw":
+        return ulaw_encode(samples)
+    raise ValueError(f"Unknown encoding {encoding!r}, expected one of {', '.join(ENCODINGS)}")
+
+def decode(data, n, encoding):
+    """The reference decoder: bytes in the given encoding -> n uint8 samples."""
+    if encoding == "pcm":
+        return np.frombuffer(bytes(data), dtype=np.uint8)[:n]
+    if encoding == "ima4":
+        return adpcm_decode(data, n, 4)
+    if encoding == "adpcm2":
+        return adpcm_decode(data, n, 2)
+    if encoding == "ulaw":
+        return ulaw_decode(data, n)
+    raise ValueError(f"Unknown encoding {encoding!r}, expected one of {', '.join(ENCODINGS)}")
+
+def encoding_arg(argv, default="pcm"):
+    """The --encoding=<name> command line option of the header tools."""
+    for arg in argv:
+        if arg.startswith("--encoding="):
+            encoding = arg.split("=", 1)[1]
+            if encoding not in ENCODINGS:
+                raise SystemExit(f"--encoding must be one of {', '.join(ENCODINGS)}")
+            return encoding
+    return default
+
+def write_encoded_header(out_path, samples, array_name=None, encoding="pcm", row=ROW):
+    """write_header, with the samples encoded. Returns the array's length in bytes.
+
+    Besides the array, the header defines <NAME>_SAMPLES and <NAME>_ENCODING
+    and includes audio_decode.h, which must sit next to it in the sketch.
+    """
+    if encoding == "pcm":
+        return write_header(out_path, samples, array_name, row)
+    name = c_identifier(array_name or Path(out_path).stem)
+    include = (INCLUDE.rstrip("\n") + '\n#include "audio_decode.h"\n\n'
+               f"#define {name.upper()}_SAMPLES {len(samples)}UL\n"
+               f"#define {name.upper()}_ENCODING AUDIO_{encoding.upper()}\n\n")
+    return write_header(out_path, encode(samples, encoding), name, row, include)
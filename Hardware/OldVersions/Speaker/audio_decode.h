@@ -0,0 +1,128 @@
+/*
+ * Decoders for the compressed arrays the header tools write with
+ * --encoding=ima4, adpcm2 or ulaw (audio_codecs.py is the reference; both
+ * must give the same samples). Start a decoder on an array with its
+ * <NAME>_SAMPLES and <NAME>_ENCODING, then take one sample per tick,
+ * e.g. in the timer interrupt that feeds the PWM:
+ *
+ *   #include "speech.h"
+ *   audio_decoder voice;
+ *   audio_begin(&voice, speech, SPEECH_SAMPLES, SPEECH_ENCODING);
+ *   ...
+ *   if (voice.left) OCR2A = audio_next(&voice);
+ */
+#ifndef AUDIO_DECODE_H
+#define AUDIO_DECODE_H
+
+#include <avr/pgmspace.h>
+#include <stdint.h>
+
+#define AUDIO_PCM 0
+#define AUDIO_IMA4 1
+#define AUDIO_ADPCM2 2
+#define AUDIO_ULAW 3
+
+#define AUDIO_BLOCK 256     // ADPCM samples per block, header included
+#define AUDIO_ULAW_RUN 0x7F // followed by a count of silent samples
+
+static const uint16_t audio_step[89] PROGMEM = {
+  7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45, 50, 55, 60, 66, 73, 80,
+  88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230, 253, 279, 307, 337, 371, 408, 449, 494, 544,
+  598, 658, 724, 796, 876, 963, 1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749,
+  3024, 3327, 3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442, 11487, 12635,
+  13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794, 32767
+};
+static const int8_t audio_adjust4[8] PROGMEM = {-1, -1, -1, -1, 2, 4, 6, 8};
+
+typedef struct {
+  const uint8_t *data;  // next byte of the PROGMEM array
+  uint32_t left;        // samples still to come
+  uint8_t encoding;
+  uint16_t n;           // position in the ADPCM block, 0 = header next
+  int16_t pred;
+  uint8_t index;
+  uint8_t codes;        // ADPCM codes not used yet, low bits first
+  uint8_t have;         // bits left in codes
+  uint8_t run;          // mu-law: silent samples still to come
+} audio_decoder;
+
+static uint8_t audio_u8(int32_t wide) {
+  int32_t v = ((wide + 128) >> 8) + 128;
+  return v < 0 ? 0 : v > 255 ? 255 : (uint8_t)v;
+}
+
+static void audio_begin(audio_decoder *d, const uint8_t *data, uint32_t samples, uint8_t encoding) {
+  d->data = data;
+  d->left = samples;
+  d->encoding = encoding;
+  d->n = 0;
+  d->have = 0;
+  d->run = 0;
+}
+
+static uint8_t audio_adpcm(audio_decoder *d, uint8_t bits) {
+  if (d->n == 0) {  // block header: first sample, step index
+    d->pred = (int16_t)(uint16_t)(pgm_read_byte(d->data) | ((uint16_t)pgm_read_byte(d->data + 1) << 8));
+    d->index = pgm_read_byte(d->data + 2);
+    d->data += 3;
+    d->have = 0;
+    d->n = 1;
+    return audio_u8(d->pred);
+  }
+  if (d->have == 0) {
+    d->codes = pgm_read_byte(d->data++);
+    d->have = 8;
+  }
+  uint8_t code = d->codes & ((1 << bits) - 1);
+  d->codes >>= bits;
+  d->have -= bits;
+
+  int32_t step = pgm_read_word(&audio_step[d->index]);
+  int32_t vpdiff;
+  int8_t adjust;
+  if (bits == 4) {
+    vpdiff = step >> 3;
+    if (code & 4) vpdiff += step;
+    if (code & 2) vpdiff += step >> 1;
+    if (code & 1) vpdiff += step >> 2;
+    adjust = (int8_t)pgm_read_byte(&audio_adjust4[code & 7]);
+  } else {
+    vpdiff = (step >> 1) + ((code & 1) ? step : 0);
+    adjust = (code & 1) ? 3 : -1;
+  }
+  int32_t pred = (code & (1 << (bits - 1))) ? d->pred - vpdiff : d->pred + vpdiff;
+  d->pred = pred < -32768 ? -32768 : pred > 32767 ? 32767 : (int16_t)pred;
+  int16_t index = d->index + adjust;
+  d->index = index < 0 ? 0 : index > 88 ? 88 : (uint8_t)index;
+  if (++d->n == AUDIO_BLOCK) d->n = 0;
+  return audio_u8(d->pred);
+}
+
+static uint8_t audio_ulaw(audio_decoder *d) {
+  if (d->run) {
+    d->run--;
+    return 128;
+  }
+  uint8_t code = pgm_read_byte(d->data++);
+  if (code == AUDIO_ULAW_RUN) {
+    d->run = pgm_read_byte(d->data++) - 1;
+    return 128;
+  }
+  code = ~code;
+  int32_t magnitude = ((((int32_t)(code & 0x0F) << 3) + 0x84) << ((code >> 4) & 0x07)) - 0x84;
+  return audio_u8((code & 0x80) ? -magnitude : magnitude);
+}
+
+// The next sample, 0-255; silence (128) once all have been played.
+static uint8_t audio_next(audio_decoder *d) {
+  if (d->left == 0) return 128;
+  d->left--;
+  switch (d->encoding) {
+    case AUDIO_IMA4: return audio_adpcm(d, 4);
+    case AUDIO_ADPCM2: return audio_adpcm(d, 2);
+    case AUDIO_ULAW: return audio_ulaw(d);
+    default: return pgm_read_byte(d->data++);
+  }
+}
+
+#endif
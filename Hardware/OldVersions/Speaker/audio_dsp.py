@@ -0,0 +1,208 @@
+"""
+Constant-memory conversion of any length of audio to 8 kHz unsigned 8-bit.
+
+mp3_to_h_clean.py used to load the whole file, filter it in one go and
+normalize with the global min/max, so memory grew with the input and one
+click set the level for the whole clip. Here the audio goes through in
+blocks of BLOCK input samples:
+
+    decode      WAV with the wave module, anything else from an ffmpeg pipe
+    high-pass   optional, second-order sections carrying their state across blocks
+    resample    polyphase FIR to RATE, carrying its history across blocks
+    measure     histogram of |x|, kept aside as float32 in a temporary file
+    normalize   second pass: the PERCENTILE-th percentile of |x| goes to full
+                scale, the rare samples above it (clicks) are clipped
+    dither      TPDF, then rounded to unsigned 8-bit
+
+Memory is set by BLOCK and the filter lengths, not by the input.
+
+Usage:
+    n = convert("input.mp3", "output.raw", highpass=60)
+"""
+
+import functools
+import math
+import os
+import subprocess
+import tempfile
+import wave
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import butter, firwin, sosfilt
+
+RATE = 8000
+BLOCK = 1 << 16        # input samples per block
+PERCENTILE = 99.9      # of |x|, mapped to full scale
+HIST_BINS = 1 << 14    # over |x| in [0, 1]
+DITHER_SEED = 0        # the same input gives the same output
+
+# ---------------- DECODE ----------------
+def _wav_blocks(path, block):
+    with wave.open(str(path), "rb") as w:
+        width, channels = w.getsampwidth(), w.getnchannels()
+        if width not in (1, 2):
+            raise ValueError(f"Unsupported WAV sample width {width}")
+        while True:
+            frames = w.readframes(block)
+            if not frames:
+                return
+            if width == 1:
+                x = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+            else:
+                x = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768
+            yield x.reshape(-1, channels)[:, 0]
+
+def _ffmpeg_blocks(path, block):
+    proc = subprocess.Popen(["ffmpeg", "-v", "error", "-i", str(path), "-f", "s16le", "-ac", "1", "-"],
+                            stdout=subprocess.PIPE)
+    try:
+        while True:
+            data = proc.stdout.read(2 * block)
+            if not data:
+                break
+            yield np.frombuffer(data[:len(data) // 2 * 2], dtype="<i2").astype(np.float32) / 32768
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+def source_rate(path):
+    """Sample rate of an audio file."""
+    if Path(path).suffix.lower() == ".wav":
+        with wave.open(str(path), "rb") as w:
+            return w.getframerate()
+    out = subprocess.run(["ffprobe", "-v", "error", "-select_streams", "a:0", "-show_entries",
+                          "stream=sample_rate", "-of", "csv=p=0", str(path)],
+                         capture_output=True, text=True, check=True)
+    return int(out.stdout.split()[0])
+
+def read_blocks(path, block=BLOCK):
+    """Mono float32 blocks in [-1, 1) at the file's own rate."""
+    if Path(path).suffix.lower() == ".wav":
+        return _wav_blocks(path, block)
+    return _ffmpeg_blocks(path, block)
+
+# ---------------- FILTERS ----------------
+# Filter designs are the same for every file at the same rates, so a process
+# converting many files (convert_folder.py's workers) designs each once.
+@functools.lru_cache(maxsize=None)
+def _highpass_sos(cutoff, rate, order):
+    return butter(order, cutoff, btype="high", fs=rate, output="sos")
+
+@functools.lru_cache(maxsize=None)
+def _polyphase_taps(up, down, half_taps):
+    """Taps per phase, each reversed, and the filter's delay on the upsampled grid."""
+    cutoff = 1 / max(up, down)
+    half = half_taps * max(up, down)
+    h = firwin(2 * half + 1, cutoff, window=("kaiser", 5.0)) * up
+    per_phase = -(-len(h) // up)
+    h = np.pad(h, (0, per_phase * up - len(h)))
+    # reversed[p] is the taps for outputs at upsampled position j * up + p,
+    # in the order of the inputs x[j - per_phase + 1] ... x[j]
+    reversed_taps = np.ascontiguousarray(h.reshape(per_phase, up).T[:, ::-1], dtype=np.float32)
+    reversed_taps.flags.writeable = False
+    return reversed_taps, half
+
+class Highpass:
+    """Butterworth high-pass as second-order sections, state kept between blocks."""
+
+    def __init__(self, cutoff, rate, order=1):
+        self.sos = _highpass_sos(cutoff, rate, order)
+        self.zi = np.zeros((self.sos.shape[0], 2))
+
+    def __call__(self, x):
+        y, self.zi = sosfilt(self.sos, x, zi=self.zi)
+        return y.astype(np.float32)
+
+class Resampler:
+    """Polyphase FIR resampling by up/down, fed block by block.
+
+    Output n sits at input time n * down / up, as with
+    scipy.signal.resample_poly (same Kaiser-window filter).
+    """
+
+    def __init__(self, rate_in, rate_out, half_taps=10):
+        g = math.gcd(rate_in, rate_out)
+        self.up, self.down = rate_out // g, rate_in // g
+        if self.up == self.down == 1:
+            return
+        self.reversed, self.delay = _polyphase_taps(self.up, self.down, half_taps)
+        self.per_phase = self.reversed.shape[1]
+        self.history = np.zeros(self.per_phase - 1, dtype=np.float32)
+        self.taken = 0    # input samples seen
+        self.emitted = 0  # output samples given
+
+    def _outputs(self, available):
+        """Outputs n whose newest input, at (n * down + delay) // up, is below available."""
+        last = (available * self.up - self.delay - 1) // self.down
+        return np.arange(self.emitted, max(self.emitted, last + 1))
+
+    def _run(self, x, n):
+        # x holds inputs from self.taken - len(self.history) on
+        buffer = np.concatenate([self.history, x])
+        base = self.taken - len(self.history)
+        t = n * self.down + self.delay
+        first = t // self.up - base - (self.per_phase - 1)  # start of each output's input window
+        y = np.empty(len(n), dtype=np.float32)
+        windows = sliding_window_view(buffer, self.per_phase) if len(n) else None
+        # Every up-th output has the same phase and a window down samples further on
+        for r in range(min(self.up, len(n))):
+            rows = windows[first[r]::self.down][:len(range(r, len(n), self.up))]
+            y[r::self.up] = rows @ self.reversed[t[r] % self.up]
+        self.taken += len(x)
+        self.history = buffer[len(buffer) - len(self.history):]
+        self.emitted += len(n)
+        return y
+
+    def __call__(self, x):
+        if self.up == self.down == 1:
+            return x
+        return self._run(x.astype(np.float32), self._outputs(self.taken + len(x)))
+
+    def flush(self, total):
+        """The outputs still owed once all total input samples are in (zeros after the end)."""
+        if self.up == self.down == 1:
+            return np.zeros(0, dtype=np.float32)
+        owed = -(-total * self.up // self.down)
+        pad = np.zeros(self.delay // self.up + 1, dtype=np.float32)
+        return self._run(pad, np.arange(self.emitted, owed))
+
+# ---------------- PIPELINE ----------------
+def convert(in_path, out_path, highpass=None, rate=RATE, percentile=PERCENTILE, block=BLOCK):
+    """Convert an audio file to raw unsigned 8-bit samples at rate. Returns how many."""
+    rate_in = source_rate(in_path)
+    hp = Highpass(highpass, rate_in) if highpass else None
+    resample = Resampler(rate_in, rate)
+    hist = np.zeros(HIST_BINS + 1, dtype=np.int64)
+    fd, tmp = tempfile.mkstemp(suffix=".f32")
+    try:
+        total = 0
+        with os.fdopen(fd, "wb") as spill:
+            def keep(y):
+                hist[:] += np.bincount(np.minimum((np.abs(y) * HIST_BINS).astype(np.int64), HIST_BINS),
+                                       minlength=HIST_BINS + 1)
+                y.astype(np.float32).tofile(spill)
+
+            for x in read_blocks(in_path, block):
+                total += len(x)
+                keep(resample(hp(x) if hp else x))
+            keep(resample.flush(total))
+
+        # The level that PERCENTILE of the samples stay under
+        cumulative = np.cumsum(hist)
+        count = int(cumulative[-1])
+        level = (np.searchsorted(cumulative, count * percentile / 100) + 1) / HIST_BINS
+        scale = 127 / max(level, 1 / HIST_BINS)
+
+        rng = np.random.default_rng(DITHER_SEED)
+        with open(tmp, "rb") as spill, open(out_path, "wb") as out:
+            while True:
+                y = np.fromfile(spill, dtype=np.float32, count=block)
+                if not len(y):
+                    break
+                y = y * scale + 128 + (rng.random(len(y)) - rng.random(len(y)))
+                np.clip(np.rint(y), 0, 255).astype(np.uint8).tofile(out)
+        return count
+    finally:
+        os.remove(tmp)
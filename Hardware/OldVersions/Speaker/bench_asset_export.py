@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+The same clip as a C header vs. asset_export's binary files.
+
+A synthetic 8-bit clip is written as speech.h (c_header.write_header) and
+as speech.bin, speech.hex and speech.pak. Reported for each: file size,
+size over the clip's bytes, and write speed.
+
+Then the cost on the compiler side: the header compiled to an object file
+vs. the .bin pulled in with an assembler .incbin, into the same
+.progmem.data section. avr-gcc is not needed for the comparison (and is
+often not installed where the bench runs), so the host gcc is used when
+there is no avr-gcc; a pgmspace.h shim makes the header build there.
+
+Usage:
+    python3 bench_asset_export.py [seconds of audio]
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from asset_export import export_assets
+from c_header import write_header
+
+RATE = 8000
+
+INCBIN = """\
+    .section .progmem.data,"a",@progbits
+    .global speech
+speech:
+    .incbin "{path}"
+    .global speech_end
+speech_end:
+"""
+
+def make_clip(seconds):
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * RATE)) / RATE
+    x = np.sin(2 * np.pi * 180 * t) * 60 * ((t % 1.0) < 0.5) + rng.normal(0, 8, len(t))
+    return np.clip(np.rint(x) + 128, 0, 255).astype(np.uint8)
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def compile_seconds(cc, source, workdir):
+    args = [cc, "-c", "-O2", source, "-o", os.path.join(workdir, "out.o")]
+    if cc == "gcc":
+        args[2:2] = ["-I", workdir]  # the avr/pgmspace.h shim
+    else:
+        args[2:2] = ["-mmcu=atmega328p"]
+    start = time.perf_counter()
+    subprocess.run(args, check=True)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    clip = make_clip(seconds)
+    workdir = tempfile.mkdtemp()
+    stem = os.path.join(workdir, "speech")
+    print(f"{seconds:g} s at {RATE} Hz: {len(clip) / 1e6:.2f} MB of samples")
+
+    writers = {
+        ".h": lambda: write_header(stem + ".h", clip, "speech"),
+        ".bin": lambda: export_assets(stem, clip, ["bin"]),
+        ".hex": lambda: export_assets(stem, clip, ["hex"]),
+        ".pak": lambda: export_assets(stem, clip, ["pak"], len(clip)),
+    }
+    for suffix, write in writers.items():
+        elapsed = timed(write)
+        size = os.path.getsize(stem + suffix)
+        print(f"  speech{suffix:<5} {size / 1e6:7.2f} MB  {size / len(clip):5.2f}x the samples  "
+              f"{len(clip) / elapsed / 1e6:7.1f} MB/s")
+
+    cc = "avr-gcc" if shutil.which("avr-gcc") else "gcc" if shutil.which("gcc") else None
+    if cc is None:
+        print("  (no C compiler, compile times skipped)")
+    else:
+        os.makedirs(os.path.join(workdir, "avr"))
+        with open(os.path.join(workdir, "avr", "pgmspace.h"), "w") as f:
+            f.write('#define PROGMEM __attribute__((section(".progmem.data")))\n')
+        header_c = os.path.join(workdir, "header.c")
+        with open(header_c, "w") as f:
+            f.write('#include "speech.h"\n')
+        incbin_s = os.path.join(workdir, "incbin.S")
+        with open(incbin_s, "w") as f:
+            f.write(INCBIN.format(path=stem + ".bin"))
+        print(f"Compiling to an object file with {cc}:")
+        for label, source in (("header", header_c), (".incbin", incbin_s)):
+            print(f"  {label:<8} {min(compile_seconds(cc, source, workdir) for _ in range(3)):6.2f} s")
+    shutil.rmtree(workdir)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Compressed PROGMEM formats on the repo's own recordings: size, quality, speed.
+
+For each encoding: compression ratio against 8-bit PCM, SNR of the decoded
+samples against the originals, seconds of speech that fit in 32 KB of flash,
+and encoder throughput. If a host C compiler is found, audio_decode.h is also
+built against a stand-in avr/pgmspace.h and its output compared byte for byte
+with the Python reference decoders.
+
+Usage:
+    python3 bench_audio_codecs.py [wav files...]
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from audio_codecs import ENCODINGS, decode, encode, write_encoded_header
+from phrase_bank import SAMPLE_RATE, read_wav
+
+HERE = Path(__file__).resolve().parent
+CORPUS = [HERE / "stream8bit" / "countdown.wav",
+          HERE / "stream8bit" / "temp.wav",
+          HERE / "stream8bit" / "nut_processed_full.wav",
+          HERE.parents[1] / "husky_and_tts_combined" / "response.wav"]
+FLASH = 32 * 1024
+
+PGMSPACE = """#define PROGMEM
+#define pgm_read_byte(p) (*(const uint8_t *)(p))
+#define pgm_read_word(p) (*(const uint16_t *)(p))
+"""
+PLAYER = """#include <stdio.h>
+#include "clip.h"
+int main(void) {
+  audio_decoder d;
+  audio_begin(&d, clip, CLIP_SAMPLES, CLIP_ENCODING);
+  while (d.left) putchar(audio_next(&d));
+  return 0;
+}
+"""
+
+def snr_db(original, decoded):
+    signal = original.astype(np.float64) - 128
+    noise = original.astype(np.float64) - decoded
+    if not noise.any():
+        return np.inf
+    return 10 * np.log10((signal ** 2).sum() / (noise ** 2).sum())
+
+def c_decode(workdir, samples, encoding, compiler):
+    """audio_decode.h's samples for these, or None if it does not build."""
+    write_encoded_header(str(workdir / "clip.h"), samples, "clip", encoding)
+    (workdir / "avr").mkdir(exist_ok=True)
+    (workdir / "avr" / "pgmspace.h").write_text(PGMSPACE)
+    shutil.copy(HERE / "audio_decode.h", workdir)
+    (workdir / "player.c").write_text(PLAYER)
+    built = subprocess.run([compiler, "-O2", "-I", str(workdir), "-o", str(workdir / "player"),
+                            str(workdir / "player.c")], capture_output=True, text=True)
+    if built.returncode:
+        print(built.stderr)
+        return None
+    return np.frombuffer(subprocess.run([str(workdir / "player")], capture_output=True).stdout, dtype=np.uint8)
+
+if __name__ == "__main__":
+    paths = [Path(p) for p in sys.argv[1:]] or [p for p in CORPUS if p.exists()]
+    clips = [read_wav(str(p)) for p in paths]
+    total = sum(len(c) for c in clips)
+    print(f"{len(clips)} recordings, {total / SAMPLE_RATE:.1f} s: " + ", ".join(p.name for p in paths))
+    compiler = shutil.which("cc") or shutil.which("gcc")
+    workdir = Path(tempfile.mkdtemp())
+    for encoding in ENCODINGS:
+        start = time.perf_counter()
+        encoded = [encode(c, encoding) for c in clips]
+        elapsed = time.perf_counter() - start
+        decoded = [decode(e, len(c), encoding) for e, c in zip(encoded, clips)]
+        size = sum(len(e) for e in encoded)
+        snr = snr_db(np.concatenate(clips), np.concatenate(decoded))
+        worst = min(snr_db(c, d) for c, d in zip(clips, decoded))
+        line = (f"  {encoding:<7} ratio {total / size:5.2f}   SNR {snr:6.1f} dB (worst clip {worst:5.1f})   "
+                f"{FLASH / size * total / SAMPLE_RATE:5.1f} s in 32 KB   encode {total / elapsed / 1e6:6.1f} MB/s")
+        if compiler and encoding != "pcm":
+            same = all(np.array_equal(c_decode(workdir, c, encoding, compiler), d) for c, d in zip(clips, decoded))
+            line += f"   C decoder {'same' if same else 'DIFFERS'}"
+        print(line)
+    shutil.rmtree(workdir)
+    if not compiler:
+        print("  (no C compiler found, audio_decode.h not checked)")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Converting long recordings: whole-file vs. audio_dsp's blocks.
+
+A synthetic 44.1 kHz 16-bit mono WAV (speech-like bursts and pauses, with
+one loud click near the start) is converted to 8 kHz unsigned 8-bit with
+the 60 Hz high-pass, each way in its own process:
+
+    whole file   as mp3_to_h_clean.py did: everything in memory, resampled
+                 in one go (pydub's part), lfilter, global min/max
+    blocks       audio_dsp.convert
+
+Reported: wall time, audio minutes per second, peak RSS of the process,
+and the RMS of the output around 128 (how loud the speech came out; the
+click squeezes the whole-file version).
+
+Usage:
+    python3 bench_audio_dsp.py [minutes]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+RATE_IN = 44100
+CLICK_AT = 5  # seconds
+
+def make_wav(path, minutes, chunk_seconds=10):
+    """Bursts of pitched noise every other half second, written chunk by chunk."""
+    rng = np.random.default_rng(0)
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE_IN)
+        for start in range(0, int(minutes * 60), chunk_seconds):
+            t = np.arange(chunk_seconds * RATE_IN) / RATE_IN + start
+            voiced = (t % 1.0) < 0.5
+            x = (np.sin(2 * np.pi * 180 * t) * 0.2 + rng.normal(0, 0.05, len(t))) * voiced
+            x += 0.05  # a DC offset for the high-pass to remove
+            if start <= CLICK_AT < start + chunk_seconds:
+                x[(CLICK_AT - start) * RATE_IN] = 0.99
+            w.writeframes((np.clip(x, -1, 1) * 32767).astype("<i2").tobytes())
+
+def whole_file(in_path, out_path):
+    from scipy.signal import butter, lfilter, resample_poly
+    with wave.open(in_path, "rb") as w:
+        x = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+    samples = resample_poly(x, 8000, RATE_IN).astype(np.float32)
+    b, a = butter(1, 60 / (8000 / 2), btype="high")
+    samples = lfilter(b, a, samples)
+    samples = ((samples - samples.min()) / (samples.max() - samples.min()) * 255)
+    samples.astype(np.uint8).tofile(out_path)
+
+def blocks(in_path, out_path):
+    from audio_dsp import convert
+    convert(in_path, out_path, highpass=60)
+
+def run_child(mode, in_path, out_path):
+    start = time.perf_counter()
+    (whole_file if mode == "whole" else blocks)(in_path, out_path)
+    elapsed = time.perf_counter() - start
+    print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        run_child(*sys.argv[2:5])
+        sys.exit(0)
+
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    workdir = tempfile.mkdtemp()
+    wav = os.path.join(workdir, "long.wav")
+    make_wav(wav, minutes)
+    print(f"{minutes:g} min at {RATE_IN} Hz, {os.path.getsize(wav) / 1e6:.0f} MB of WAV")
+    baseline = subprocess.run([sys.executable, "-c", "import resource, numpy, scipy.signal; "
+                               "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"],
+                              capture_output=True, text=True).stdout
+    print(f"  (an interpreter with numpy and scipy loaded: {int(baseline) / 1024:.0f} MB)")
+    for mode in ("whole", "blocks"):
+        out = os.path.join(workdir, f"{mode}.raw")
+        child = subprocess.run([sys.executable, __file__, "--child", mode, wav, out], capture_output=True, text=True)
+        if child.returncode:
+            print(f"  {mode:<7} failed: {child.stderr.strip().splitlines()[-1] if child.stderr else child.returncode}")
+            continue
+        elapsed, rss_kb = child.stdout.split()
+        y = np.memmap(out, dtype=np.uint8, mode="r")
+        level = np.sqrt(np.mean((y[:8000 * 60].astype(np.float32) - 128) ** 2))
+        print(f"  {mode:<7} {float(elapsed):7.1f} s   {minutes / float(elapsed):6.2f} audio min/s   "
+              f"peak RSS {int(rss_kb) / 1024:7.0f} MB   speech RMS {level:5.1f} LSB")
+        del y
+        os.remove(out)
+    os.remove(wav)
+    os.rmdir(workdir)
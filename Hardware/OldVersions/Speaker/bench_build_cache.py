@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Phrase bank rebuilds with the build cache: cold, warm, one phrase changed.
+
+100 phrases (bench_phrase_bank.py's corpus) as text, each "synthesized" by a
+loader that sleeps TTS_LATENCY (no network here) and returns the phrase's
+clip, encoded as ima4.
+
+    no cache    every phrase synthesized and encoded, as before the cache
+    cold        empty cache: the same work on the process pool, plus storing it
+    warm        nothing changed: every clip and encoded clip read back
+    one edit    one phrase's text changed: only it is synthesized again
+
+Usage:
+    python3 bench_build_cache.py [phrases]
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import phrase_bank
+from bench_phrase_bank import TTS_LATENCY, fake_tts, make_corpus
+from build_cache import BuildCache
+
+ENCODING = "ima4"
+
+def timed_build(cache, workers=phrase_bank.WORKERS):
+    start = time.perf_counter()
+    summary = phrase_bank.build("phrases.json", "out", workers, ENCODING, cache, fake_tts)
+    elapsed = time.perf_counter() - start
+    with open("out/phrase_bank.h") as f:
+        return elapsed, summary, f.read()
+
+def report(label, result):
+    elapsed, summary, _ = result
+    print(f"  {label:<10} {elapsed:7.2f} s   {summary['cache_hits']:>4} hits {summary['cache_misses']:>4} misses")
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    os.chdir(tempfile.mkdtemp())
+    manifest = make_corpus(n, np.random.default_rng(0))
+    phrases = {name: f"say {source[:-len('.wav')]}" for name, source in manifest.items()}
+    with open("phrases.json", "w") as f:
+        json.dump(phrases, f)
+
+    print(f"{n} phrases, {TTS_LATENCY * 1000:.0f} ms per synthesis, {ENCODING}, {phrase_bank.WORKERS} workers")
+    plain = timed_build(False)
+    report("no cache", plain)
+    cache = BuildCache("cache")
+    report("cold", timed_build(cache))
+    cache.hits = cache.misses = 0
+    warm = timed_build(cache)
+    report("warm", warm)
+    print(f"  warm bank {'identical' if warm[2] == plain[2] else 'DIFFERS'} to the uncached build")
+
+    # New text for one phrase (a new recording, to give its stand-in TTS a clip)
+    first = list(phrases)[0]
+    shutil.copy(manifest[first], "edited.wav")
+    phrases[first] = "say edited"
+    with open("phrases.json", "w") as f:
+        json.dump(phrases, f)
+    cache.hits = cache.misses = 0
+    report("one edit", timed_build(cache))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Header writing throughput: the old per-value loops vs. c_header.write_header.
+
+    gtts_to_h      f.write(f'{byte}, ') per sample, newline every 16
+    mp3_to_h       the same with "\\n  " every 20 (mp3_to_h_clean is identical)
+    raw2arduino    ','.join of each row of 16 bytes
+    write_header   from a uint8 array, and from a raw file (memory-mapped)
+
+MB/s of input samples. Every output is parsed back and checked against the
+input.
+
+Usage:
+    python3 bench_c_header.py [MB]
+"""
+
+import os
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from c_header import write_header
+
+# ---------------- THE OLD LOOPS ----------------
+def gtts_loop(out_file, data, array_name="speech"):
+    with open(out_file, "w") as f:
+        f.write(f'#include <avr/pgmspace.h>\n\n')
+        f.write(f'const unsigned char {array_name}[] PROGMEM = {{\n')
+        for i, byte in enumerate(data):
+            f.write(f'{byte}, ')
+            if (i+1) % 16 == 0:
+                f.write('\n')
+        f.write('\n};\n')
+
+def mp3_loop(out_file, samples, array_name="speech"):
+    with open(out_file, "w") as f:
+        f.write("#include <avr/pgmspace.h>\n\n")
+        f.write(f"const unsigned char {array_name}[] PROGMEM = {{\n")
+        for i, val in enumerate(samples):
+            if i % 20 == 0:
+                f.write("\n  ")
+            f.write(f"{val}, ")
+        f.write("\n};\n")
+
+def raw2arduino_loop(out_file, input_file):
+    with open(input_file, "rb") as f:
+        data = f.read()
+    with open(out_file, "w") as f:
+        f.write("const unsigned char speech[] PROGMEM = {\n")
+        for i in range(0, len(data), 16):
+            chunk = data[i:i+16]
+            f.write(','.join(str(b) for b in chunk))
+            f.write(",\n")
+        f.write("};\n")
+
+# ---------------- DRIVER ----------------
+def values(path):
+    body = open(path).read().split("{", 1)[1].rsplit("}", 1)[0]
+    return np.array(re.findall(r"\d+", body), dtype=np.uint8)
+
+def timed(label, n, fn, out_file, expected):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    ok = np.array_equal(values(out_file), expected)
+    print(f"  {label:<22} {n / elapsed / 1e6:8.2f} MB/s   {elapsed:7.3f} s   {'ok' if ok else 'MISMATCH'}")
+
+if __name__ == "__main__":
+    mb = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    n = int(mb * 1e6) + 7  # not a whole number of rows
+    os.chdir(tempfile.mkdtemp())
+    samples = np.random.default_rng(0).integers(0, 256, n, dtype=np.uint8)
+    samples.tofile("speech.raw")
+
+    print(f"{n:,} samples")
+    timed("gtts_to_h loop", n, lambda: gtts_loop("a.h", samples), "a.h", samples)
+    timed("mp3_to_h loop", n, lambda: mp3_loop("b.h", samples), "b.h", samples)
+    timed("raw2arduino loop", n, lambda: raw2arduino_loop("c.h", "speech.raw"), "c.h", samples)
+    timed("write_header array", n, lambda: write_header("d.h", samples), "d.h", samples)
+    timed("write_header row=20", n, lambda: write_header("e.h", samples, row=20), "e.h", samples)
+    timed("write_header raw file", n, lambda: write_header("f.h", "speech.raw"), "f.h", samples)
+    for name in ("a.h", "b.h", "c.h", "d.h", "e.h", "f.h", "speech.raw"):
+        os.remove(name)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Converting a folder of clips: one process per file vs. convert_folder.py.
+
+Synthetic 44.1 kHz 16-bit WAV clips of CLIP_SECONDS each (speech-like
+bursts) are converted to 8 kHz headers with the high-pass on, build cache
+off:
+
+    per file    a new `convert_folder.py <file>` process for every clip, as
+                a shell loop over mp3_to_h.py does (timed on the first
+                PER_FILE_SAMPLE clips, files/s taken from those)
+    pool        one convert_folder.py run with 1, 2, 4 and 8 workers
+
+Reported: files per second and the speedup over one process per file and
+over one worker. The speedup from more workers is bounded by the cores
+this machine has (printed first).
+
+Usage:
+    python3 bench_convert_folder.py [clips]
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from convert_folder import convert_folder
+
+RATE_IN = 44100
+CLIP_SECONDS = 2.0
+PER_FILE_SAMPLE = 40
+TOOL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "convert_folder.py")
+
+def make_clips(folder, n):
+    rng = np.random.default_rng(0)
+    t = np.arange(int(CLIP_SECONDS * RATE_IN)) / RATE_IN
+    for i in range(n):
+        x = np.sin(2 * np.pi * rng.uniform(120, 300) * t) * 0.3 * ((t % 0.6) < 0.4) + rng.normal(0, 0.03, len(t))
+        with wave.open(os.path.join(folder, f"clip_{i:04d}.wav"), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(RATE_IN)
+            w.writeframes((np.clip(x, -1, 1) * 32767).astype("<i2").tobytes())
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    workdir = tempfile.mkdtemp()
+    clips = os.path.join(workdir, "clips")
+    os.makedirs(clips)
+    make_clips(clips, n)
+    print(f"{n} clips of {CLIP_SECONDS:g} s at {RATE_IN} Hz, {os.cpu_count()} CPU(s)")
+
+    files = sorted(os.listdir(clips))[:PER_FILE_SAMPLE]
+    start = time.perf_counter()
+    for name in files:
+        subprocess.run([sys.executable, TOOL, os.path.join(clips, name), "-o", os.path.join(workdir, "one"),
+                        "--workers", "1", "--hp", "--no-cache"], check=True, capture_output=True)
+    per_file = len(files) / (time.perf_counter() - start)
+    print(f"  per file   {per_file:7.1f} files/s   ({n / per_file:6.1f} s for all {n})")
+
+    single = None
+    for workers in (1, 2, 4, 8):
+        out = os.path.join(workdir, f"pool{workers}")
+        summary = convert_folder([clips], out, workers, highpass=True, cache=False, progress=None)
+        assert summary["files"] == n and not summary["failed"], summary["errors"]
+        rate = summary["files_per_second"]
+        single = single or rate
+        print(f"  {workers} worker{'s' if workers > 1 else ' '}  {rate:7.1f} files/s   "
+              f"{summary['seconds']:6.1f} s   x{rate / per_file:5.1f} vs per file   x{rate / single:4.2f} vs 1 worker")
+    shutil.rmtree(workdir)
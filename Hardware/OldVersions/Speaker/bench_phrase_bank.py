@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Phrase bank for 100 phrases: flash used and build time.
+
+The phrases are built from a vocabulary of word clips, the way a robot's
+lines repeat ("Hello", "Hello there", "Hello there friend", the same
+"Oh bother" under two names), and written as 8 kHz 16-bit WAV files.
+
+    flash     one header per phrase (sum of the arrays) vs. the bank
+    build     decode + pack + write, 1 worker vs. WORKERS
+    tts       the same with a loader standing in for Google Cloud TTS:
+              a TTS_LATENCY sleep per phrase (no network here)
+
+The build cache is off throughout; bench_build_cache.py measures it.
+
+Usage:
+    python3 bench_phrase_bank.py [phrases]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+import phrase_bank
+
+WORDS = 40
+WORD_SECONDS = 0.3
+TTS_LATENCY = 0.15
+
+def word_clips(rng):
+    t = np.arange(int(WORD_SECONDS * phrase_bank.SAMPLE_RATE)) / phrase_bank.SAMPLE_RATE
+    return [(np.sin(2 * np.pi * rng.uniform(150, 900) * t) * 12000 + rng.normal(0, 800, len(t)))
+            .astype("<i2") for _ in range(WORDS)]
+
+def write_wav(path, samples):
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(phrase_bank.SAMPLE_RATE)
+        w.writeframes(samples.tobytes())
+
+def make_corpus(n, rng):
+    """{name: wav file}: prefix chains, repeats and one-off lines."""
+    words = word_clips(rng)
+    manifest = {}
+    while len(manifest) < n:
+        kind = len(manifest) % 4
+        if kind == 0 and manifest:  # the same line under another name
+            source = manifest[list(manifest)[rng.integers(len(manifest))]]
+            manifest[f"again_{len(manifest)}"] = source
+            continue
+        base = list(rng.integers(0, WORDS, rng.integers(2, 6)))
+        for extra in range(1 if kind == 1 else 3):  # "Hello", "Hello there", ...
+            if len(manifest) == n:
+                break
+            sentence = base + list(rng.integers(0, WORDS, extra))
+            name = f"line_{len(manifest)}"
+            write_wav(f"{name}.wav", np.concatenate([words[w] for w in sentence]))
+            manifest[name] = f"{name}.wav"
+    return manifest
+
+def fake_tts(source, base):
+    """"say line_3" -> line_3.wav's samples, TTS_LATENCY later."""
+    time.sleep(TTS_LATENCY)
+    return phrase_bank.load_clip(source[len("say "):] + ".wav", base)
+
+def timed_build(workers, loader=phrase_bank.load_clip):
+    start = time.perf_counter()
+    summary = phrase_bank.build("phrases.json", "out", workers, cache=False, loader=loader)
+    return summary, time.perf_counter() - start
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    os.chdir(tempfile.mkdtemp())
+    manifest = make_corpus(n, np.random.default_rng(0))
+    with open("phrases.json", "w") as f:
+        json.dump(manifest, f)
+
+    summary, one = timed_build(1)
+    _, many = timed_build(phrase_bank.WORKERS)
+    with open("out/phrase_bank.json") as f:
+        index = json.load(f)["phrases"]
+    body = open("out/phrase_bank.h").read().split("{", 1)[1].rsplit("}", 1)[0]
+    bank = bytes(int(v) for v in body.replace(",", " ").split())
+    ok = all(bank[e["offset"]:e["offset"] + e["length"]] == phrase_bank.load_clip(manifest[name])
+             for name, e in index.items())
+    print(f"{summary['phrases']} phrases, every one read back from the bank {'ok' if ok else 'MISMATCH'}")
+    print(f"  flash    separate headers {summary['separate_bytes']:>9,} B   bank {summary['bank_bytes']:>9,} B   "
+          f"saved {summary['saved_bytes']:,} B ({summary['saved_bytes'] / summary['separate_bytes']:.0%})")
+    print(f"  build    1 worker {one:6.2f} s   {phrase_bank.WORKERS} workers {many:6.2f} s")
+
+    with open("phrases.json", "w") as f:
+        json.dump({name: f"say {source[:-len('.wav')]}" for name, source in manifest.items()}, f)
+    _, one = timed_build(1, fake_tts)
+    _, many = timed_build(phrase_bank.WORKERS, fake_tts)
+    print(f"  tts      1 worker {one:6.2f} s   {phrase_bank.WORKERS} workers {many:6.2f} s   "
+          f"({TTS_LATENCY * 1000:.0f} ms per phrase)")
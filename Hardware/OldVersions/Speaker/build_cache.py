@@ -0,0 +1,119 @@
+"""
+Content-addressed cache for the audio header tools.
+
+Synthesizing a phrase (a TTS request) or decoding an MP3 (ffmpeg) is most
+of a build, and gives the same samples every time for the same input and
+settings. So the samples are stored under a key made from everything that
+decides them: the text or a hash of the input file's bytes, the sample
+rate, filter flags, encoding and the tool's version (bump it when the way
+a tool makes its samples changes). A rebuild with nothing changed reads
+every clip back from the cache.
+
+    .audio_cache/ab/ab12...ef    one entry, its raw bytes; the key is the name
+
+Entries are written to a temporary file and renamed into place, so a cache
+shared by several processes never holds half an entry.
+
+Usage:
+    cache = BuildCache()
+    key = cache.key("mp3_to_h_clean/1", file_digest(input_file), 8000, apply_hp)
+    samples = cache.get_array(key)
+    if samples is None:
+        samples = ...
+        cache.put(key, samples)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+CACHE_DIR = Path(__file__).resolve().parent / ".audio_cache"
+
+_digests = {}  # (path, size, mtime) -> sha256, for files hashed before in this process
+
+def file_digest(path):
+    """SHA-256 of a file's contents."""
+    path = Path(path).resolve()
+    st = path.stat()
+    memo = (str(path), st.st_size, st.st_mtime_ns)
+    if memo not in _digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        _digests[memo] = h.hexdigest()
+    return _digests[memo]
+
+class BuildCache:
+    """Bytes by key, on disk."""
+
+    def __init__(self, folder=CACHE_DIR):
+        self.folder = Path(folder)
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def key(*parts):
+        """A key from the tool's name/version and every input and setting that decides the result."""
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.folder / key[:2] / key
+
+    def get(self, key):
+        """The stored bytes, or None."""
+        try:
+            data = self._path(key).read_bytes()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def get_array(self, key):
+        """The stored uint8 samples, or None."""
+        data = self.get(key)
+        return None if data is None else np.frombuffer(data, dtype=np.uint8)
+
+    def path(self, key):
+        """The entry's file, or None. For entries too big to read in whole."""
+        path = self._path(key)
+        if not path.exists():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put_file(self, key, src):
+        """Copy a finished file in as key's entry. Returns the entry's path."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=key[:8], suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, path)
+        finally:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        return path
+
+    def put(self, key, data):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=key[:8], suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data.tobytes() if isinstance(data, np.ndarray) else data)
+            os.replace(tmp, path)
+        finally:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
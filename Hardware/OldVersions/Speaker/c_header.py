@@ -0,0 +1,98 @@
+"""
+Writes 8-bit audio as a PROGMEM array in a C header, for all the *_to_h tools.
+
+    #include <avr/pgmspace.h>
+
+    const unsigned char speech[] PROGMEM = {
+      128, 127, 130, ... (ROW values per line)
+    };
+
+Rows are formatted with NumPy rather than one f.write per byte: every
+value 0-255 is looked up in a precomputed table of its decimal text (with
+the indent or separator its column needs, padded to 8 bytes), and the
+bytes that are used are picked out with one mask. Input is handled BLOCK values at a
+time, and a raw file is memory-mapped rather than read in whole, so
+multi-megabyte clips never become a Python list.
+
+Usage from a tool:
+    from c_header import write_header
+    write_header("speech.h", samples)              # uint8 array or bytes
+    write_header("speech.h", "speech.raw", "speech")  # a raw file, memory-mapped
+"""
+
+import keyword
+import re
+from pathlib import Path
+
+import numpy as np
+
+ROW = 16          # values per line
+BLOCK = 1 << 20   # values formatted at a time
+INCLUDE = "#include <avr/pgmspace.h>\n\n"
+
+C_KEYWORDS = frozenset("""
+auto break case char const continue default do double else enum extern float for goto if inline int long
+register restrict return short signed sizeof static struct switch typedef union unsigned void volatile while
+""".split())
+
+def c_identifier(name):
+    """name made into a valid C identifier: "1sec test.h" -> "_1sec_test_h"."""
+    ident = re.sub(r"\W", "_", str(name), flags=re.ASCII)
+    if not ident or ident[0].isdigit():
+        ident = "_" + ident
+    if ident in C_KEYWORDS or keyword.iskeyword(ident):
+        ident += "_"
+    return ident
+
+def _column_tables(row):
+    """Each value's text in each column as one 8-byte word, and which of its bytes are used.
+
+    (row, 256) uint64 each: text padded with zeros, and a mask word of 0x01/0x00 bytes.
+    """
+    chars = np.zeros((row, 256, 8), dtype=np.uint8)
+    used = np.zeros((row, 256, 8), dtype=np.uint8)
+    for col in range(row):
+        for v in range(256):
+            text = f"{'  ' if col == 0 else ''}{v},{chr(10) if col == row - 1 else ' '}".encode("ascii")
+            chars[col, v, :len(text)] = np.frombuffer(text, dtype=np.uint8)
+            used[col, v, :len(text)] = 1
+    return chars.view(np.uint64)[..., 0].copy(), used.view(np.uint64)[..., 0].copy()
+
+_tables = {}
+
+def format_rows(values, row=ROW):
+    """Array body text for a whole number of rows of uint8 values."""
+    if row not in _tables:
+        _tables[row] = _column_tables(row)
+    words, used = _tables[row]
+    grid = np.asarray(values, dtype=np.uint8).reshape(-1, row)
+    cols = np.arange(row)
+    text = words[cols, grid].view(np.uint8).ravel()     # 8 bytes per value
+    return text[used[cols, grid].view(np.bool_).ravel()].tobytes()
+
+def _format_tail(values):
+    """The last, partial row."""
+    return ("  " + ", ".join(str(v) for v in values.tolist()) + ",\n").encode("ascii")
+
+def write_header(out_path, data, array_name=None, row=ROW, include=INCLUDE):
+    """Write data (uint8 array, bytes, or the path of a raw file) as a PROGMEM array. Returns its length.
+
+    array_name defaults to the output file's name, made a valid C identifier.
+    """
+    if isinstance(data, (str, Path)):
+        data = np.memmap(data, dtype=np.uint8, mode="r") if Path(data).stat().st_size else np.zeros(0, np.uint8)
+    elif isinstance(data, (bytes, bytearray, memoryview)):
+        data = np.frombuffer(data, dtype=np.uint8)
+    elif data.dtype != np.uint8:
+        raise ValueError(f"expected unsigned 8-bit samples, got {data.dtype}")
+    name = c_identifier(array_name or Path(out_path).stem)
+    block = BLOCK - BLOCK % row
+    full = len(data) - len(data) % row
+    with open(out_path, "wb") as f:
+        f.write(f"{include}const unsigned char {name}[] PROGMEM = {{\n".encode("ascii"))
+        for start in range(0, full, block):
+            f.write(format_rows(data[start:min(start + block, full)], row))
+        if full < len(data):
+            f.write(_format_tail(data[full:]))
+        f.write(b"};\n")
+    return len(data)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Convert a whole folder of audio to C headers in one run.
+
+Running mp3_to_h.py once per file pays for a Python interpreter, NumPy,
+pydub and the filter design every time. Here one process finds the files
+(directories are searched recursively, globs are expanded) and hands them
+to a pool of worker processes. Each worker sets itself up once - imports,
+build cache, filter designs (audio_dsp keeps them per process) - and then
+converts file after file the way mp3_to_h_clean.py does:
+
+    decode, optional 60 Hz high-pass, resample to 8 kHz, normalize, dither
+    -> <out_dir>/<name>.h, plus --encoding and --export as in the other tools
+
+Converted samples go through the build cache, so a second run only
+redoes the files that changed. One failing file is reported and skipped;
+the rest still convert. Progress goes to stderr, and a summary manifest
+is written to <out_dir>/convert_folder.json:
+
+    {"workers": 8, "files": 500, "failed": 0, "seconds": ..., "files_per_second": ...,
+     "clips": {"<source>": {"header": ..., "samples": ..., "bytes": ..., "sha1": ...,
+                            "cached": false, "seconds": ...}, ...},
+     "errors": {"<source>": "<message>", ...}}
+
+Usage:
+    python3 convert_folder.py sounds/ "more/*.mp3" -o headers/ [--workers 8] [--hp]
+                              [--encoding ima4] [--export bin pak] [--no-cache]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from asset_export import FORMATS, export_assets
+from audio_codecs import ENCODINGS, encode, write_encoded_header
+from audio_dsp import RATE, convert
+from build_cache import BuildCache, file_digest
+from c_header import c_identifier
+
+TOOL_VERSION = "convert_folder/1"  # bump when the conversion changes, to miss the build cache
+AUDIO_SUFFIXES = (".mp3", ".wav", ".ogg", ".flac", ".m4a")
+WORKERS = os.cpu_count() or 1
+HIGHPASS = 60  # Hz, with --hp
+
+# ---------------- INPUTS ----------------
+def find_inputs(patterns):
+    """Audio files under directories, matching globs, or named directly; sorted, each once."""
+    found = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            found += [p for p in path.rglob("*") if p.suffix.lower() in AUDIO_SUFFIXES]
+        elif path.is_file():
+            found.append(path)
+        else:
+            found += [Path(p) for p in glob.glob(pattern, recursive=True)
+                      if Path(p).suffix.lower() in AUDIO_SUFFIXES]
+    return sorted(dict.fromkeys(p.resolve() for p in found))
+
+def header_names(paths):
+    """{path: array name}; two files may not end up with the same header."""
+    names = {path: c_identifier(path.stem) for path in paths}
+    seen = {}
+    for path, name in names.items():
+        if name in seen:
+            raise SystemExit(f"{seen[name]} and {path} would both be written as {name}.h")
+        seen[name] = path
+    return names
+
+# ---------------- WORKER ----------------
+_worker = None  # one per worker process, made by the pool's initializer
+
+class Worker:
+    """Everything a worker process keeps between files."""
+
+    def __init__(self, out_dir, encoding="pcm", export=(), highpass=False, cache=True):
+        self.out_dir = Path(out_dir)
+        self.encoding = encoding
+        self.export = list(export)
+        self.highpass = HIGHPASS if highpass else None
+        self.cache = BuildCache() if cache else None
+
+    def samples(self, path):
+        """(8 kHz unsigned 8-bit samples, from the cache?) of one file."""
+        key = None
+        if self.cache is not None:
+            key = BuildCache.key(TOOL_VERSION, file_digest(path), RATE, self.highpass)
+            samples = self.cache.get_array(key)
+            if samples is not None:
+                return samples, True
+        with tempfile.TemporaryDirectory() as tmp:
+            convert(path, f"{tmp}/samples.raw", highpass=self.highpass)
+            if key is not None:
+                self.cache.put_file(key, f"{tmp}/samples.raw")
+            return np.fromfile(f"{tmp}/samples.raw", dtype=np.uint8), False
+
+    def __call__(self, path, name):
+        start = time.perf_counter()
+        samples, cached = self.samples(path)
+        header = self.out_dir / f"{name}.h"
+        size = write_encoded_header(header, samples, name, self.encoding, row=20)
+        if self.export:
+            export_assets(header, encode(samples, self.encoding), self.export, len(samples), self.encoding, name)
+        return {"header": str(header), "samples": len(samples), "bytes": size,
+                "sha1": hashlib.sha1(samples.tobytes()).hexdigest(), "cached": cached,
+                "seconds": round(time.perf_counter() - start, 4)}
+
+def _start_worker(*settings):
+    global _worker
+    _worker = Worker(*settings)
+
+def _convert_one(path, name):
+    return _worker(path, name)
+
+# ---------------- RUN ----------------
+def _progress(done, total, path, stream=sys.stderr):
+    if stream is not None:
+        stream.write(f"\r[{done}/{total}] {path.name[:60]:<60}")
+        stream.flush()
+        if done == total:
+            stream.write("\n")
+
+def convert_folder(patterns, out_dir, workers=WORKERS, encoding="pcm", export=(), highpass=False,
+                   cache=True, progress=sys.stderr):
+    """Convert every file the patterns find. Returns the summary written as convert_folder.json."""
+    paths = find_inputs(patterns)
+    names = header_names(paths)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    settings = (out_dir, encoding, list(export), highpass, cache)
+    clips, errors = {}, {}
+    start = time.perf_counter()
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths)), initializer=_start_worker,
+                                 initargs=settings) as pool:
+            futures = {pool.submit(_convert_one, path, names[path]): path for path in paths}
+            for done, future in enumerate(as_completed(futures), 1):
+                path = futures[future]
+                try:
+                    clips[str(path)] = future.result()
+                except Exception as e:
+                    errors[str(path)] = f"{type(e).__name__}: {e}"
+                _progress(done, len(paths), path, progress)
+    else:
+        worker = Worker(*settings)
+        for done, path in enumerate(paths, 1):
+            try:
+                clips[str(path)] = worker(path, names[path])
+            except Exception as e:
+                errors[str(path)] = f"{type(e).__name__}: {e}"
+            _progress(done, len(paths), path, progress)
+    elapsed = time.perf_counter() - start
+
+    summary = {"tool": TOOL_VERSION, "workers": workers, "encoding": encoding, "highpass": highpass,
+               "files": len(paths), "failed": len(errors), "seconds": round(elapsed, 3),
+               "files_per_second": round(len(paths) / elapsed, 2) if elapsed else None,
+               "clips": dict(sorted(clips.items())), "errors": errors}
+    with open(out_dir / "convert_folder.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert folders of audio to C headers on a process pool.")
+    parser.add_argument("inputs", nargs="+", help="directories, globs or files")
+    parser.add_argument("-o", "--out-dir", required=True)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--hp", action="store_true", help=f"high-pass at {HIGHPASS} Hz")
+    parser.add_argument("--encoding", choices=ENCODINGS, default="pcm")
+    parser.add_argument("--export", nargs="+", choices=FORMATS, default=[], help="binary assets to write as well")
+    parser.add_argument("--no-cache", action="store_true", help="convert everything again")
+    args = parser.parse_args()
+
+    summary = convert_folder(args.inputs, args.out_dir, args.workers, args.encoding, args.export, args.hp,
+                             not args.no_cache)
+    print(f"Done! {summary['files'] - summary['failed']} of {summary['files']} files in "
+          f"{summary['seconds']:.2f} s ({summary['files_per_second']} files/s, {summary['workers']} workers).")
+    for source, message in summary["errors"].items():
+        print(f"  failed: {source}: {message}")
+    sys.exit(1 if summary["failed"] else 0)
@@ -3,14 +3,23 @@
 Convert text to Arduino PROGMEM .h file using Google Cloud TTS.
 
 Usage:
-    python3 gtts_to_h.py "Hello world" output.h
+    python3 gtts_to_h.py "Hello world" output.h [--encoding=ima4|adpcm2|ulaw] [--export=bin,hex,pak]
 """
 
 import sys
+from pathlib import Path
+
 import numpy as np
 from google.cloud import texttospeech
 from scipy.io import wavfile
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from asset_export import export_arg, export_assets
+from audio_codecs import encode, encoding_arg, write_encoded_header
+from build_cache import BuildCache
+
+TOOL_VERSION = "gtts_to_h/1"  # bump when synthesis changes, to miss the build cache
+
 def synthesize_text(text, filename="temp.wav", sample_rate=8000):
     client = texttospeech.TextToSpeechClient()
     
@@ -33,7 +42,7 @@ def synthesize_text(text, filename="temp.wav", sample_rate=8000):
 
     return filename
 
-def convert_wav_to_8bit_array(wav_file, out_file, array_name="speech"):
+def read_8bit(wav_file):
     rate, data = wavfile.read(wav_file)
     if data.ndim > 1:
         data = data[:,0]  # take first channel if stereo
@@ -45,15 +54,15 @@ def convert_wav_to_8bit_array(wav_file, out_file, array_name="speech"):
         pass  # already 8-bit
     else:
         raise ValueError("Unsupported WAV format")
+    return data
 
-    with open(out_file, "w") as f:
-        f.write(f'#include <avr/pgmspace.h>\n\n')
-        f.write(f'const unsigned char {array_name}[] PROGMEM = {{\n')
-        for i, byte in enumerate(data):
-            f.write(f'{byte}, ')
-            if (i+1) % 16 == 0:
-                f.write('\n')
-        f.write('\n};\n')
+def convert_wav_to_8bit_array(wav_file, out_file, array_name="speech", encoding="pcm", formats=(), data=None):
+    """Header (and --export assets) of a WAV file, or of data if its samples were read already."""
+    if data is None:
+        data = read_8bit(wav_file)
+    write_encoded_header(out_file, data, array_name, encoding)
+    if formats:
+        export_assets(out_file, encode(data, encoding), formats, len(data), encoding)
 
     print(f"Saved Arduino .h file: {out_file}")
 
@@ -65,5 +74,11 @@ if __name__ == "__main__":
     text_input = sys.argv[1]
     h_filename = sys.argv[2]
 
-    wav_file = synthesize_text(text_input)
-    convert_wav_to_8bit_array(wav_file, h_filename)
+    # Same text as before: no need to ask Google again
+    cache = BuildCache()
+    key = cache.key(TOOL_VERSION, text_input, 8000)
+    data = cache.get_array(key)
+    if data is None:
+        data = read_8bit(synthesize_text(text_input))
+        cache.put(key, data)
+    convert_wav_to_8bit_array(None, h_filename, encoding=encoding_arg(sys.argv), formats=export_arg(sys.argv), data=data)
@@ -1,37 +1,47 @@
 #!/usr/bin/env python3
 import sys
+from pathlib import Path
+
 import numpy as np
 from pydub import AudioSegment
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from asset_export import export_arg, export_assets
+from audio_codecs import encode, encoding_arg, write_encoded_header
+from build_cache import BuildCache, file_digest
+
+TOOL_VERSION = "mp3_to_h/1"  # bump when the conversion changes, to miss the build cache
+
 if len(sys.argv) < 3:
-    print("Usage: python3 mp3_to_h.py input.mp3 output.h")
+    print("Usage: python3 mp3_to_h.py input.mp3 output.h [--encoding=ima4|adpcm2|ulaw] [--export=bin,hex,pak]")
     sys.exit(1)
 
 input_file = sys.argv[1]
 output_file = sys.argv[2]
 
-# Load MP3 and convert
+# Load MP3 and convert, unless this file was converted before
 print(f"Converting {input_file} → {output_file}")
-audio = AudioSegment.from_mp3(input_file)
+cache = BuildCache()
+key = cache.key(TOOL_VERSION, file_digest(input_file), 8000)
+samples = cache.get_array(key)
+if samples is None:
+    audio = AudioSegment.from_mp3(input_file)
 
-# Convert: mono, 8kHz, 8-bit unsigned PCM
-audio = audio.set_channels(1)
-audio = audio.set_frame_rate(8000)
-audio = audio.set_sample_width(1)  # 8-bit
+    # Convert: mono, 8kHz, 8-bit unsigned PCM
+    audio = audio.set_channels(1)
+    audio = audio.set_frame_rate(8000)
+    audio = audio.set_sample_width(1)  # 8-bit
 
-# Export raw data (unsigned 8-bit PCM)
-raw_data = audio.raw_data
-samples = np.frombuffer(raw_data, dtype=np.uint8)
+    # Export raw data (unsigned 8-bit PCM)
+    raw_data = audio.raw_data
+    samples = np.frombuffer(raw_data, dtype=np.uint8)
+    cache.put(key, samples)
 
 # Generate header file
-array_name = output_file.split('.')[0]
-with open(output_file, "w") as f:
-    f.write("#include <avr/pgmspace.h>\n\n")
-    f.write(f"const unsigned char {array_name}[] PROGMEM = {{\n")
-    for i, val in enumerate(samples):
-        if i % 20 == 0:
-            f.write("\n  ")
-        f.write(f"{val}, ")
-    f.write("\n};\n")
+# array named after the file, e.g. speech.h -> speech
+encoding = encoding_arg(sys.argv)
+write_encoded_header(output_file, samples, encoding=encoding, row=20)
+# and the same bytes as .bin / .hex / .pak if asked
+export_assets(output_file, encode(samples, encoding), export_arg(sys.argv), len(samples), encoding)
 
 print(f"Done! Generated {output_file} with {len(samples)} samples.")
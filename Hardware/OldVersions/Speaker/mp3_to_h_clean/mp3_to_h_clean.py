@@ -1,51 +1,51 @@
 #!/usr/bin/env python3
 import sys
+import tempfile
+from pathlib import Path
+
 import numpy as np
-from pydub import AudioSegment
-from scipy.signal import butter, lfilter
 
-def highpass(data, cutoff=60, fs=8000):
-    """Apply a 1st-order high-pass filter to remove low-frequency noise."""
-    b, a = butter(1, cutoff/(fs/2), btype='high')
-    return lfilter(b, a, data)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from asset_export import export_arg, export_assets
+from audio_codecs import encode, encoding_arg, write_encoded_header
+from audio_dsp import convert
+from build_cache import BuildCache, file_digest
+from c_header import write_header
+
+TOOL_VERSION = "mp3_to_h_clean/2"  # bump when the conversion changes, to miss the build cache
 
 if len(sys.argv) < 3:
-    print("Usage: python3 mp3_to_h_clean.py input.mp3 output.h [--hp]")
+    print("Usage: python3 mp3_to_h_clean.py input.mp3 output.h [--hp] [--encoding=ima4|adpcm2|ulaw] [--export=bin,hex,pak]")
     print("  --hp : optional high-pass filter at 60 Hz")
     sys.exit(1)
 
 input_file = sys.argv[1]
 output_file = sys.argv[2]
 apply_hp = "--hp" in sys.argv
-
-# --- Load MP3 and convert ---
-audio = AudioSegment.from_mp3(input_file)
-audio = audio.set_channels(1)       # mono
-audio = audio.set_frame_rate(8000)  # 8 kHz
-audio = audio.set_sample_width(1)   # 8-bit PCM
-
-# --- Convert raw data to numpy array ---
-raw_data = audio.raw_data
-samples = np.frombuffer(raw_data, dtype=np.int8)  # signed 8-bit PCM from pydub
-
-# --- Apply optional high-pass filter ---
-samples = samples.astype(np.float32)
-if apply_hp:
-    samples = highpass(samples, cutoff=60, fs=8000)
-
-# --- Normalize and center around 128 for Arduino ---
-samples = ((samples - samples.min()) / (samples.max() - samples.min()) * 255)
-samples = samples.astype(np.uint8)
+encoding = encoding_arg(sys.argv)
+
+# --- Decode, filter, resample, normalize and dither, unless this file was converted with these flags before ---
+# In blocks (audio_dsp.py), so an hour-long file takes no more memory than a second
+cache = BuildCache()
+key = cache.key(TOOL_VERSION, file_digest(input_file), 8000, apply_hp)
+raw = cache.path(key)
+if raw is None:
+    with tempfile.TemporaryDirectory() as tmp:
+        convert(input_file, f"{tmp}/samples.raw", highpass=60 if apply_hp else None)
+        raw = cache.put_file(key, f"{tmp}/samples.raw")
 
 # --- Write header file ---
-array_name = output_file.split('.')[0]
-with open(output_file, "w") as f:
-    f.write("#include <avr/pgmspace.h>\n\n")
-    f.write(f"const unsigned char {array_name}[] PROGMEM = {{\n")
-    for i, val in enumerate(samples):
-        if i % 20 == 0:
-            f.write("\n  ")
-        f.write(f"{val}, ")
-    f.write("\n};\n")
-
-print(f"Done! Generated {output_file} with {len(samples)} samples.")
+# array named after the file, e.g. speech.h -> speech
+formats = export_arg(sys.argv)
+if encoding == "pcm":
+    n = write_header(output_file, raw, row=20)  # streamed from the cached file
+    if formats:  # the same bytes as .bin / .hex / .pak, streamed too
+        export_assets(output_file, np.memmap(raw, dtype=np.uint8, mode="r"), formats, n, encoding)
+else:
+    samples = np.fromfile(raw, dtype=np.uint8)  # the encoders take the whole clip
+    write_encoded_header(output_file, samples, encoding=encoding, row=20)
+    n = len(samples)
+    if formats:
+        export_assets(output_file, encode(samples, encoding), formats, n, encoding)
+
+print(f"Done! Generated {output_file} with {n} samples.")
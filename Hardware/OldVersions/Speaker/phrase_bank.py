@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Compile many phrases into one PROGMEM bank instead of one header per clip.
+
+The manifest names each phrase and says where its audio comes from:
+
+    {
+      "hello": "Hello, I am Winnie the Pooh.",   text, synthesized with Google Cloud TTS
+      "growl": "sounds/growl.mp3",               an audio file (.mp3, .wav or .raw),
+      ...                                        relative to the manifest
+    }
+
+Every phrase becomes 8 kHz unsigned 8-bit mono. Clips come from the build
+cache (build_cache.py) when their text or file and TOOL_VERSION are
+unchanged; only the rest are synthesized or decoded, at once on a process
+pool, and then cached. Encoded clips are cached the same way. Identical
+clips are stored once, and a clip that is the start of a longer one points
+into it, so the bank holds each distinct clip once. Written to the output
+folder:
+
+    phrase_bank.h     const unsigned char phrase_bank[] PROGMEM, every clip back to back
+    phrase_index.h    PHRASE_<NAME> numbers and phrase_offset[] / phrase_length[] tables
+    phrase_bank.json  the same index for the Python side, with each clip's SHA-1
+
+Offsets are in bytes of the bank, lengths in samples. Playing a phrase with
+the PCM library:
+    startPlayback(phrase_bank + pgm_read_dword(&phrase_offset[PHRASE_HELLO]),
+                  pgm_read_dword(&phrase_length[PHRASE_HELLO]));
+
+With --encoding (see audio_codecs.py) every stored clip is compressed on its
+own and played through audio_decode.h instead:
+    audio_begin(&voice, phrase_bank + pgm_read_dword(&phrase_offset[PHRASE_HELLO]),
+                pgm_read_dword(&phrase_length[PHRASE_HELLO]), PHRASE_BANK_ENCODING);
+
+Usage:
+    python3 phrase_bank.py phrases.json [out_dir] [--workers 8] [--encoding ima4] [--no-cache]
+                           [--export bin hex pak]
+
+--export also writes the bank as phrase_bank.bin / phrase_bank.hex (the
+same offsets apply) and the phrases as phrase_bank.pak for the SD card
+(asset_export.py, wpak.h).
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+
+from asset_export import FORMATS, export_assets, write_pack
+from audio_codecs import ENCODINGS, encode
+from audio_codecs import VERSION as CODEC_VERSION
+from build_cache import BuildCache, file_digest
+from c_header import INCLUDE, c_identifier, write_header
+
+SAMPLE_RATE = 8000
+WORKERS = 8
+AUDIO_SUFFIXES = (".mp3", ".wav", ".raw")
+BANK_NAME = "phrase_bank"
+TOOL_VERSION = "phrase_bank/1"  # bump when synthesis or decoding changes, to miss the build cache
+
+# ---------------- DECODING ----------------
+def to_uint8(samples, rate):
+    """Mono samples of any integer width at any rate -> 8 kHz unsigned 8-bit."""
+    if samples.ndim > 1:
+        samples = samples[:, 0]  # first channel if stereo
+    if samples.dtype == np.int16:
+        samples = ((samples.astype(np.int32) + 32768) >> 8).astype(np.uint8)
+    elif samples.dtype != np.uint8:
+        raise ValueError(f"Unsupported sample format {samples.dtype}")
+    if rate != SAMPLE_RATE and len(samples):
+        n = int(round(len(samples) * SAMPLE_RATE / rate))
+        samples = np.interp(np.arange(n) * (rate / SAMPLE_RATE), np.arange(len(samples)), samples)
+        samples = np.round(samples).astype(np.uint8)
+    return samples
+
+def read_wav(source):
+    """WAV file (path or file object) -> 8 kHz unsigned 8-bit samples."""
+    with wave.open(source, "rb") as w:
+        width, channels, rate = w.getsampwidth(), w.getnchannels(), w.getframerate()
+        frames = w.readframes(w.getnframes())
+    if width not in (1, 2):
+        raise ValueError(f"Unsupported WAV sample width {width}")
+    samples = np.frombuffer(frames, dtype=np.uint8 if width == 1 else "<i2").reshape(-1, channels)
+    return to_uint8(samples, rate)
+
+def read_mp3(path):
+    from pydub import AudioSegment
+    audio = AudioSegment.from_mp3(path).set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(1)
+    # pydub's 8-bit samples are signed
+    return (np.frombuffer(audio.raw_data, dtype=np.int8).astype(np.int16) + 128).astype(np.uint8)
+
+_tts_client = None
+
+def synthesize(text):
+    """Text -> 8 kHz unsigned 8-bit samples, with Google Cloud TTS as in gtts_to_h.py."""
+    global _tts_client
+    from google.cloud import texttospeech
+    if _tts_client is None:
+        _tts_client = texttospeech.TextToSpeechClient()
+    response = _tts_client.synthesize_speech(
+        input=texttospeech.SynthesisInput(text=text),
+        voice=texttospeech.VoiceSelectionParams(language_code="en-US",
+                                                ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL),
+        audio_config=texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.LINEAR16,
+                                              sample_rate_hertz=SAMPLE_RATE),
+    )
+    return read_wav(io.BytesIO(response.audio_content))  # LINEAR16 comes with a WAV header
+
+def is_file_source(source):
+    return source.lower().endswith(AUDIO_SUFFIXES)
+
+def load_clip(source, base=Path(".")):
+    """A manifest entry's audio as bytes of 8 kHz unsigned 8-bit samples."""
+    if not is_file_source(source):
+        return synthesize(source).tobytes()
+    path = base / source
+    suffix = path.suffix.lower()
+    if suffix == ".raw":
+        return path.read_bytes()
+    if suffix == ".wav":
+        return read_wav(str(path)).tobytes()
+    return read_mp3(path).tobytes()
+
+def clip_key(source, base=Path(".")):
+    """Build cache key of a manifest entry's clip."""
+    if is_file_source(source):
+        return BuildCache.key(TOOL_VERSION, "file", file_digest(base / source), SAMPLE_RATE)
+    return BuildCache.key(TOOL_VERSION, "text", source, SAMPLE_RATE)
+
+def load_clips(sources, base=Path("."), workers=WORKERS, cache=None, loader=load_clip):
+    """{source: clip bytes} for the distinct sources, through the cache if given."""
+    clips, keys = {}, {}
+    for source in dict.fromkeys(sources):
+        if cache is not None:
+            keys[source] = clip_key(source, base)
+            data = cache.get(keys[source])
+            if data is not None:
+                clips[source] = data
+                continue
+        clips[source] = None
+    missing = [s for s, data in clips.items() if data is None]
+    if len(missing) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(missing))) as pool:
+            loaded = list(pool.map(loader, missing, repeat(base)))
+    else:
+        loaded = [loader(s, base) for s in missing]
+    for source, data in zip(missing, loaded):
+        clips[source] = data
+        if cache is not None:
+            cache.put(keys[source], data)
+    return clips
+
+# ---------------- PACKING ----------------
+def encode_clip(clip, encoding, cache=None):
+    """clip bytes -> encoded bytes, through the cache if given."""
+    if encoding == "pcm":
+        return clip
+    key = BuildCache.key(CODEC_VERSION, encoding, hashlib.sha256(clip).hexdigest())
+    data = None if cache is None else cache.get(key)
+    if data is None:
+        data = encode(np.frombuffer(clip, dtype=np.uint8), encoding)
+        if cache is not None:
+            cache.put(key, data)
+    return data
+
+def pack(clips, encoding="pcm", cache=None):
+    """{name: bytes} -> (bank bytes, {name: (byte offset, samples)}).
+
+    Each distinct clip is stored once, and a clip that is a prefix of another
+    is not stored at all: it points at the start of the longer one. The
+    decoders are sequential, so that holds for encoded clips too.
+    """
+    unique = sorted(set(clips.values()))
+    # Everything starting with a clip sorts right after it, so the clip is a
+    # prefix of the next one if it is a prefix of any; follow the chain to the longest.
+    host = list(range(len(unique)))
+    for i in range(len(unique) - 2, -1, -1):
+        if unique[i + 1].startswith(unique[i]):
+            host[i] = host[i + 1]
+    offsets, parts, size = {}, [], 0
+    for i, clip in enumerate(unique):
+        if host[i] == i:
+            offsets[i] = size
+            parts.append(encode_clip(clip, encoding, cache))
+            size += len(parts[-1])
+    position = {clip: offsets[host[i]] for i, clip in enumerate(unique)}
+    index = {name: (position[clip], len(clip)) for name, clip in clips.items()}
+    return b"".join(parts), index
+
+# ---------------- OUTPUT ----------------
+def write_index_header(path, index, encoding="pcm"):
+    names = list(index)
+    with open(path, "w", encoding="ascii") as f:
+        f.write("// Generated by phrase_bank.py: where each phrase sits in phrase_bank[] (phrase_bank.h)\n")
+        f.write("#include <avr/pgmspace.h>\n#include <stdint.h>\n\n")
+        if encoding != "pcm":
+            f.write(f"#define PHRASE_BANK_ENCODING AUDIO_{encoding.upper()}  // audio_decode.h\n\n")
+        for i, name in enumerate(names):
+            f.write(f"#define PHRASE_{c_identifier(name).upper()} {i}\n")
+        f.write(f"#define PHRASE_COUNT {len(names)}\n\n")
+        f.write("const uint32_t phrase_offset[] PROGMEM = {\n")
+        f.write("".join(f"  {index[n][0]},  // {c_identifier(n)}\n" for n in names))
+        f.write("};\n\nconst uint32_t phrase_length[] PROGMEM = {\n")
+        f.write("".join(f"  {index[n][1]},\n" for n in names))
+        f.write("};\n")
+
+def build(manifest_path, out_dir=None, workers=WORKERS, encoding="pcm", cache=True, loader=load_clip,
+          export=()):
+    """Compile a manifest. Returns a summary dict.
+
+    cache: True for the shared build cache, False for none, or a BuildCache.
+    export: any of asset_export.FORMATS, written next to the headers.
+    """
+    manifest_path = Path(manifest_path)
+    out_dir = Path(out_dir) if out_dir else manifest_path.parent
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        phrases = json.load(f)
+    idents = [c_identifier(name).upper() for name in phrases]
+    if len(set(idents)) != len(idents):
+        raise ValueError("Two phrase names map to the same PHRASE_ constant")
+
+    start = time.perf_counter()
+    if cache is True:
+        cache = BuildCache()
+    cache = cache or None
+    loaded = load_clips(phrases.values(), manifest_path.parent, workers, cache, loader)
+    clips = {name: loaded[source] for name, source in phrases.items()}
+    bank, index = pack(clips, encoding, cache)
+    include = INCLUDE if encoding == "pcm" else INCLUDE.rstrip("\n") + '\n#include "audio_decode.h"\n\n'
+    write_header(out_dir / f"{BANK_NAME}.h", bank, BANK_NAME, include=include)
+    write_index_header(out_dir / "phrase_index.h", index, encoding)
+    entries = {name: {"id": i, "offset": index[name][0], "length": index[name][1],
+                      "sha1": hashlib.sha1(clips[name]).hexdigest(), "source": phrases[name]}
+               for i, name in enumerate(phrases)}
+    with open(out_dir / f"{BANK_NAME}.json", "w", encoding="utf-8") as f:
+        json.dump({"sample_rate": SAMPLE_RATE, "encoding": encoding, "bank_bytes": len(bank), "phrases": entries},
+                  f, indent=2, ensure_ascii=False)
+    stem = out_dir / BANK_NAME
+    export_assets(stem, bank, [fmt for fmt in export if fmt != "pak"])
+    if "pak" in export:
+        write_pack(stem.with_suffix(".pak"), [(name, encode_clip(clips[name], encoding, cache), len(clips[name]),
+                                               encoding) for name in phrases], SAMPLE_RATE)
+
+    separate = sum(len(c) for c in clips.values())
+    return {"phrases": len(clips), "separate_bytes": separate, "bank_bytes": len(bank),
+            "saved_bytes": separate - len(bank), "seconds": time.perf_counter() - start,
+            "cache_hits": cache.hits if cache else 0, "cache_misses": cache.misses if cache else 0}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile phrases into one PROGMEM bank.")
+    parser.add_argument("manifest", help="JSON object of phrase name -> text or audio file")
+    parser.add_argument("out_dir", nargs="?", help="default: the manifest's folder")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--encoding", choices=ENCODINGS, default="pcm")
+    parser.add_argument("--no-cache", action="store_true", help="synthesize and decode everything again")
+    parser.add_argument("--export", nargs="+", choices=FORMATS, default=[], help="binary assets to write as well")
+    args = parser.parse_args()
+
+    summary = build(args.manifest, args.out_dir, args.workers, args.encoding, not args.no_cache,
+                    export=args.export)
+    print(f"Done! {summary['phrases']} phrases in {summary['bank_bytes']} bytes of flash "
+          f"({summary['saved_bytes']} saved) in {summary['seconds']:.2f} s, "
+          f"{summary['cache_hits']} cached, {summary['cache_misses']} built.")
@@ -1,24 +1,29 @@
 # raw2arduino.py
 import sys
 
+import numpy as np
+
+from asset_export import export_arg, export_assets
+from audio_codecs import encode, encoding_arg, write_encoded_header
+from c_header import write_header
+
 if len(sys.argv) < 3:
-    print("Usage: python raw2arduino.py input.raw output.h")
+    print("Usage: python raw2arduino.py input.raw output.h [--encoding=ima4|adpcm2|ulaw] [--export=bin,hex,pak]")
     sys.exit(1)
 
 input_file = sys.argv[1]   # your .raw file
 output_file = sys.argv[2]  # e.g., speech.h
+encoding = encoding_arg(sys.argv)
 
-# Read raw audio bytes
-with open(input_file, "rb") as f:
-    data = f.read()
+# Write the raw audio bytes as a C array (the file is memory-mapped, not read in whole)
+if encoding == "pcm":
+    n = write_header(output_file, input_file, "speech")
+else:
+    n = write_encoded_header(output_file, np.fromfile(input_file, dtype=np.uint8), "speech", encoding)
 
-# Write as a C array
-with open(output_file, "w") as f:
-    f.write("const unsigned char speech[] PROGMEM = {\n")
-    for i in range(0, len(data), 16):
-        chunk = data[i:i+16]
-        f.write(','.join(str(b) for b in chunk))
-        f.write(",\n")
-    f.write("};\n")
+formats = export_arg(sys.argv)
+if formats:  # the same bytes as .bin / .hex / .pak
+    samples = np.fromfile(input_file, dtype=np.uint8)
+    export_assets(output_file, encode(samples, encoding), formats, len(samples), encoding, "speech")
 
-print(f"Wrote {len(data)} bytes to {output_file}")
+print(f"Wrote {n} bytes to {output_file}")
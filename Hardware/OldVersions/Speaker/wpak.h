@@ -0,0 +1,51 @@
+/*
+ * SD card packs written by asset_export.py (write_pack, or --export=pak):
+ * look a clip up by name, then read entry.length bytes from entry.offset,
+ * which is always at the start of a 512-byte sector.
+ *
+ *   File pack = SD.open("PHRASES.PAK");
+ *   wpak_entry hello;
+ *   if (wpak_find(pack, "hello", &hello)) {
+ *     pack.seek(hello.offset);
+ *     ...  // hello.samples samples in hello.encoding (AUDIO_PCM ... AUDIO_ULAW, audio_decode.h)
+ *   }
+ */
+#ifndef WPAK_H
+#define WPAK_H
+
+#include <SD.h>
+#include <string.h>
+
+#define WPAK_VERSION 1
+
+typedef struct {
+  char magic[4];         // "WPAK"
+  uint16_t version;
+  uint16_t count;        // directory entries
+  uint32_t sample_rate;
+  uint8_t reserved[4];
+} wpak_header;
+
+typedef struct {
+  char name[16];         // NUL-terminated
+  uint32_t offset;       // bytes from the start of the pack
+  uint32_t length;       // bytes
+  uint32_t samples;
+  uint8_t encoding;
+  uint8_t reserved[3];
+} wpak_entry;
+
+// Finds name in the pack's directory. Returns true and fills *entry if it is there.
+static bool wpak_find(File &pack, const char *name, wpak_entry *entry) {
+  wpak_header header;
+  pack.seek(0);
+  if (pack.read((uint8_t *)&header, sizeof header) != sizeof header) return false;
+  if (memcmp(header.magic, "WPAK", 4) != 0 || header.version != WPAK_VERSION) return false;
+  for (uint16_t i = 0; i < header.count; i++) {
+    if (pack.read((uint8_t *)entry, sizeof *entry) != sizeof *entry) return false;
+    if (strncmp(entry->name, name, sizeof entry->name) == 0) return true;
+  }
+  return false;
+}
+
+#endif
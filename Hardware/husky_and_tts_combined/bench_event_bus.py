@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Event latency: Unix-socket event bus vs. the old presence.json / flag-file polling.
+
+The subscriber runs in a separate process, like the real setup. Both sides
+stamp events with time.monotonic(), which is shared across processes.
+
+Usage:
+    python3 bench_event_bus.py [events]
+"""
+
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from event_bus import EventBusServer, EventBusClient, PresenceEvent
+
+POLL_INTERVAL = 0.1  # what stt_api_tts / husky_presence_test used to poll at
+
+def report(label, latencies):
+    latencies = sorted(latencies)
+    p = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000
+    print(f"{label:<28} n={len(latencies):<6} median {p(0.5):8.3f} ms   p99 {p(0.99):8.3f} ms   max {latencies[-1] * 1000:8.3f} ms")
+
+# ---------------- BUS ----------------
+def bus_subscriber(path, count, results):
+    latencies = []
+    client = EventBusClient(path)
+    def on_presence(event):
+        latencies.append(time.monotonic() - event.timestamp_monotonic)
+    client.subscribe("presence", on_presence)
+    client.wait_connected(5)
+    results.put("ready")
+    deadline = time.monotonic() + 30
+    while len(latencies) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    client.close()
+    results.put(latencies)
+
+def bench_bus(count):
+    path = Path(tempfile.gettempdir()) / f"bench_bus_{os.getpid()}.sock"
+    server = EventBusServer(path)
+    results = mp.Queue()
+    proc = mp.Process(target=bus_subscriber, args=(path, count, results))
+    proc.start()
+    results.get()
+    time.sleep(0.2)  # let the subscription land
+    for i in range(count):
+        server.publish(PresenceEvent(current_id=i, timestamp_monotonic=time.monotonic()))
+        time.sleep(0.001)
+    latencies = results.get()
+    proc.join()
+    server.close()
+    return latencies
+
+# ---------------- FILE ----------------
+def atomic_write_json(path, obj):
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=path.name, suffix=".tmp")
+    with open(fd, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
+    Path(tmp).replace(path)
+
+def file_subscriber(path, count, interval, results):
+    latencies = []
+    last_id = None
+    results.put("ready")
+    deadline = time.monotonic() + 60
+    while len(latencies) < count and time.monotonic() < deadline:
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            data = None
+        if data and data["current_id"] != last_id:
+            last_id = data["current_id"]
+            latencies.append(time.monotonic() - data["timestamp_monotonic"])
+        time.sleep(interval)
+    results.put(latencies)
+
+def bench_file(count, interval):
+    path = Path(tempfile.mkdtemp()) / "presence.json"
+    results = mp.Queue()
+    proc = mp.Process(target=file_subscriber, args=(path, count, interval, results))
+    proc.start()
+    results.get()
+    for i in range(count):
+        atomic_write_json(path, {"current_id": i, "timestamp_monotonic": time.monotonic()})
+        # Give the poller a chance to see every value, otherwise updates are lost
+        time.sleep(max(interval * 1.5, 0.002))
+    latencies = results.get()
+    proc.join()
+    path.unlink()
+    path.parent.rmdir()
+    return latencies
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    report("event bus (unix socket)", bench_bus(count))
+    report(f"file, polled every {POLL_INTERVAL}s", bench_file(min(count, 50), POLL_INTERVAL))
+    report("file, busy polling", bench_file(count, 0))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+faces.json with 100k registered IDs: rewrite-per-registration vs. FaceRegistry.
+
+    register   one new face: save_db() rewriting the whole file with indent=2
+               (what the serial loop used to wait for) vs. register(), and
+               register() plus flush() until it is in the journal
+    lookup     people.get(id) on a dict vs. on the registry
+    startup    load_db() vs. snapshot + journal replay, with a journal a few
+               entries short of COMPACT_EVERY, best of STARTUP_RUNS. Both
+               are one json.load of the whole registry, so expect parity
+
+Usage:
+    python3 bench_face_registry.py [ids]
+"""
+
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from face_registry import COMPACT_EVERY, FaceRegistry
+
+REPEAT = 20
+STARTUP_RUNS = 9
+
+def person(i):
+    return {"name": f"Person {i}", "age": 20 + i % 40, "race": "Somewhere"}
+
+def save_db(path, db):
+    """As the serial script saved after every new face."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(db, f, indent=2, ensure_ascii=False)
+
+def load_db(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def best_ms(fn, repeat=STARTUP_RUNS):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def median_ms(fn, repeat=REPEAT):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    os.chdir(tempfile.mkdtemp())
+    people = {str(i): person(i) for i in range(n)}
+    next_id = iter(range(n, 10 * n))
+    keys = [str(random.randrange(n)) for _ in range(10_000)]
+
+    old = Path("old.json")
+    save_db(old, people)
+    registry_path = Path("faces.json")
+    save_db(registry_path, people)
+    registry = FaceRegistry(registry_path)
+
+    def old_register():
+        i = next(next_id)
+        people[str(i)] = person(i)
+        save_db(old, people)
+
+    def flushed_register():
+        registry.register(next(next_id), person(0))
+        registry.flush()
+
+    print(f"{n} registered IDs, median ms (startup: best of {STARTUP_RUNS})")
+    print(f"  register   save_db {median_ms(old_register):9.3f}   "
+          f"register {median_ms(lambda: registry.register(next(next_id), person(0))):7.4f}   "
+          f"+ flush {median_ms(flushed_register):7.3f}")
+    lookup_dict = median_ms(lambda: [people.get(k) for k in keys]) / len(keys) * 1000
+    lookup_reg = median_ms(lambda: [registry.get(k) for k in keys]) / len(keys) * 1000
+    print(f"  lookup     dict {lookup_dict:9.3f} µs   registry {lookup_reg:7.3f} µs")
+
+    # Leave a journal just short of compaction behind, as after a long session
+    for _ in range(COMPACT_EVERY - 1 - registry.journaled):
+        registry.register(next(next_id), person(0))
+    registry.flush()
+    journal_lines = registry.journaled
+    del registry  # no close(): that would compact the journal away
+    load = best_ms(lambda: load_db(old))
+    start = best_ms(lambda: FaceRegistry(registry_path))
+    print(f"  startup    load_db {load:9.1f}   snapshot + {journal_lines} journal lines {start:7.1f}")
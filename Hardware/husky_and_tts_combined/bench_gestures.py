@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Audio-to-gesture skew: when the wave starts relative to the first audio bytes.
+
+A pty stands in for the HuskyLens Arduino. The emulated firmware keeps its
+own millis() clock (random offset, 0.1% drift) and a loop like the real one:
+a blocking HuskyLens request, the pan servo delays and delay(30). The host
+side is supervisor.device_tasks on a LocalEventBus; the conversation side
+publishes gestures the way play_audio does, 2 s (the speaker port reset
+wait) before the audio starts, or GESTURE_LEAD_S ahead for a greeting on
+the open port.
+
+    before              plain WAVE sent when play_audio is called, old
+                        firmware that waves with blocking delay()s
+    plain at start      new host, firmware that does not answer pings: the
+                        plain WAVE goes out at playback start
+    queued              G lines on the Arduino's clock, non-blocking firmware
+    queued, greeting    the same with only GESTURE_LEAD_S of lead
+
+Usage:
+    python3 bench_gestures.py [turns]
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import os
+import pty
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import serial
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE / "huskylens_presence_detection"))
+sys.path.insert(0, str(HERE / "stt_api_tts"))
+os.chdir(HERE)  # stt_api_tts reads its key and prompt files on import
+from event_bus import GestureEvent, LocalEventBus
+from supervisor import device_tasks
+from memory_store import MemoryStore
+import stt_api_tts as conversation
+os.chdir(tempfile.mkdtemp())
+
+RESET_WAIT = 2.0
+WAVE_MS = 8 * 200
+DRIFT = 0.001
+
+# ---------------- FIRMWARE EMULATOR ----------------
+class Firmware(threading.Thread):
+    """Just the serial/gesture side of huskylens_presence_detection.ino."""
+
+    def __init__(self, fd, queued, rng):
+        super().__init__(daemon=True)
+        self.fd = fd
+        self.queued = queued  # new firmware: pings, G lines, non-blocking gestures
+        self.rng = rng
+        self.t0 = time.monotonic()
+        self.offset = rng.randint(0, 10**7)
+        self.buf = b""
+        self.queue = []
+        self.started = []  # true host time of every gesture start
+        self.running = True
+        fcntl.fcntl(fd, fcntl.F_SETFL, fcntl.fcntl(fd, fcntl.F_GETFL) | os.O_NONBLOCK)
+
+    def millis(self):
+        return int((time.monotonic() - self.t0) * 1000 * (1 + DRIFT)) + self.offset
+
+    def service(self):
+        try:
+            self.buf += os.read(self.fd, 1024)
+        except BlockingIOError:
+            pass
+        while b"\n" in self.buf:
+            line, self.buf = self.buf.split(b"\n", 1)
+            self.handle(line.strip().decode())
+
+    def handle(self, line):
+        parts = line.split()
+        if self.queued and parts[:1] == ["P"]:
+            os.write(self.fd, f"P {parts[1]} {self.millis()}\n".encode())
+        elif self.queued and parts[:1] == ["G"]:
+            self.queue.append((int(parts[1]), int(parts[2])))
+        elif line == "WAVE":
+            self.started.append(time.monotonic())
+            if not self.queued:
+                self.block(WAVE_MS / 1000)  # the old for/delay(200) loops
+
+    def run_gestures(self):
+        now = self.millis()
+        for item in [q for q in self.queue if now >= q[1]]:
+            self.queue.remove(item)
+            self.started.append(time.monotonic())
+            os.write(self.fd, f"K {item[0]} {now - item[1]}\n".encode())
+
+    def block(self, seconds):
+        time.sleep(seconds)
+
+    def service_delay(self, seconds):
+        if not self.queued:
+            return self.block(seconds)
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            self.service()
+            self.run_gestures()
+            time.sleep(0.001)
+
+    def run(self):
+        while self.running:
+            self.service()
+            if self.queued:
+                self.run_gestures()
+            self.block(self.rng.uniform(0.010, 0.025))   # huskylens.request() over I2C
+            for _ in range(2):                           # pan step + hold step
+                self.service_delay(self.rng.uniform(0, 0.190) * (self.rng.random() < 0.5))  # MOVE_DELAY with a face
+            self.service_delay(0.030)
+
+# ---------------- DRIVER ----------------
+def run(turns, queued_fw, lead, at_start):
+    rng = random.Random(1)
+    master, slave = pty.openpty()
+    fw = Firmware(master, queued_fw, rng)
+    fw.start()
+    bus = LocalEventBus()
+    ready = threading.Event()
+    host_loop, stop = None, None
+
+    def host():
+        async def main():
+            nonlocal host_loop, stop
+            host_loop, stop = asyncio.get_running_loop(), asyncio.Event()
+            with serial.Serial(os.ttyname(slave), 115200, timeout=0) as husky:
+                tasks = device_tasks(husky, bus, MemoryStore("memories.db"))
+                ready.set()
+                await stop.wait()
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        asyncio.run(main())
+    loop_thread = threading.Thread(target=host, daemon=True)
+    loop_thread.start()
+    ready.wait()
+    time.sleep(1.5)  # a ping round trip or two
+
+    skews = []
+    for _ in range(turns):
+        called = time.monotonic()
+        audio_start = called + lead
+        at = audio_start if at_start else 0.0
+        before = len(fw.started)
+        bus.publish(GestureEvent("WAVE", called, at))
+        time.sleep(lead + WAVE_MS / 1000 + 0.3)
+        if len(fw.started) > before:
+            skews.append((fw.started[before] - audio_start) * 1000)
+        time.sleep(rng.uniform(0, 0.3))
+
+    fw.running = False
+    host_loop.call_soon_threadsafe(stop.set)
+    loop_thread.join(5)
+    fw.join(5)  # before closing its fd, which the next run's pty may reuse
+    os.close(master)
+    os.close(slave)
+
+    return skews
+
+def report(label, turns, skews):
+    if not skews:
+        print(f"  {label:<18} no gestures seen")
+        return
+    print(f"  {label:<18} median {statistics.median(skews):8.1f} ms   "
+          f"worst {max(skews, key=abs):8.1f} ms   ({len(skews)}/{turns})")
+
+if __name__ == "__main__":
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print("gesture start minus audio start")
+    for label, queued_fw, lead, at_start in (("before", False, RESET_WAIT, False),
+                                             ("plain at start", False, RESET_WAIT, True),
+                                             ("queued", True, RESET_WAIT, True),
+                                             ("queued, greeting", True, conversation.GESTURE_LEAD_S, True)):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            skews = run(turns, queued_fw, lead, at_start)  # the gesture task prints a line per command
+        report(label, turns, skews)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Recovery after the Arduino is unplugged: serial.Serial vs. serial_ports.ManagedSerial.
+
+A pty stands in for the Arduino. It streams bytes that carry its "plug
+generation" and shows up in an emulated port list with its USB VID/PID.
+Every YANK_EVERY seconds it is yanked: the pty is closed, it leaves the
+port list, and DOWN_S (0.1-0.4 s) later it comes back on a new pty, at a
+new path, the way macOS or Linux renumber a replugged board. A reader
+loops on read(in_waiting or 1) the whole time:
+
+    serial.Serial      the old code; reports what the first yank does to it
+    ManagedSerial      found again by VID/PID; for each yank, recovery is
+                       the time from the device reappearing to the first
+                       byte of its new generation read, and outage is the
+                       time from the yank to that byte
+
+Then the supervisor's presence, gesture and clock sync tasks run on the
+emulated Arduino through the same yanks, next to a task that sleeps 10 ms
+at a time: how late it wakes is how long the event loop was blocked.
+
+Usage:
+    python3 bench_hotplug.py [yanks]
+"""
+
+import asyncio
+import os
+import pty
+import random
+import statistics
+import sys
+import threading
+import time
+
+import serial
+from serial.tools.list_ports_common import ListPortInfo
+
+import supervisor
+from event_bus import LocalEventBus
+from serial_ports import POLL_S, DeviceSpec, ManagedSerial
+
+VID, PID = 0x1A86, 0x7523  # a CH340 board
+YANK_EVERY = 0.5
+DOWN_S = (0.1, 0.4)  # unplugged for a random time in this range, so yanks do not line up with polls
+BAUD = 115200
+
+class EmulatedArduino:
+    """A pty that streams its generation number and can be unplugged and replugged."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.master = self.slave = None
+        self.path = None
+        self.plugged_at = {}  # generation -> time it appeared
+        self.yanked_at = {}   # generation -> time it went away
+        self.stop = threading.Event()
+        self.plug()
+        threading.Thread(target=self._stream, daemon=True).start()
+
+    def plug(self):
+        with self.lock:
+            self.generation += 1
+            self.master, self.slave = pty.openpty()
+            self.path = os.ttyname(self.slave)
+            self.plugged_at[self.generation] = time.monotonic()
+
+    def yank(self):
+        with self.lock:
+            self.yanked_at[self.generation] = time.monotonic()
+            os.close(self.master)
+            os.close(self.slave)
+            self.master = self.slave = self.path = None
+
+    def ports(self):
+        """What serial.tools.list_ports.comports() would list right now."""
+        with self.lock:
+            if self.path is None:
+                return []
+            info = ListPortInfo(self.path, skip_link_detection=True)
+            info.vid, info.pid, info.serial_number = VID, PID, "EMU1"
+            return [info]
+
+    def _stream(self):
+        while not self.stop.wait(0.005):
+            with self.lock:
+                if self.master is not None:
+                    try:
+                        os.write(self.master, bytes([self.generation]) * 16)
+                    except OSError:
+                        pass
+
+def yank_loop(arduino, yanks, done):
+    rng = random.Random(0)
+    for _ in range(yanks):
+        time.sleep(YANK_EVERY)
+        arduino.yank()
+        time.sleep(rng.uniform(*DOWN_S))
+        arduino.plug()
+    time.sleep(YANK_EVERY)
+    done.set()
+
+def plain_serial():
+    arduino = EmulatedArduino()
+    ser = serial.Serial(arduino.path, BAUD, timeout=0.05)
+    threading.Timer(0.2, arduino.yank).start()
+    start = time.monotonic()
+    try:
+        while time.monotonic() - start < 2:
+            ser.read(ser.in_waiting or 1)
+        return "kept reading stale nothing"
+    except serial.SerialException as e:
+        return f"{type(e).__name__}: {e}"
+    finally:
+        arduino.stop.set()
+
+def managed(yanks):
+    arduino = EmulatedArduino()
+    spec = DeviceSpec("emulated Arduino", vid=VID, pid=PID)
+    first_byte = {}  # generation -> first time a byte of it was read
+    done = threading.Event()
+    with ManagedSerial(spec, BAUD, timeout=0.05, ports=arduino.ports) as ser:
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")  # ManagedSerial reports each reconnect
+        threading.Thread(target=yank_loop, args=(arduino, yanks, done), daemon=True).start()
+        try:
+            while not done.is_set():
+                data = ser.read(ser.in_waiting or 1)
+                now = time.monotonic()
+                for generation in set(data):
+                    first_byte.setdefault(generation, now)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        reconnects = ser.reconnects
+    arduino.stop.set()
+    recovery = [first_byte[g] - arduino.plugged_at[g] for g in range(2, yanks + 2) if g in first_byte]
+    outage = [first_byte[g] - arduino.yanked_at[g - 1] for g in range(2, yanks + 2) if g in first_byte]
+    return reconnects, recovery, outage
+
+async def supervisor_loop(yanks):
+    """(reconnects, wake-up delays of a 10 ms sleeper) while the supervisor's device tasks run."""
+    arduino = EmulatedArduino()
+    spec = DeviceSpec("emulated Arduino", vid=VID, pid=PID)
+    done = threading.Event()
+    late = []
+    with ManagedSerial(spec, BAUD, timeout=0, ports=arduino.ports) as ser:
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        tasks = supervisor.device_tasks(ser, LocalEventBus(), None)  # no faces in this stream, so no store
+        threading.Thread(target=yank_loop, args=(arduino, yanks, done), daemon=True).start()
+        try:
+            while not done.is_set():
+                start = time.monotonic()
+                await asyncio.sleep(0.01)
+                late.append(time.monotonic() - start - 0.01)
+            failed = [t for t in tasks if t.done()]
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            sys.stdout.close()
+            sys.stdout = stdout
+        reconnects = ser.reconnects
+    arduino.stop.set()
+    return reconnects, late, failed
+
+if __name__ == "__main__":
+    yanks = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"Emulated Arduino yanked {yanks} times, {DOWN_S[0] * 1000:.0f}-{DOWN_S[1] * 1000:.0f} ms unplugged, "
+          f"port list polled every {POLL_S * 1000:.0f} ms")
+    print(f"  serial.Serial   {plain_serial()}")
+    reconnects, recovery, outage = managed(yanks)
+    print(f"  ManagedSerial   {reconnects} reconnects, {len(recovery)}/{yanks} replugs read from")
+    print(f"    recovery (replug -> first byte)   mean {statistics.mean(recovery) * 1000:6.1f} ms   "
+          f"max {max(recovery) * 1000:6.1f} ms")
+    print(f"    outage   (yank -> first byte)     mean {statistics.mean(outage) * 1000:6.1f} ms   "
+          f"max {max(outage) * 1000:6.1f} ms")
+    reconnects, late, failed = asyncio.run(supervisor_loop(yanks))
+    print(f"  supervisor      {reconnects} reconnects, event loop late by mean {statistics.mean(late) * 1000:.1f} ms, "
+          f"max {max(late) * 1000:.1f} ms{'' if not failed else f'; tasks ended: {failed}'}")
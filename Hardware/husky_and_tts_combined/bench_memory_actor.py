@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for person memory: lost updates and throughput.
+
+THREADS conversation threads each save TURNS turns (the exchange, then
+count += 1) for a few shared face IDs, while a second process plays the
+HuskyLens side and the memory_store.py CLI: it creates people and keeps
+filling in names for the same IDs.
+
+    files     ID_<n>.txt as before the memory store: append, then read and
+              rewrite the file for the count, while the other process
+              rewrites it for set_initialisation (the william variant)
+    store     MemoryStore shared by the threads, every call its own commit
+    actor     MemoryActor over a MemoryStore: one writer thread, batched commits
+
+Checked afterwards: every turn is stored, every count increment landed, and
+no two threads were handed the same count.
+
+Then the actor's failure path: the other process holds a write transaction
+(BEGIN IMMEDIATE) while the threads save turns, past the store's busy
+timeout (shortened to BUSY_TIMEOUT here from 10 s). Held briefly, the
+retries should get everything in; held longer than the retries, changes
+are lost, and every one must be reported (MemoryActor.failed) and the
+actor's reads must match the store afterwards.
+
+Usage:
+    python3 bench_memory_actor.py [turns per thread]
+"""
+
+import multiprocessing as mp
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from memory_actor import MemoryActor
+from memory_store import MemoryStore
+
+THREADS = 8
+FIDS = (1, 2, 3, 4)
+USER = "Tell me about gears?"
+WINNIE = "Oh bother, gears are like honey pots that turn."
+BUSY_TIMEOUT = 0.05  # seconds the store waits for the lock in the locked runs
+RETRY_WAIT = 0.1     # first wait between retries in the locked runs
+LOCKED_TURNS = 20    # per thread in the locked runs
+
+# ---------------- THE OLD FILES ----------------
+def file_path(fid):
+    return Path(f"ID_{fid}.txt")
+
+def file_save(fid):
+    """append_to_memory + update_count, as the conversation side did them. Returns the new count."""
+    path = file_path(fid)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"User: {USER}\nWinnie: {WINNIE}\n")
+    lines = path.read_text(encoding="utf-8").splitlines()
+    count = -1
+    for line in lines:
+        if line.startswith("count"):
+            try:
+                count = int(line.split("=", 1)[1])
+            except ValueError:
+                pass
+    count += 1
+    path.write_text("\n".join(f"count = {count}" if l.startswith("count") else l for l in lines) + "\n",
+                    encoding="utf-8")
+    return count
+
+def file_set_name(fid, name):
+    """set_initialisation-style rewrite from the other process."""
+    path = file_path(fid)
+    lines = path.read_text(encoding="utf-8").splitlines()
+    lines = [f"name: {name}" if l.startswith("name:") else l for l in lines]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+def file_check(fid):
+    text = file_path(fid).read_text(encoding="utf-8")
+    count = next((int(l.split("=", 1)[1]) for l in text.splitlines() if l.startswith("count")), -1)
+    return text.count("\nUser: ") + text.startswith("User: "), count
+
+# ---------------- OTHER PROCESS ----------------
+def other_process(mode, workdir, stop):
+    """The HuskyLens side and someone filling in names, on the same IDs."""
+    os.chdir(workdir)
+    store = None if mode == "files" else MemoryStore("memories.db")
+    i = 0
+    while not stop.is_set():
+        fid = FIDS[i % len(FIDS)]
+        if mode == "files":
+            file_set_name(fid, f"Brian {i}")
+        else:
+            store.ensure_person(fid)
+            store.set_metadata(fid, name=f"Brian {i}")
+        i += 1
+        time.sleep(0.002)
+
+# ---------------- DRIVER ----------------
+def run(mode, turns):
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    if mode == "files":
+        for fid in FIDS:
+            file_path(fid).write_text("name: \ndegree: \ncount = -1\n\n--- Conversation Log ---\n", encoding="utf-8")
+        save = file_save
+    else:
+        store = MemoryStore("memories.db")
+        for fid in FIDS:
+            store.ensure_person(fid)
+        memory = MemoryActor(store) if mode == "actor" else store
+
+        def save(fid):
+            with memory.batch():
+                memory.append_turn(fid, USER, WINNIE)
+                return memory.increment_count(fid)
+
+    stop = mp.Event()
+    other = mp.Process(target=other_process, args=(mode, workdir, stop))
+    other.start()
+    time.sleep(0.2)
+    handed = [[] for _ in FIDS]
+    errors = []
+
+    def worker(t):
+        for i in range(turns):
+            k = (t + i) % len(FIDS)
+            try:
+                handed[k].append(save(FIDS[k]))
+            except Exception as e:  # e.g. a file read while the other side rewrote it
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if mode == "actor":
+        memory.flush()  # so the time includes getting everything into the store
+    elapsed = time.perf_counter() - start
+    stop.set()
+    other.join()
+
+    expected = THREADS * turns
+    stored = counted = duplicates = 0
+    for k, fid in enumerate(FIDS):
+        if mode == "files":
+            n, count = file_check(fid)
+        else:
+            n, count = store.turn_count(fid), store.person(fid)["count"]
+        stored += n
+        counted += count + 1
+        duplicates += len(handed[k]) - len(set(handed[k]))
+    if mode == "actor":
+        memory.close()
+    elif mode == "store":
+        store.close()
+    print(f"  {mode:<6} {expected / elapsed:>9,.0f} turns/s   lost turns {expected - stored:>5}   "
+          f"lost counts {expected - counted:>5}   duplicate counts {duplicates:>5}   errors {len(errors)}")
+
+# ---------------- A LOCKED DATABASE ----------------
+def hold_lock(workdir, seconds, held):
+    """The other process sitting in a write transaction."""
+    db = sqlite3.connect(os.path.join(workdir, "memories.db"), isolation_level=None)
+    db.execute("BEGIN IMMEDIATE")
+    held.set()
+    time.sleep(seconds)
+    db.execute("ROLLBACK")
+    db.close()
+
+def run_locked(seconds):
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    store = MemoryStore("memories.db")
+    store.db.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}")
+    for fid in FIDS:
+        store.ensure_person(fid)
+    memory = MemoryActor(store, retry_wait=RETRY_WAIT)
+
+    held = mp.Event()
+    locker = mp.Process(target=hold_lock, args=(workdir, seconds, held))
+    locker.start()
+    held.wait()
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")  # MemoryActor reports each failed try
+    try:
+        def worker(t):
+            for i in range(LOCKED_TURNS):
+                fid = FIDS[(t + i) % len(FIDS)]
+                with memory.batch():
+                    memory.append_turn(fid, USER, WINNIE)
+                    memory.increment_count(fid)
+                time.sleep(0.005)
+        threads = [threading.Thread(target=worker, args=(t,)) for t in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        memory.flush()
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    locker.join()
+
+    expected = THREADS * LOCKED_TURNS
+    lost_turns = expected - sum(store.turn_count(fid) for fid in FIDS)
+    lost_counts = expected - sum(store.person(fid)["count"] + 1 for fid in FIDS)
+    agrees = all(memory.turn_count(fid) == store.turn_count(fid)
+                 and memory.person(fid)["count"] == store.person(fid)["count"] for fid in FIDS)
+    unreported = lost_turns + lost_counts - memory.failed
+    memory.close()
+    print(f"  locked {seconds:.1f}s   lost turns {lost_turns:>5}   lost counts {lost_counts:>5}   "
+          f"reported lost {memory.failed:>5}   unreported {unreported:>3}   reads match store {'yes' if agrees else 'NO'}")
+    return unreported == 0 and agrees
+
+if __name__ == "__main__":
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"{THREADS} threads x {turns} turns over IDs {FIDS}, names rewritten from another process")
+    for mode in ("files", "store", "actor"):
+        run(mode, turns)
+    print(f"Actor with the database locked by another process ({THREADS} threads x {LOCKED_TURNS} turns)")
+    ok = all([run_locked(0.2), run_locked(1.5)])
+    sys.exit(0 if ok else 1)
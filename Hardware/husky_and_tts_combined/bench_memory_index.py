@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Recall latency: top-k past turns for a transcript, at 10k and 1M stored turns.
+
+One person's index is filled with synthetic turns (Zipf-distributed words
+from a 5,000-word vocabulary, ~25 words each) with one real fact planted
+early on, then:
+
+    add      indexing one new turn (what append_to_memory adds)
+    search   MemoryIndex.search() for a new transcript, k=5
+    found    whether the planted turn comes back for a question about it
+
+1M turns make a 1 GB vector file; it is searched from the page cache here,
+as it would be once the robot has been running for a while.
+
+Usage:
+    python3 bench_memory_index.py [turns ...]
+"""
+
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from memory_index import DIM, MemoryIndex
+
+REPEAT = 20
+CHUNK = 20_000
+PLANTED = ("My favourite season is winter, I love skiing in the snow.",
+           "Oh, winter is so chilly and sparkly! Warm honey by the fire.")
+QUESTION = "what is my favourite season"
+
+def synthetic_turns(n, rng, vocab):
+    ranks = np.minimum(rng.zipf(1.3, size=(n, 25)), len(vocab)) - 1
+    return [" ".join(vocab[r] for r in row) for row in ranks]
+
+def median_ms(fn):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [10_000, 1_000_000]
+    rng = np.random.default_rng(1)
+    vocab = [f"w{i}" for i in range(5000)]
+    workdir = tempfile.mkdtemp()
+    print(f"{DIM} buckets, float16; median ms")
+    print(f"  {'turns':>9}{'index MB':>10}{'add':>8}{'search':>9}  found")
+    for n in sizes:
+        index = MemoryIndex(os.path.join(workdir, str(n)))
+        index.add(1, synthetic_turns(100, rng, vocab))
+        index.add(1, ["\n".join(PLANTED)])
+        while index.rows(1) < n:
+            index.add(1, synthetic_turns(min(CHUNK, n - index.rows(1)), rng, vocab))
+        extra = synthetic_turns(REPEAT, rng, vocab)
+        add = median_ms(lambda: index.add(1, [extra.pop()]))
+        search = median_ms(lambda: index.search(1, QUESTION, k=5))
+        found = 100 in [row for row, _ in index.search(1, QUESTION, k=5)]
+        size = index.rows(1) * DIM * 2 / 2**20
+        print(f"  {index.rows(1):>9}{size:>10.0f}{add:>8.3f}{search:>9.3f}  {'yes' if found else 'no'}")
+    shutil.rmtree(workdir)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Reading recent history as a person's log grows to hundreds of MB.
+
+One person's conversation is grown in steps, and at each size:
+
+    text file   get_conversation(): the whole ID_<n>.txt read and filtered
+    sqlite      memory_store, last RECENT turns through the (person, turn) index
+    log last    memory_log, last RECENT turns from the tail of the .idx file
+    log since   memory_log, turns of the last minute (bisecting the index)
+
+Turns are ~1 KB. Files are read from the page cache; from a cold SD card
+the text file gets much slower still, the log reads barely change.
+
+Usage:
+    python3 bench_memory_log.py [max MB]
+"""
+
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from memory_log import LogStore
+from memory_store import MemoryStore
+
+RECENT = 20
+REPEAT = 10
+USER = "Tell me again about the gears in the gearbox project?"
+WINNIE = "Oh bother, " + "gears are like honey pots that turn round and round, " * 17 + "more honey?"
+
+def get_conversation(mem_file):
+    """As stt_api_tts read the memory file before the memory store."""
+    lines = mem_file.read_text(encoding="utf-8").splitlines()
+    return "\n".join(l for l in lines if not l.lower().startswith(("name:", "degree:", "count")))
+
+def median_ms(fn):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+if __name__ == "__main__":
+    max_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 640
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    text = Path("ID_1.txt")
+    text.write_text("name: Brian\ndegree: Mechanical Engineering\ncount = -1\n\n--- Conversation Log ---\n")
+    db, log = MemoryStore("memories.db"), LogStore("memories")
+    log.set_metadata(1, name="Brian", degree="Mechanical Engineering")
+    turn_bytes = len(f"User: {USER}\nWinnie: {WINNIE}\n".encode())
+
+    print(f"median ms, last {RECENT} turns ({turn_bytes} B per turn)")
+    print(f"  {'log MB':>7}{'turns':>9}{'text file':>11}{'sqlite':>9}{'log last':>10}{'log since':>11}")
+    turns, mb = 0, 10
+    while mb <= max_mb:
+        target = mb * 2**20 // turn_bytes
+        now = time.time() - (target - turns)  # one turn a second, ending now
+        with open(text, "a", encoding="utf-8") as f, db.batch(), log.batch():
+            for i in range(turns, target):
+                ts = now + i - turns
+                f.write(f"User: {USER}\nWinnie: {WINNIE}\n")
+                db.append_turn(1, USER, WINNIE, ts=ts)
+                log.append_turn(1, USER, WINNIE, ts=ts)
+        turns = target
+        since = time.time() - RECENT
+        row = (median_ms(lambda: get_conversation(text)),
+               median_ms(lambda: db.turns(1, RECENT)),
+               median_ms(lambda: log.turns(1, RECENT)),
+               median_ms(lambda: log.turns(1, since=since)))
+        size = Path("memories/ID_1.log").stat().st_size / 2**20
+        print(f"  {size:>7.0f}{turns:>9}" + "".join(f"{ms:>{w}.3f}" for ms, w in zip(row, (11, 9, 10, 11))))
+        mb *= 4
+    db.close()
+    shutil.rmtree(workdir)  # the largest step leaves a few GB behind
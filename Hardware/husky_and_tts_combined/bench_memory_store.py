@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Per-turn memory cost: ID_<n>.txt files vs. the SQLite memory store.
+
+For a person who already has N turns stored:
+
+    save    what a turn writes after the reply: the exchange plus count += 1.
+            The file version appends two lines, then reads and rewrites the
+            whole file to change the count line; the store does one INSERT
+            and one UPDATE in one commit.
+    check   is the prefetched person still current: a stat vs. one indexed lookup
+    load    metadata plus the full conversation log for the prompt
+
+Usage:
+    python3 bench_memory_store.py
+"""
+
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from memory_store import MemoryStore
+
+HISTORY = (10, 1_000, 100_000)  # turns already stored
+REPEAT = 20
+USER = "Question about gears and levers?"
+WINNIE = "Oh bother, gears are like honey pots that turn, Brian. More honey?"
+
+# ---------------- THE OLD FILE FORMAT ----------------
+def file_write(path, turns):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("name: Brian\ndegree: Mechanical Engineering\ncount = -1\n\n--- Conversation Log ---\n")
+        for _ in range(turns):
+            f.write(f"User: {USER}\nWinnie: {WINNIE}\n")
+
+def file_save(path, count):
+    """append_to_memory + update_count, as stt_api_tts did them."""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"User: {USER}\n")
+        f.write(f"Winnie: {WINNIE}\n")
+    lines = path.read_text(encoding="utf-8").splitlines()
+    new_lines = [f"count = {count}" if line.lower().startswith("count") else line for line in lines]
+    path.write_text("\n".join(new_lines), encoding="utf-8")
+
+def file_load(path):
+    """parse_metadata + get_conversation: the file is read twice."""
+    name = degree = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.lower().startswith("name:"):
+                name = line.split(":", 1)[1].strip()
+            elif line.lower().startswith("degree:"):
+                degree = line.split(":", 1)[1].strip()
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return name, degree, "\n".join(l for l in lines if not l.lower().startswith(("name:", "degree:", "count")))
+
+# ---------------- THE STORE ----------------
+def store_write(store, fid, turns):
+    with store.batch():
+        store.set_metadata(fid, name="Brian", degree="Mechanical Engineering")
+        for _ in range(turns):
+            store.append_turn(fid, USER, WINNIE)
+
+def store_save(store, fid):
+    with store.batch():
+        store.append_turn(fid, USER, WINNIE)
+        store.increment_count(fid)
+
+def store_load(store, fid):
+    person = store.person(fid)
+    return person["name"], person["degree"], store.conversation(fid)
+
+def median_ms(fn):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+if __name__ == "__main__":
+    os.chdir(tempfile.mkdtemp())
+    store = MemoryStore("memories.db")
+    print("median ms per turn")
+    print(f"  {'history':>8}  {'save: file':>11}{'store':>8}  {'check: file':>12}{'store':>8}  {'load: file':>11}{'store':>8}")
+    for fid, turns in enumerate(HISTORY, start=1):
+        path = Path(f"ID_{fid}.txt")
+        file_write(path, turns)
+        store_write(store, fid, turns)
+        save = (median_ms(lambda: file_save(path, 1)), median_ms(lambda: store_save(store, fid)))
+        check = (median_ms(lambda: path.stat().st_mtime_ns), median_ms(lambda: store.version(fid)))
+        load = (median_ms(lambda: file_load(path)), median_ms(lambda: store_load(store, fid)))
+        print(f"  {turns:>8}  {save[0]:>11.3f}{save[1]:>8.3f}  {check[0]:>12.4f}{check[1]:>8.4f}  "
+              f"{load[0]:>11.3f}{load[1]:>8.3f}")
+    store.close()
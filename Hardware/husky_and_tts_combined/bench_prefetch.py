@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+First-turn work with and without the presence prefetch.
+
+Everything a first turn does locally before it can ask ChatGPT, timed on
+memories of different lengths, plus the greeting:
+
+    context     load_person() after the button is released vs. taking the
+                prefetched person (one lookup to check they did not change)
+    greeting    synthesizing it when needed vs. reading it from the audio cache
+    connection  the first API request on a cold vs. a warmed connection
+
+The greeting and connection rows need network access (gTTS, ffmpeg and the
+OpenAI endpoint); they are skipped when that is not available. On the robot,
+the ledger has the same comparison from real turns:
+    python3 stt_api_tts/turn_ledger.py --first --by prefetched
+
+Usage (from this folder, next to apikey_test.txt and prompt_test.txt):
+    python3 bench_prefetch.py
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE / "stt_api_tts"))
+os.chdir(HERE)  # stt_api_tts reads its key and prompt files on import
+
+import httpx
+
+import stt_api_tts as conversation
+from memory_store import open_store
+
+HISTORY = (0, 100, 10_000)  # turns already in memory
+REPEAT = 20
+
+def write_person(fid, turns):
+    memory = conversation.memory
+    with memory.batch():
+        memory.set_metadata(fid, name="Brian", degree="Mechanical Engineering")
+        for i in range(turns):
+            memory.append_turn(fid, f"Question number {i} about gears and levers?",
+                               "Oh bother, gears are like honey pots that turn, Brian. More honey?")
+
+def median_ms(fn):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+def bench_context():
+    print("context (ms, median)")
+    print(f"  {'history':>8}{'load_person':>14}{'prefetched':>12}")
+    for fid, turns in enumerate(HISTORY, start=1):
+        write_person(fid, turns)
+        cold = median_ms(lambda: conversation.load_person(fid))
+        person = conversation.load_person(fid)
+        warm = median_ms(lambda: conversation.is_current(person, fid))
+        print(f"  {turns:>8}{cold:>14.3f}{warm:>12.3f}")
+
+def bench_greeting():
+    text = conversation.GREETING.format(name="Brian")
+    try:
+        start = time.perf_counter()
+        conversation.cached_speech(text)
+        miss = time.perf_counter() - start
+    except Exception as e:
+        print(f"greeting: skipped, cannot synthesize here ({type(e).__name__})")
+        return
+    hit = median_ms(lambda: conversation.cached_speech(text))
+    print(f"greeting: synthesize {miss * 1000:.0f} ms, from cache {hit:.3f} ms")
+
+def bench_connection():
+    url = str(conversation.get_client().base_url) + "models"
+    try:
+        with httpx.Client() as cold:
+            start = time.perf_counter()
+            cold.head(url, timeout=5)
+            cold_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            cold.head(url, timeout=5)
+            warm_ms = (time.perf_counter() - start) * 1000
+    except httpx.HTTPError as e:
+        print(f"connection: skipped, no network ({type(e).__name__})")
+        return
+    print(f"connection: first request {cold_ms:.0f} ms cold, {warm_ms:.0f} ms warmed")
+
+if __name__ == "__main__":
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    conversation.memory = open_store(conversation.MEMORY_BACKEND)
+    bench_context()
+    bench_greeting()
+    bench_connection()
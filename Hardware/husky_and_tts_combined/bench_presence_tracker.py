@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Presence writes per minute: publish-per-match vs. PresenceTracker.
+
+One minute of Face ID lines at camera rate is replayed in virtual time:
+one person, a gap, two people in view at once, a short look away, and the
+odd misread frame. Each scheme is counted by the side effects it would have:
+
+    per match (old husky)   every Face ID line publishes and stats the memory file
+    on change, no hyst.     the old Software/PythonFiles loop: publish when the
+                            current face changes, expiry only while lines arrive
+    tracker                 PresenceTracker: enter/leave hysteresis, timed expiry
+
+Syscalls are estimated per event: presence.json via atomic_write_json is
+open + write + close + rename + unlink = 5, one bus event is one send() per
+subscriber, a memory file check is one stat(). The old husky script checked
+on every match; the other two only look a person up when they enter.
+
+Usage:
+    python3 bench_presence_tracker.py
+"""
+
+import random
+
+from presence_tracker import PresenceTracker
+
+FPS = 30
+SECONDS = 60
+FILE_SYSCALLS = 5
+STAT_SYSCALLS = 1
+
+def scenario(seed=1):
+    """(time, fid) sightings for one minute."""
+    rng = random.Random(seed)
+    out = []
+    for frame in range(FPS * SECONDS):
+        t = frame / FPS
+        faces = []
+        if t < 20:
+            faces = [1]
+        elif 25 <= t < 45:
+            faces = [2, 1] if 30 <= t < 40 else [2]
+        elif 47 <= t:
+            faces = [2]  # looked away for 2 s at 45-47
+        for fid in faces:
+            r = rng.random()
+            if r < 0.05:
+                continue          # missed frame
+            if r < 0.06:
+                fid = rng.randint(3, 9)  # misread
+            out.append((t, fid))
+    return out
+
+def per_match(lines):
+    publishes = stats = len(lines)
+    switches = sum(1 for a, b in zip(lines, lines[1:]) if a[1] != b[1]) + 1
+    return publishes, stats, switches
+
+def on_change_no_hysteresis(lines, absent_after=2.0):
+    """The old Software/PythonFiles loop, minus the serial port."""
+    last_seen, present = {}, set()
+    published, publishes, enters = 0, 0, 0
+    for now, fid in lines:
+        present -= {f for f in present if now - last_seen[f] > absent_after}
+        current = max(present, key=last_seen.get) if present else 0
+        if current != published:
+            publishes += 1
+            published = current
+        last_seen[fid] = now
+        if fid not in present:
+            enters += 1
+            present.add(fid)
+    # Nobody is expired after the last line: no line, no loop iteration that sees it
+    return publishes, enters, publishes
+
+def with_tracker(lines):
+    changes, enters = [], []
+    tracker = PresenceTracker(on_change=changes.append, on_enter=enters.append)
+    for t, fid in lines:
+        tracker.seen(fid, t)
+        tracker.expire(t)  # the timer thread, at the same virtual time
+    tracker.expire(SECONDS + tracker.leave_after + 0.01)  # and once more after the stream ends
+    return len(changes), len(enters), len(changes)
+
+if __name__ == "__main__":
+    lines = scenario()
+    print(f"{len(lines)} Face ID lines over {SECONDS}s at {FPS} fps")
+    print(f"{'scheme':<24}{'publishes':>10}{'stats':>8}{'id changes':>12}"
+          f"{'syscalls (file)':>17}{'syscalls (bus)':>16}")
+    rows = [
+        ("per match (old husky)", per_match(lines)),
+        ("on change, no hyst.", on_change_no_hysteresis(lines)),
+        ("tracker", with_tracker(lines)),
+    ]
+    for name, (publishes, stats, switches) in rows:
+        print(f"{name:<24}{publishes:>10}{stats:>8}{switches:>12}"
+              f"{publishes * FILE_SYSCALLS + stats * STAT_SYSCALLS:>17}"
+              f"{publishes + stats * STAT_SYSCALLS:>16}")
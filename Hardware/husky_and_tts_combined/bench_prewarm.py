@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Post-release latency with and without the turn prewarm.
+
+Post-release latency is the time from the button being released to the
+reply being ready to play: transcription, the person's context, the
+ChatGPT request and TTS. The prewarm starts on the first mic bytes, so
+while the user is still speaking it loads their memory and opens a
+connection to the API.
+
+Each turn here is the real TurnPrewarm, load_person() and query_chatgpt(),
+against a local mock of the streaming chat endpoint. Everything remote is
+simulated with sleeps:
+
+    SPEAK_S     the user talking, i.e. the time the prewarm has
+    STT_S       transcription, the same either way
+    CONNECT_S   TCP + TLS to the API, paid on every new connection
+    TTFT_S      the model's time to first token, plus CHUNKS chunks
+    TTS_S       synthesis, the same either way
+
+Between turns the reply plays and the user thinks for GAP_S. The mock
+drops connections idle longer than SERVER_IDLE_S: longer than an
+utterance, shorter than that pause. So without the prewarm, each turn's
+request opens a new connection, as on the robot's first turn or after a
+pause; with it, the connection opened while the user speaks is still
+there. Runs alternate between off and on, and the best and median of
+REPEAT turns are reported.
+
+Usage:
+    python3 bench_prewarm.py [turns]
+"""
+
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE / "stt_api_tts"))
+os.chdir(HERE)  # stt_api_tts reads its key and prompt files on import
+
+import stt_api_tts as conversation
+from event_bus import LocalEventBus, PresenceEvent
+from memory_index import MemoryIndex
+from memory_store import open_store
+
+SPEAK_S = 0.6
+STT_S = 0.3
+CONNECT_S = 0.15
+TTFT_S = 0.2
+CHUNKS = 10
+TTS_S = 0.2
+GAP_S = 1.5
+SERVER_IDLE_S = 1.2
+HISTORY = (0, 10_000)  # turns already in memory
+REPEAT = 7
+FID = 1
+
+# ---------------- MOCK ENDPOINT ----------------
+class MockChatHandler(BaseHTTPRequestHandler):
+    """Streams a canned reply; a new connection first pays CONNECT_S."""
+    protocol_version = "HTTP/1.1"  # keep-alive, so warmed connections are reused
+    timeout = SERVER_IDLE_S        # then the connection is dropped
+
+    def setup(self):
+        super().setup()
+        self.handshake_due = True
+        self.server.connections += 1
+
+    def handshake(self):
+        if self.handshake_due:
+            time.sleep(CONNECT_S)
+            self.handshake_due = False
+
+    def do_HEAD(self):
+        self.handshake()
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self.handshake()
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        time.sleep(TTFT_S)
+        chunk = {"id": "mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": body["model"]}
+        events = [dict(chunk, choices=[{"index": 0, "delta": {"content": "Honey! "}, "finish_reason": None}])
+                  for _ in range(CHUNKS)]
+        events.append(dict(chunk, choices=[], usage={"prompt_tokens": 100, "completion_tokens": CHUNKS * 2,
+                                                     "total_tokens": 100 + CHUNKS * 2}))
+        data = "".join(f"data: {json.dumps(e)}\n\n" for e in events) + "data: [DONE]\n\n"
+        data = data.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def start_mock_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockChatHandler)
+    server.connections = 0
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+# ---------------- A TURN ----------------
+def write_person(fid, turns):
+    memory = conversation.memory
+    memory.reset()
+    with memory.batch():
+        memory.set_metadata(fid, name="Brian", degree="Mechanical Engineering")
+        for i in range(turns):
+            memory.append_turn(fid, f"Question number {i} about gears and levers?",
+                               "Oh bother, gears are like honey pots that turn, Brian. More honey?")
+
+def turn(prewarm):
+    """One turn as conversation_loop runs it. Returns the post-release latency in seconds."""
+    time.sleep(GAP_S)
+    if prewarm:
+        prewarm.start()  # on the first mic bytes
+    time.sleep(SPEAK_S)
+    released = time.monotonic()
+    time.sleep(STT_S)
+    fid = conversation.get_current_presence()
+    person = prewarm.take(fid) if prewarm else None
+    if person is None:
+        person = conversation.load_person(fid)
+    conversation.query_chatgpt("What is torque?", person["prefix"], person["count"])
+    time.sleep(TTS_S)
+    return time.monotonic() - released
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else REPEAT
+    server, base_url = start_mock_server()
+    os.environ["OPENAI_BASE_URL"] = base_url
+    workdir = Path(tempfile.mkdtemp())
+    os.chdir(workdir)
+    conversation.memory = open_store(conversation.MEMORY_BACKEND)
+    conversation.recall = MemoryIndex(workdir / "memories_index") if conversation.RECALL_TURNS else None
+    conversation.bus = LocalEventBus()
+    conversation.bus.publish(PresenceEvent(current_id=FID, timestamp_monotonic=time.monotonic()))
+
+    print(f"Post-release latency, {repeat} turns each: speaking {SPEAK_S}s, STT {STT_S}s, "
+          f"connect {CONNECT_S}s, first token {TTFT_S}s, TTS {TTS_S}s")
+    print(f"  {'history':>8}{'prewarm':>9}{'best':>9}{'median':>9}{'connections':>13}")
+    for turns in HISTORY:
+        write_person(FID, turns)
+        conversation.load_person(FID)  # the recall index is built once, on the robot at startup
+        results = {"off": [], "on": []}
+        connections = {"off": 0, "on": 0}
+        prewarm = conversation.TurnPrewarm()
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")  # query_chatgpt prints every reply
+        try:
+            for _ in range(repeat):
+                for setting in ("off", "on"):
+                    before = server.connections
+                    results[setting].append(turn(prewarm if setting == "on" else None))
+                    connections[setting] += server.connections - before
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        for setting, latencies in results.items():
+            print(f"  {turns:>8}{setting:>9}{min(latencies) * 1000:>7.0f}ms{statistics.median(latencies) * 1000:>7.0f}ms"
+                  f"{connections[setting]:>13}")
+    server.shutdown()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Throughput of the HuskyLens stream parsing: old str-buffer + re.finditer
+loop vs. serial_framer.LineFramer.
+
+The stream is "Face ID: n" lines with some noise, cut into chunks the way
+ser.read(ser.in_waiting or 1) returns them: a few bytes at a time at the
+camera's real line rate, larger chunks when the port is busier. Each
+parser runs REPEATS times and the fastest run is reported.
+
+Usage:
+    python3 bench_serial_framer.py
+"""
+
+import random
+import re
+import time
+
+from serial_framer import LineFramer, parse_face_ids
+
+REALISTIC_RATE = 100  # lines/s: ~30 fps with a few faces in view
+SECONDS = 30          # of stream per run
+REPEATS = 7           # runs of each parser; the fastest is reported
+
+def make_stream(lines, seed=1):
+    rng = random.Random(seed)
+    out = []
+    for i in range(lines):
+        if rng.random() < 0.02:
+            out.append(b"Waving completed.\r\n")
+        out.append(f"Face ID: {rng.randint(1, 12)}\r\n".encode())
+    return b"".join(out)
+
+def chunk(stream, max_chunk, seed=2):
+    rng = random.Random(seed)
+    chunks, i = [], 0
+    while i < len(stream):
+        n = rng.randint(1, max_chunk)
+        chunks.append(stream[i:i + n])
+        i += n
+    return chunks
+
+def old_parser(chunks):
+    """What husky_presence_test.py did: decode, append, rescan the buffer."""
+    found = 0
+    buffer = ""
+    for data in chunks:
+        buffer += data.decode("utf-8", errors="replace")
+        processed_up_to = 0
+        for m in re.finditer(r"Face\s*ID\s*:\s*(\d+)", buffer, re.IGNORECASE):
+            int(m.group(1))
+            found += 1
+            processed_up_to = m.end()
+        buffer = buffer[processed_up_to:]
+    return found
+
+def new_parser(chunks):
+    found = 0
+    framer = LineFramer()
+    for data in chunks:
+        found += len(parse_face_ids(framer.feed_block(data)))
+    return found
+
+def run(label, rate, max_chunk):
+    lines = rate * SECONDS
+    chunks = chunk(make_stream(lines), max_chunk)
+    print(f"{label}: {rate} lines/s, {len(chunks)} reads of up to {max_chunk} bytes")
+    for name, parser in (("old str + finditer", old_parser), ("LineFramer", new_parser)):
+        elapsed = float("inf")
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            found = parser(chunks)
+            elapsed = min(elapsed, time.perf_counter() - start)
+        print(f"  {name:<20} {found / elapsed:>12,.0f} lines/s   "
+              f"{100 * elapsed / SECONDS:6.2f}% of one core at this rate   ({found} ids)")
+
+if __name__ == "__main__":
+    run("realistic", REALISTIC_RATE, 16)
+    run("100x", REALISTIC_RATE * 100, 512)
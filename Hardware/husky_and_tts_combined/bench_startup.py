@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Cold start of stt_api_tts.py: how long until it can open the mic port.
+
+Each measurement is a fresh interpreter, started from this folder as the
+scripts are:
+
+    python      an empty interpreter, the floor
+    lazy        import stt_api_tts as it is now (openai, httpx,
+                speech_recognition, gtts and pydub left for later)
+    eager       import stt_api_tts plus those libraries, which is what the
+                import used to cost, with the OpenAI client built
+    warm-up     the lazy import, then warm_up()'s threads until they finish
+                (DNS / TLS fail fast without a network; the first recording
+                takes at least the 2 s mic port reset, so this only has to
+                finish inside that)
+
+Then `python3 -X importtime` on the lazy import lists the slowest modules
+it still pulls in, and its total is checked against BUDGET_MS (the exit
+status is 1 if over, so this can run in CI).
+
+Usage:
+    python3 bench_startup.py [runs]
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+BUDGET_MS = 150  # import stt_api_tts, self + everything it imports
+SHOW = 8         # slowest modules to list
+
+CASES = {
+    "python": "pass",
+    "lazy": "import stt_api_tts",
+    "eager": "import stt_api_tts, openai, httpx, speech_recognition, gtts, pydub; stt_api_tts.get_client()",
+    "warm-up": "import stt_api_tts\nfor t in stt_api_tts.warm_up(): t.join()",
+}
+
+def env():
+    return dict(os.environ, PYTHONPATH=os.pathsep.join([str(HERE / "stt_api_tts"), str(HERE)]))
+
+def wall_ms(code, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=HERE, env=env(), check=True, capture_output=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+def import_times(module):
+    """(cumulative us of `import module`, [(cumulative us, name)] of the modules it imports directly)."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=HERE, env=env(),
+                         check=True, capture_output=True, text=True).stderr
+    children = []
+    for line in out.splitlines():
+        m = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line)
+        if not m:
+            continue
+        cumulative, depth, name = int(m.group(1)), len(m.group(2)), m.group(3)
+        # A module's imports are listed before it, one level deeper
+        if depth == 2:
+            children.append((cumulative, name))
+        elif depth == 0:
+            if name == module:
+                return cumulative, children
+            children = []
+    raise RuntimeError(f"{module} not in -X importtime output")
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"Wall time to a usable module, median of {runs} fresh interpreters:")
+    floor = None
+    for label, code in CASES.items():
+        ms = wall_ms(code, runs)
+        floor = floor if floor is not None else ms
+        print(f"  {label:<8} {ms:7.0f} ms   ({ms - floor:+.0f} ms over an empty interpreter)")
+
+    total, children = import_times("stt_api_tts")
+    print(f"-X importtime, import stt_api_tts: {total / 1000:.0f} ms; slowest of what it imports:")
+    for cumulative, name in sorted(children, reverse=True)[:SHOW]:
+        print(f"  {name:<20} {cumulative / 1000:7.1f} ms")
+    ok = total / 1000 <= BUDGET_MS
+    print(f"Budget {BUDGET_MS} ms: {'within' if ok else 'OVER'}")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+CPU and cross-component latency: supervisor.py vs. the two-process setup.
+
+A pty stands in for the HuskyLens Arduino and prints "Face ID: n" lines at
+camera rate, each id twice so it passes the tracker's enter hysteresis, with
+ABSENT_AFTER cut short so every new id becomes current. We time each id's
+second line until the conversation side sees the presence event, and each
+WAVE gesture from the conversation side until it reaches the Arduino. CPU
+is the user+system time the child processes spend during the measured
+window, so interpreter start-up and imports are left out.
+
+Only the presence/gesture path is emulated; the audio, STT and API stages
+are the same code in both setups.
+
+Usage:
+    python3 bench_supervisor.py [seconds] [lines_per_second]
+"""
+
+import asyncio
+import multiprocessing as mp
+import os
+import pty
+import signal
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import serial
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE / "huskylens_presence_detection"))
+
+GESTURE_EVERY = 0.5  # seconds between WAVE commands from the conversation side
+ABSENT_AFTER = 0.01  # previous id is gone well before the next one arrives
+
+def presence_times():
+    """Subscriber shared by both setups: record when each presence id arrives."""
+    seen = {}
+    def on_presence(event):
+        seen.setdefault(event.current_id, time.monotonic())
+    return seen, on_presence
+
+def measure_cpu(duration, cpu):
+    """Report this process's CPU time over the measured window."""
+    def run():
+        start = time.process_time()
+        time.sleep(duration)
+        cpu.put(time.process_time() - start)
+    threading.Thread(target=run, daemon=True).start()
+
+def send_gestures(bus, stop, sent):
+    from event_bus import GestureEvent
+    while not stop.wait(GESTURE_EVERY):
+        sent.append(time.monotonic())
+        bus.publish(GestureEvent("WAVE", sent[-1]))
+
+# ---------------- TWO PROCESSES ----------------
+def quiet():
+    """Children print a line per detection; keep the report readable."""
+    sys.stdout = open(os.devnull, "w")
+
+def husky_process(port, bus_path, workdir, duration, cpu):
+    quiet()
+    os.chdir(workdir)
+    import husky_presence_test as presence
+    from event_bus import EventBusServer
+    presence.PORT = port
+    presence.ABSENT_AFTER = ABSENT_AFTER
+    store = presence.open_store(presence.MEMORY_BACKEND)
+    presence.reset_memories(store)
+    bus = EventBusServer(bus_path)
+    measure_cpu(duration, cpu)
+    try:
+        presence.main(bus, store)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bus.close()
+
+def conversation_process(bus_path, duration, results, cpu):
+    from event_bus import EventBusClient
+    bus = EventBusClient(bus_path)
+    seen, on_presence = presence_times()
+    bus.subscribe("presence", on_presence)
+    bus.wait_connected(5)
+    measure_cpu(duration, cpu)
+    results.put("ready")
+    stop, sent = threading.Event(), []
+    threading.Thread(target=send_gestures, args=(bus, stop, sent), daemon=True).start()
+    time.sleep(duration + 0.5)
+    stop.set()
+    bus.close()
+    results.put((seen, sent))
+
+def start_two_process(port, workdir, duration, results, cpu):
+    bus_path = Path(workdir) / "bench.sock"
+    husky = mp.Process(target=husky_process, args=(port, bus_path, workdir, duration, cpu))
+    husky.start()
+    time.sleep(0.5)
+    talk = mp.Process(target=conversation_process, args=(bus_path, duration, results, cpu))
+    talk.start()
+    return [husky, talk]
+
+# ---------------- SUPERVISOR ----------------
+def supervisor_process(port, workdir, duration, results, cpu):
+    quiet()
+    os.chdir(HERE)  # stt_api_tts reads its key and prompt files on import
+    import husky_presence_test as presence
+    from event_bus import LocalEventBus
+    from supervisor import device_tasks
+    os.chdir(workdir)
+    presence.ABSENT_AFTER = ABSENT_AFTER
+
+    async def run():
+        bus = LocalEventBus()
+        seen, on_presence = presence_times()
+        bus.subscribe("presence", on_presence)
+        store = presence.open_store(presence.MEMORY_BACKEND)
+        presence.reset_memories(store)
+        with serial.Serial(port, presence.BAUD, timeout=0) as husky:
+            tasks = device_tasks(husky, bus, store)
+            stop, sent = threading.Event(), []
+            # The conversation thread publishes gestures from outside the loop, as in the supervisor
+            threading.Thread(target=send_gestures, args=(bus, stop, sent), daemon=True).start()
+            measure_cpu(duration, cpu)
+            results.put("ready")
+            await asyncio.sleep(duration + 0.5)
+            stop.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        results.put((seen, sent))
+
+    asyncio.run(run())
+
+def start_supervisor(port, workdir, duration, results, cpu):
+    proc = mp.Process(target=supervisor_process, args=(port, workdir, duration, results, cpu))
+    proc.start()
+    return [proc]
+
+# ---------------- DRIVER ----------------
+def run(label, start, duration, rate):
+    master, slave = pty.openpty()
+    port = os.ttyname(slave)
+    workdir = tempfile.mkdtemp()
+    results, cpu_q = mp.Queue(), mp.Queue()
+    procs = start(port, workdir, duration, results, cpu_q)
+    results.get(timeout=30)
+
+    # Read gesture bytes coming back from the "Arduino" side
+    waves = []
+    def read_master():
+        buf = b""
+        while True:
+            try:
+                chunk = os.read(master, 1024)
+            except OSError:
+                return
+            if not chunk:
+                return
+            buf += chunk
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                if line.strip() == b"WAVE":
+                    waves.append(time.monotonic())
+    threading.Thread(target=read_master, daemon=True).start()
+
+    written = {}
+    fid = 1
+    next_at = time.monotonic()
+    end = next_at + duration
+    while time.monotonic() < end:
+        os.write(master, f"Face ID: {fid}\n".encode())
+        written[fid] = time.monotonic()
+        os.write(master, f"Face ID: {fid}\n".encode())
+        fid += 1
+        next_at += 1 / rate
+        time.sleep(max(0, next_at - time.monotonic()))
+
+    seen, sent = results.get(timeout=30)
+    cpu = sum(cpu_q.get(timeout=30) for _ in procs)
+    for proc in procs:
+        proc.join(2)
+        if proc.is_alive():
+            os.kill(proc.pid, signal.SIGINT)
+            proc.join(5)
+    os.close(master)
+    os.close(slave)
+
+    presence_lat = sorted(seen[i] - written[i] for i in written if i in seen)
+    gesture_lat = sorted(w - s for s, w in zip(sent, waves))
+    med = lambda xs: xs[len(xs) // 2] * 1000 if xs else float("nan")
+    print(f"{label:<14} CPU {cpu:6.2f}s ({100 * cpu / duration:5.1f}%)   "
+          f"presence median {med(presence_lat):7.2f} ms ({len(presence_lat)}/{len(written)} seen)   "
+          f"gesture median {med(gesture_lat):7.2f} ms ({len(gesture_lat)} sent)")
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 30
+    print(f"{duration:.0f}s of Face ID lines at {rate:.0f}/s")
+    run("two processes", start_two_process, duration, rate)
+    run("supervisor", start_supervisor, duration, rate)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Face telemetry decoding: binary frames vs. text lines carrying the same box.
+
+Ways to get the faces out of the serial stream:
+
+    text + regex        "Face ID: 3 X: 160 Y: 120 W: 40 H: 50" lines,
+                        LineFramer + one regex per line
+    struct loop         binary frames, sync search + struct.unpack_from per frame
+    feed + closest      TelemetryDecoder.feed(), a FRAME_DTYPE array per read
+                        (one NumPy pass for large reads), then closest_faces()
+    feed_ids            TelemetryDecoder.feed_ids(), what the presence loop
+                        uses: struct.unpack_from for small reads, NumPy for
+                        large ones
+
+Reads are cut the way ser.read(ser.in_waiting or 1) returns them. Each
+parser runs REPEATS times and the fastest run is reported.
+
+Usage:
+    python3 bench_telemetry.py
+"""
+
+import random
+import re
+import time
+
+from husky_telemetry import FRAME_SIZE, FRAME_STRUCT, SYNC, TelemetryDecoder, closest_faces, encode_frame
+from serial_framer import LineFramer
+
+FPS = 30
+FACES = 3     # in view at once
+SECONDS = 60  # of stream per run
+BAUD = 115200
+REPEATS = 5
+
+TEXT_RE = re.compile(rb"Face ID: (\d+) X: (\d+) Y: (\d+) W: (\d+) H: (\d+)")
+
+def faces(seed=1):
+    rng = random.Random(seed)
+    for frame in range(FPS * SECONDS):
+        for fid in range(1, FACES + 1):
+            yield frame, fid, rng.randint(0, 320), rng.randint(0, 240), rng.randint(20, 160), rng.randint(20, 160)
+
+def text_stream():
+    return b"".join(f"Face ID: {fid} X: {x} Y: {y} W: {w} H: {h}\r\n".encode()
+                    for _, fid, x, y, w, h in faces())
+
+def binary_stream():
+    return b"".join(encode_frame(*face) for face in faces())
+
+def chunk(stream, max_chunk, seed=2):
+    rng = random.Random(seed)
+    chunks, i = [], 0
+    while i < len(stream):
+        n = rng.randint(1, max_chunk)
+        chunks.append(stream[i:i + n])
+        i += n
+    return chunks
+
+def text_parser(chunks):
+    found = 0
+    framer = LineFramer()
+    for data in chunks:
+        for m in TEXT_RE.finditer(framer.feed_block(data)):
+            tuple(map(int, m.groups()))
+            found += 1
+    return found
+
+def struct_parser(chunks):
+    found = 0
+    buf = b""
+    for data in chunks:
+        buf += data
+        i = buf.find(SYNC)
+        while i >= 0 and i + FRAME_SIZE <= len(buf):
+            fields = FRAME_STRUCT.unpack_from(buf, i)
+            if sum(buf[i + 2:i + FRAME_SIZE - 1]) & 0xFF == fields[-1]:
+                found += 1
+                i += FRAME_SIZE
+            else:
+                i += 1
+            i = buf.find(SYNC, i)
+        buf = buf[i:] if i >= 0 else buf[-1:]
+    return found
+
+def numpy_parser(chunks):
+    found = 0
+    decoder = TelemetryDecoder()
+    for data in chunks:
+        frames, _ = decoder.feed(data)
+        closest_faces(frames)
+        found += len(frames)
+    return found
+
+def ids_parser(chunks):
+    """Counts camera frames (closest faces), not faces, so compare its time rather than its count."""
+    decoder = TelemetryDecoder()
+    found = 0
+    for data in chunks:
+        found += len(decoder.feed_ids(data)[0])
+    return found
+
+def run(label, max_chunk):
+    text, binary = text_stream(), binary_stream()
+    n = FPS * SECONDS * FACES
+    print(f"{label}: {n} faces, reads of up to {max_chunk} bytes")
+    for name, parser, stream in (("text + regex", text_parser, text),
+                                 ("struct loop", struct_parser, binary),
+                                 ("feed + closest", numpy_parser, binary),
+                                 ("feed_ids", ids_parser, binary)):
+        chunks = chunk(stream, max_chunk)
+        elapsed = float("inf")
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            found = parser(chunks)
+            elapsed = min(elapsed, time.perf_counter() - start)
+        per_face = len(stream) / n
+        print(f"  {name:<18} {per_face:5.1f} B/face  {100 * per_face * 10 * FPS * FACES / BAUD:5.1f}% of the link   "
+              f"{n / elapsed:>10,.0f} faces/s  ({found} decoded)")
+
+if __name__ == "__main__":
+    run("trickle", 16)     # a few bytes per read, as at the camera's rate
+    run("backlog", 4096)   # the loop fell behind and reads a large block
+    run("big backlog", 65536)  # e.g. after a blocking step in the same process
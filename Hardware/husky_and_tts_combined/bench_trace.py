@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Cost of pipeline_trace: what a span or instant adds, and exporting a full ring.
+
+    off        trace.span() / trace.instant() with tracing not enabled
+    on         the same, recording into the ring
+    threads    4 threads recording at once (no lock; checks nothing is lost
+               or torn, each slot holds one whole event)
+    export     a full ring (CAPACITY events) to Chrome trace JSON
+
+Then a simulated turn (sleeps standing in for the stages, prewarm on its
+own thread) is written to traces/bench_turn.json, to open in
+https://ui.perfetto.dev and see the layout.
+
+Usage:
+    python3 bench_trace.py [events]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pipeline_trace
+from pipeline_trace import CAPACITY, TRACE_DIR, Tracer
+
+def per_event_ns(fn, n):
+    start = time.perf_counter_ns()
+    fn(n)
+    return (time.perf_counter_ns() - start) / n
+
+def spans(tracer):
+    def run(n):
+        for _ in range(n):
+            with tracer.span("stage", i=1):
+                pass
+    return run
+
+def instants(tracer):
+    def run(n):
+        for _ in range(n):
+            tracer.instant("mark")
+    return run
+
+def empty(n):
+    for _ in range(n):
+        pass
+
+def simulated_turn(tracer):
+    """The stages of one turn with made-up durations."""
+    now = pipeline_trace.now
+    with tracer.span("serial open", port="/dev/pty"):
+        time.sleep(0.02)
+    first = now()
+    tracer.instant("first mic byte")
+
+    def warm():
+        with tracer.span("prewarm"):
+            with tracer.span("warm connections"):
+                time.sleep(0.04)
+    prewarm = threading.Thread(target=warm, name="prewarm")
+    prewarm.start()
+    time.sleep(0.15)
+    last = now()
+    tracer.complete("utterance", first, last, bytes=1200)
+    time.sleep(0.05)
+    tracer.complete("end-of-utterance wait", last, now())
+    released = now()
+    with tracer.span("stt request"):
+        time.sleep(0.08)
+    with tracer.span("context", face_id=1):
+        time.sleep(0.002)
+    start = now()
+    time.sleep(0.06)
+    tracer.complete("llm first token", start, now())
+    time.sleep(0.04)
+    tracer.complete("llm completion", start, now(), completion_tokens=40)
+    start = now()
+    time.sleep(0.05)
+    tracer.complete("tts first chunk", start, now())
+    time.sleep(0.03)
+    tracer.complete("tts request", start, now(), chars=120)
+    with tracer.span("playback", bytes=16000):
+        tracer.instant("first speaker byte")
+        time.sleep(0.1)
+    tracer.complete("turn", released, now(), face_id=1)
+    prewarm.join()
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    tracer = Tracer()
+    base = per_event_ns(empty, n)
+    off_span, off_instant = per_event_ns(spans(tracer), n) - base, per_event_ns(instants(tracer), n) - base
+    tracer.enabled = True
+    on_span, on_instant = per_event_ns(spans(tracer), n) - base, per_event_ns(instants(tracer), n) - base
+    print(f"{n} events, ring of {CAPACITY}")
+    print(f"  span      off {off_span:7.0f} ns   on {on_span:7.0f} ns")
+    print(f"  instant   off {off_instant:7.0f} ns   on {on_instant:7.0f} ns")
+
+    tracer.clear()
+    per_thread = CAPACITY // 4
+    workers = [threading.Thread(target=instants(tracer), args=(per_thread,)) for _ in range(4)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    kept = [e for e in tracer.events if e is not None]
+    assert len(kept) == CAPACITY and all(len(e) == 6 for e in kept)
+    print(f"  threads   4 x {per_thread}: {len(kept)} of {CAPACITY} events kept, "
+          f"{elapsed / CAPACITY * 1e9:.0f} ns each")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        path = tracer.export(os.path.join(tmp, "full.json"))
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+        with open(path) as f:
+            events = json.load(f)["traceEvents"]
+    print(f"  export    {len(events)} events, {size / 1e6:.1f} MB in {elapsed * 1000:.0f} ms")
+
+    tracer.clear()
+    tracer.process_name = "bench turn"
+    simulated_turn(tracer)
+    print(f"Simulated turn: {tracer.export(TRACE_DIR / 'bench_turn.json')} (open in https://ui.perfetto.dev)")
@@ -0,0 +1,275 @@
+"""
+Local pub/sub event bus between the HuskyLens and the STT/API/TTS processes.
+
+The presence process runs an EventBusServer on a Unix domain socket, the
+conversation process connects with an EventBusClient. Events are small JSON
+lines, so delivery is a single socket write instead of a file rewrite that
+the other side has to poll for. When everything runs in one process under
+supervisor.py, LocalEventBus offers the same interface without the socket.
+
+Every topic keeps its last value, and a new subscriber gets it straight
+away, so a late joiner knows who is in front of the camera without waiting
+for the next detection.
+"""
+
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+BUS_PATH = Path(tempfile.gettempdir()) / "winnie_bus.sock"
+RECONNECT_INTERVAL = 0.5
+
+# ---------------- EVENTS ----------------
+@dataclass
+class PresenceEvent:
+    current_id: int  # 0 when nobody is in view
+    timestamp_monotonic: float
+    topic = "presence"
+
+@dataclass
+class GestureEvent:
+    command: str
+    timestamp_monotonic: float = 0.0
+    at_monotonic: float = 0.0  # when the gesture should start; 0 for right away
+    topic = "gesture"
+
+EVENT_TYPES = {cls.topic: cls for cls in (PresenceEvent, GestureEvent)}
+
+def encode(event):
+    return (json.dumps({"topic": event.topic, "data": asdict(event)}) + "\n").encode("utf-8")
+
+def decode(line):
+    msg = json.loads(line)
+    return EVENT_TYPES[msg["topic"]](**msg["data"])
+
+# ---------------- SHARED ----------------
+class _Subscribers:
+    """Topic -> callbacks, plus the last value seen on each topic."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.callbacks = {}
+        self.last = {}
+
+    def add(self, topic, callback=None):
+        """Follow a topic. With no callback only latest() is kept up to date."""
+        with self.lock:
+            callbacks = self.callbacks.setdefault(topic, [])
+            if callback is None:
+                return
+            callbacks.append(callback)
+            last = self.last.get(topic)
+        if last is not None:
+            callback(last)
+
+    def remember(self, event):
+        with self.lock:
+            self.last[event.topic] = event
+
+    def dispatch(self, event, remember=True):
+        with self.lock:
+            if remember:
+                self.last[event.topic] = event
+            callbacks = list(self.callbacks.get(event.topic, ()))
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"⚠️ {event.topic} subscriber failed:", e)
+
+    def latest(self, topic):
+        with self.lock:
+            return self.last.get(topic)
+
+# ---------------- SERVER ----------------
+class EventBusServer:
+    """Broker: fans events out to connected clients and to local subscribers."""
+
+    def __init__(self, path=BUS_PATH):
+        self.path = Path(path)
+        self.local = _Subscribers()
+        self.clients = {}  # conn -> set of subscribed topics
+        self.clients_lock = threading.Lock()
+        if self.path.exists():
+            self.path.unlink()  # stale socket from a previous run
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(str(self.path))
+        self.sock.listen()
+        self.running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                break
+            with self.clients_lock:
+                self.clients[conn] = set()
+            threading.Thread(target=self._client_loop, args=(conn,), daemon=True).start()
+
+    def _client_loop(self, conn):
+        try:
+            for line in conn.makefile("rb"):
+                try:
+                    msg = json.loads(line)
+                    if "subscribe" in msg:
+                        self._subscribe_client(conn, msg["subscribe"])
+                    else:
+                        self.publish(decode(line))
+                except (KeyError, TypeError, ValueError) as e:
+                    print("⚠️ Bus: skipping bad message:", repr(e))
+        except OSError:
+            pass
+        finally:
+            with self.clients_lock:
+                self.clients.pop(conn, None)
+            conn.close()
+
+    def _subscribe_client(self, conn, topic):
+        # Under the same lock as publish: the replay can't interleave with a
+        # fan-out, and a publish is either already in latest() or sent after this
+        with self.clients_lock:
+            self.clients[conn].add(topic)
+            last = self.local.latest(topic)
+            if last is not None:
+                conn.sendall(encode(last))
+
+    def publish(self, event):
+        data = encode(event)
+        with self.clients_lock:
+            # Remembered before the fan-out, so a subscriber can't miss it and
+            # then be replayed the value before it
+            self.local.remember(event)
+            # Sent under the lock so concurrent publishers never interleave lines
+            for conn, topics in self.clients.items():
+                if event.topic in topics:
+                    try:
+                        conn.sendall(data)
+                    except OSError:
+                        pass  # its reader thread cleans up
+        self.local.dispatch(event, remember=False)
+
+    def subscribe(self, topic, callback=None):
+        self.local.add(topic, callback)
+
+    def latest(self, topic):
+        return self.local.latest(topic)
+
+    def close(self):
+        self.running = False
+        self.sock.close()
+        with self.clients_lock:
+            for conn in list(self.clients):
+                conn.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+# ---------------- IN-PROCESS ----------------
+class LocalEventBus:
+    """Same interface as the server and client, for components sharing one process."""
+
+    def __init__(self):
+        self.local = _Subscribers()
+
+    def publish(self, event):
+        self.local.dispatch(event)
+        return True
+
+    def subscribe(self, topic, callback=None):
+        self.local.add(topic, callback)
+
+    def latest(self, topic):
+        return self.local.latest(topic)
+
+    def close(self):
+        pass
+
+# ---------------- CLIENT ----------------
+class EventBusClient:
+    """Connects to the broker in the background and reconnects if it restarts."""
+
+    def __init__(self, path=BUS_PATH):
+        self.path = Path(path)
+        self.local = _Subscribers()
+        self.sock = None
+        self.send_lock = threading.Lock()
+        self.running = True
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while self.running:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(str(self.path))
+            except OSError:
+                sock.close()
+                time.sleep(RECONNECT_INTERVAL)
+                continue
+            with self.send_lock:
+                self.sock = sock
+                with self.local.lock:
+                    topics = list(self.local.callbacks)
+                for topic in topics:
+                    self._send_raw({"subscribe": topic})
+            try:
+                for line in sock.makefile("rb"):
+                    try:
+                        event = decode(line)
+                    except (KeyError, TypeError, ValueError) as e:
+                        print("⚠️ Bus: skipping bad message:", repr(e))
+                        continue
+                    self.local.dispatch(event)
+            except OSError:
+                pass
+            with self.send_lock:
+                self.sock = None
+            sock.close()
+
+    def _send_raw(self, msg):
+        """Caller holds send_lock."""
+        if self.sock is None:
+            return False
+        try:
+            self.sock.sendall((json.dumps(msg) + "\n").encode("utf-8"))
+            return True
+        except OSError:
+            return False
+
+    def publish(self, event):
+        """Send an event to the broker. Returns False if not connected."""
+        with self.send_lock:
+            if self.sock is None:
+                return False
+            try:
+                self.sock.sendall(encode(event))
+                return True
+            except OSError:
+                return False
+
+    def subscribe(self, topic, callback=None):
+        self.local.add(topic, callback)
+        with self.send_lock:
+            self._send_raw({"subscribe": topic})
+
+    def latest(self, topic):
+        return self.local.latest(topic)
+
+    def wait_connected(self, timeout):
+        deadline = time.monotonic() + timeout
+        while self.sock is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.sock is not None
+
+    def close(self):
+        self.running = False
+        with self.send_lock:
+            if self.sock is not None:
+                self.sock.shutdown(socket.SHUT_RDWR)
@@ -0,0 +1,158 @@
+"""
+Registry of the people behind HuskyLens face IDs, saved write-behind.
+
+The whole registry lives in a dict; lookups never touch the disk. A
+registration updates the dict at once and queues the change for a writer
+thread, which appends it to a journal next to the snapshot:
+
+    faces.json           snapshot, {"<id>": {"name": ..., ...}}, the old format
+    faces.json.journal   one JSON line per change since the snapshot
+
+Every COMPACT_EVERY changes (and on close) the writer writes a fresh
+snapshot to a temporary file, os.replace()s it over faces.json and empties
+the journal. Loading is the snapshot plus a replay of the journal. Replaying
+a change twice is harmless, so a crash between the replace and emptying the
+journal loses nothing, and a torn last journal line is skipped.
+"""
+
+import json
+import os
+import queue
+import tempfile
+import threading
+from pathlib import Path
+
+DB_PATH = Path("faces.json")
+COMPACT_EVERY = 1000  # journal lines before the snapshot is rewritten
+
+class FaceRegistry:
+    """{face ID: person info}, loaded once and saved in the background."""
+
+    def __init__(self, path=DB_PATH, compact_every=COMPACT_EVERY):
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.name + ".journal")
+        self.compact_every = compact_every
+        self.people = self._load()
+        self.lock = threading.Lock()  # snapshot copies vs. registrations
+        self.pending = queue.Queue()
+        self.writer = threading.Thread(target=self._run, daemon=True)
+        self.writer.start()
+
+    # ---------------- LOAD ----------------
+    def _load(self):
+        people = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    people = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not read {self.path}, starting from the journal:", e)
+        self.journaled = 0
+        if self.journal_path.exists():
+            good = 0
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("no newline")
+                        key, info = json.loads(line)
+                    except ValueError:
+                        break  # torn last line
+                    if info is None:
+                        people.pop(key, None)
+                    else:
+                        people[key] = info
+                    good += len(line)
+                    self.journaled += 1
+            if good < self.journal_path.stat().st_size:
+                os.truncate(self.journal_path, good)  # so new lines do not follow the torn one
+        return people
+
+    # ---------------- DICT INTERFACE ----------------
+    def __contains__(self, fid):
+        return str(fid) in self.people
+
+    def __getitem__(self, fid):
+        return self.people[str(fid)]
+
+    def get(self, fid, default=None):
+        return self.people.get(str(fid), default)
+
+    def __len__(self):
+        return len(self.people)
+
+    def __setitem__(self, fid, info):
+        self.register(fid, info)
+
+    def register(self, fid, info):
+        """Add or replace a person. Returns at once; the write happens behind."""
+        key = str(fid)
+        with self.lock:
+            self.people[key] = info
+        self.pending.put((key, info))
+
+    def forget(self, fid):
+        key = str(fid)
+        with self.lock:
+            self.people.pop(key, None)
+        self.pending.put((key, None))
+
+    # ---------------- WRITER ----------------
+    def _run(self):
+        journal = open(self.journal_path, "a", encoding="utf-8")
+        while True:
+            item = self.pending.get()
+            batch = [item]
+            while True:  # everything that queued up while we were writing
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            done = [b for b in batch if isinstance(b, threading.Event)]
+            changes = [b for b in batch if not isinstance(b, threading.Event)]
+            closing = None in changes
+            changes = [c for c in changes if c is not None]
+            if changes:
+                journal.write("".join(json.dumps(c, ensure_ascii=False) + "\n" for c in changes))
+                journal.flush()
+                self.journaled += len(changes)
+            if self.journaled >= self.compact_every or (closing and self.journaled):
+                journal.close()
+                self._compact()
+                journal = open(self.journal_path, "a", encoding="utf-8")
+            for event in done:
+                event.set()
+            if closing:
+                journal.close()
+                return
+
+    def _compact(self):
+        """Snapshot everything and start an empty journal."""
+        with self.lock:
+            snapshot = dict(self.people)
+        fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), prefix=self.path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        finally:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        # Changes made after the copy are in the queue, not yet in the journal
+        open(self.journal_path, "w").close()
+        self.journaled = 0
+
+    def flush(self):
+        """Wait until every registration so far is in the journal."""
+        done = threading.Event()
+        self.pending.put(done)
+        done.wait()
+
+    def close(self):
+        """Write a final snapshot and stop the writer."""
+        self.pending.put(None)
+        self.writer.join()
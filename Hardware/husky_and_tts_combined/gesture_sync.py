@@ -0,0 +1,141 @@
+"""
+Gestures timed against audio playback.
+
+The conversation side publishes each gesture with the host time it should
+start (GestureEvent.at_monotonic), shortly before the audio starts. The side
+that owns the HuskyLens port converts that to the Arduino's millis() clock
+and sends it ahead of time with a sequence number, and the firmware starts
+it on time without blocking its loop:
+
+    G <seq> <millis> <command>    start command when millis() reaches <millis>
+    P <token>                     ping, answered with "P <token> <millis>"
+    WAVE                          start now (what older host code sends)
+
+The firmware answers every G line with "K <seq> <late_ms>" when the gesture
+starts, so skew can be read off real hardware too.
+
+ClockSync maps time.monotonic() to millis() from ping round trips. Only the
+fastest of the last few count: a quick reply was stamped close to the middle
+of its round trip, while a slow one sat in a buffer for part of it. A line
+through those also follows the Arduino's clock drift (its resonator can be
+off by 0.1-0.5%, i.e. milliseconds per second).
+"""
+
+import re
+import time
+from collections import deque
+
+from pipeline_trace import trace
+
+PING_EVERY = 1.0    # seconds between clock pings
+SYNC_WINDOW = 8     # pings to pick the fastest round trips from
+RTT_SLACK = 0.002   # seconds; round trips this close to the fastest one count as good
+JUMP_MS = 50        # a reply this far off the fitted clock means the Arduino restarted
+STALE_AFTER = 1.0   # seconds; a gesture this far past its time is dropped (e.g. a replayed last event)
+WARN_LATE_MS = 50   # report gestures the Arduino started later than this
+
+PING_RE = re.compile(rb"^P (\d+) (\d+)$", re.MULTILINE)
+ACK_RE = re.compile(rb"^K (\d+) (-?\d+)$", re.MULTILINE)
+
+class ClockSync:
+    """Offset between time.monotonic() and the Arduino's millis()."""
+
+    def __init__(self, window=SYNC_WINDOW):
+        self.sent = {}                       # token -> host send time
+        self.samples = deque(maxlen=window)  # (round trip, host time, offset in ms)
+        self.token = 0
+
+    def ping(self, now=None):
+        """The next ping line to write."""
+        now = time.monotonic() if now is None else now
+        self.token += 1
+        self.sent[self.token] = now
+        self.sent.pop(self.token - self.samples.maxlen, None)  # never answered
+        return f"P {self.token}\n".encode("ascii")
+
+    def on_reply(self, token, millis, now=None):
+        now = time.monotonic() if now is None else now
+        sent = self.sent.pop(token, None)
+        if sent is None:
+            return
+        mid = (sent + now) / 2
+        offset = millis - mid * 1000
+        if self.samples and abs(offset - self.offset_at(mid)) > JUMP_MS + (now - sent) * 1000:
+            self.samples.clear()  # millis() started over, the old samples are for another clock
+        self.samples.append((now - sent, mid, offset))
+
+    @property
+    def synced(self):
+        return bool(self.samples)
+
+    def offset_at(self, host_time):
+        """millis() minus host milliseconds, at host_time."""
+        samples = list(self.samples)
+        fastest = min(rtt for rtt, _, _ in samples)
+        good = [(t, offset) for rtt, t, offset in samples if rtt <= fastest + RTT_SLACK]
+        if len(good) < 3 or good[-1][0] - good[0][0] < 2.0:
+            return min(samples)[2]
+        # Least-squares line through the good samples, for the drift
+        n = len(good)
+        t_mean = sum(t for t, _ in good) / n
+        o_mean = sum(o for _, o in good) / n
+        slope = (sum((t - t_mean) * (o - o_mean) for t, o in good)
+                 / sum((t - t_mean) ** 2 for t, _ in good))
+        return o_mean + slope * (host_time - t_mean)
+
+    def to_device(self, host_time):
+        """millis() value on the Arduino at host_time (time.monotonic())."""
+        return round(host_time * 1000 + self.offset_at(host_time)) & 0xFFFFFFFF
+
+class GestureLink:
+    """Host side of the gesture protocol for one HuskyLens port."""
+
+    def __init__(self):
+        self.sync = ClockSync()
+        self.seq = 0
+        self.next_ping = 0.0
+
+    def command(self, event, now=None):
+        """Bytes to write now for event, or None.
+
+        None means either the event is stale, or the Arduino has not answered
+        a ping yet; then send_at() says when to send the plain command instead.
+        """
+        now = time.monotonic() if now is None else now
+        at = event.at_monotonic or now
+        if now - at > STALE_AFTER or not self.sync.synced:
+            return None
+        self.seq += 1
+        return f"G {self.seq} {self.sync.to_device(at)} {event.command}\n".encode("ascii")
+
+    def send_at(self, event, now=None):
+        """Host time to send event as a plain command when it cannot be queued, or None to drop it."""
+        now = time.monotonic() if now is None else now
+        at = event.at_monotonic or now
+        return None if now - at > STALE_AFTER else at
+
+    def reset(self):
+        """The Arduino restarted (e.g. its port was reopened): its clock starts over, so sync again now."""
+        self.sync = ClockSync()
+        self.next_ping = 0.0
+
+    def ping_due(self, now=None):
+        """A ping line if it is time for one, else None."""
+        now = time.monotonic() if now is None else now
+        if now < self.next_ping:
+            return None
+        self.next_ping = now + PING_EVERY
+        return self.sync.ping(now)
+
+    def on_text(self, text, now=None):
+        """Pick ping replies and gesture acks out of a block of text lines from the Arduino."""
+        if not text:
+            return
+        now = time.monotonic() if now is None else now
+        for m in PING_RE.finditer(text):
+            self.sync.on_reply(int(m.group(1)), int(m.group(2)), now)
+        for m in ACK_RE.finditer(text):
+            late = int(m.group(2))
+            trace.instant("gesture started", seq=int(m.group(1)), late_ms=late)
+            if late > WARN_LATE_MS:
+                print(f"⚠️ Gesture {int(m.group(1))} started {late} ms late")
@@ -0,0 +1,168 @@
+"""
+Binary face telemetry from the HuskyLens Arduino.
+
+For every face in every camera frame the firmware writes one 14-byte frame,
+little-endian:
+
+    A5 5A | frame u16 | id u8 | x u16 | y u16 | w u16 | h u16 | checksum u8
+
+x/y are the box centre and w/h its size in camera pixels (320x240), frame
+is the camera frame counter (wraps at 65536) so faces seen together can be
+grouped, and checksum is the low byte of the sum of bytes 2..12.
+
+Text still shares the port ("Waving completed.", start-up messages, and
+"Face ID: n" from older firmware). TelemetryDecoder pulls the binary frames
+out of a chunk of bytes and hands what is left to a LineFramer. Large
+reads (a backlog) are searched and checksummed in one NumPy pass. Small
+reads, the usual case at camera rate, go through bytes.find; most of them
+only add to a frame still arriving and return at once.
+
+feed() gives the frames as a FRAME_DTYPE array either way. For a read of
+a frame or two that array costs more than the decoding, so feed_ids(),
+which is all the presence loop needs, picks the closest face of each
+camera frame with struct.unpack_from on small reads and closest_faces()
+on batches. On 16-byte reads it still runs at about two thirds of a bare
+unpack_from loop (bench_telemetry.py); that is the cost of keeping the
+text and grouping faces by camera frame, which such a loop skips.
+"""
+
+import struct
+
+import numpy as np
+
+from serial_framer import LineFramer
+
+SYNC = b"\xa5\x5a"
+FRAME_STRUCT = struct.Struct("<2sHBHHHHB")
+FRAME_SIZE = FRAME_STRUCT.size  # 14
+FRAME_DTYPE = np.dtype([
+    ("sync", "<u2"), ("frame", "<u2"), ("id", "u1"),
+    ("x", "<u2"), ("y", "<u2"), ("w", "<u2"), ("h", "<u2"),
+    ("checksum", "u1"),
+])
+assert FRAME_DTYPE.itemsize == FRAME_SIZE
+
+_OFFSETS = np.arange(FRAME_SIZE)
+NO_FRAMES = np.empty(0, dtype=FRAME_DTYPE)
+NO_FRAMES.flags.writeable = False  # shared by every read without a frame
+BATCH_MIN = 2048  # bytes; below this the NumPy set-up costs more than it saves
+
+def encode_frame(frame, fid, x, y, w, h):
+    """One telemetry frame as the firmware writes it (for emulators and tests)."""
+    body = FRAME_STRUCT.pack(SYNC, frame & 0xFFFF, fid, x, y, w, h, 0)
+    return body[:-1] + bytes([sum(body[2:-1]) & 0xFF])
+
+class TelemetryDecoder:
+    """Splits the serial stream into telemetry frames and text lines."""
+
+    def __init__(self):
+        self.buf = b""
+        self.text = LineFramer()
+        self.bad_checksums = 0
+
+    def feed(self, data):
+        """Add bytes, return (frames, text): a FRAME_DTYPE array and a block of complete text lines."""
+        buf = self.buf + data
+        if len(buf) >= BATCH_MIN:
+            return self._feed_batch(buf)
+        starts, text = self._scan(buf)
+        if not starts:
+            frames = NO_FRAMES
+        elif len(starts) == 1:
+            frames = np.frombuffer(buf, dtype=FRAME_DTYPE, count=1, offset=starts[0])
+        else:
+            frames = np.frombuffer(b"".join(buf[i:i + FRAME_SIZE] for i in starts), dtype=FRAME_DTYPE)
+        return frames, text
+
+    def feed_ids(self, data):
+        """Add bytes, return (ids, text): the closest face ID of each camera frame, as closest_faces() picks them."""
+        buf = self.buf + data
+        if len(buf) >= BATCH_MIN:
+            frames, text = self._feed_batch(buf)
+            return closest_faces(frames)["id"].tolist(), text
+        starts, text = self._scan(buf)
+        ids, last, best = [], None, 0
+        for i in starts:
+            _, frame, fid, _, _, w, h, _ = FRAME_STRUCT.unpack_from(buf, i)
+            if frame != last:
+                ids.append(fid)
+                last, best = frame, w * h
+            elif w * h > best:
+                ids[-1], best = fid, w * h
+        return ids, text
+
+    def _scan(self, buf):
+        """Offsets of the complete frames in a small buffer, and the block of text lines around them."""
+        n = len(buf)
+        i = buf.find(SYNC)
+        if i == 0 and n < FRAME_SIZE:
+            self.buf = buf  # the next frame, still arriving
+            return (), b""
+        starts, text = [], []
+        pos = 0  # start of text not yet taken
+        while 0 <= i and i + FRAME_SIZE <= n:
+            if sum(buf[i + 2:i + FRAME_SIZE - 1]) & 0xFF == buf[i + FRAME_SIZE - 1]:
+                if i > pos:
+                    text.append(buf[pos:i])
+                starts.append(i)
+                i = pos = i + FRAME_SIZE
+            else:
+                self.bad_checksums += 1
+                i += 1
+            i = buf.find(SYNC, i)
+
+        # Hold back a frame that is still arriving; everything else is text
+        if i >= 0:
+            end = i
+        elif n > pos and buf[-1] == 0xA5:
+            end = n - 1
+        else:
+            end = n
+        if end > pos:
+            text.append(buf[pos:end])
+        self.buf = buf[end:]
+        return starts, self.text.feed_block(b"".join(text)) if text else b""
+
+    def _feed_batch(self, buf):
+        raw = np.frombuffer(buf, dtype=np.uint8)
+        n = len(raw)
+
+        # Every place the sync word could start a complete frame, checked all at once
+        starts = np.flatnonzero((raw[:-1] == 0xA5) & (raw[1:] == 0x5A))
+        complete = starts[starts + FRAME_SIZE <= n]
+        rows = raw[complete[:, None] + _OFFSETS]
+        ok = (rows[:, 2:-1].sum(axis=1, dtype=np.uint32) & 0xFF) == rows[:, -1]
+        bad, good, rows = complete[~ok], complete[ok], rows[ok]
+        # A sync word inside a frame that also passes its checksum is not a frame of its own
+        first = np.diff(good, prepend=-FRAME_SIZE) >= FRAME_SIZE
+        good, rows = good[first], rows[first]
+        frames = rows.view(FRAME_DTYPE).ravel()
+
+        # Hold back a frame that is still arriving; everything else is text
+        done = int(good[-1]) + FRAME_SIZE if len(good) else 0
+        partial = starts[(starts + FRAME_SIZE > n) & (starts >= done)]
+        if len(partial):
+            end = int(partial[0])
+        elif n > done and raw[-1] == 0xA5:
+            end = n - 1
+        else:
+            end = n
+        keep = np.ones(end, dtype=bool)
+        keep[(good[:, None] + _OFFSETS).ravel()] = False
+        self.bad_checksums += int(np.count_nonzero(keep[bad]))  # not just a sync word inside a good frame
+        self.buf = buf[end:]
+        text = self.text.feed_block(raw[:end][keep].tobytes()) if end else b""
+        return frames, text
+
+def closest_faces(frames):
+    """The largest box (closest face) in each camera frame, in arrival order."""
+    if len(frames) < 2:
+        return frames
+    area = frames["w"].astype(np.int64) * frames["h"]
+    if frames["frame"][0] == frames["frame"][-1]:
+        return frames[[int(area.argmax())]]  # one camera frame, the usual case per read
+    # Faces of one camera frame arrive together, so a counter change starts the next one
+    group = np.cumsum(np.diff(frames["frame"].astype(np.int32), prepend=-1) != 0)
+    order = np.lexsort((-area, group))
+    first = np.flatnonzero(np.diff(group[order], prepend=0) != 0)
+    return frames[order[first]]
@@ -1,107 +1,128 @@
-import serial
-import re
 from pathlib import Path
-import json
 import time
-import tempfile
-import shutil
+import sys
+import threading
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from event_bus import EventBusServer, PresenceEvent, BUS_PATH
+from serial_framer import parse_face_ids
+from husky_telemetry import TelemetryDecoder
+from gesture_sync import GestureLink
+from presence_tracker import PresenceTracker
+from memory_store import open_store
+from memory_index import MemoryIndex
+from serial_ports import DeviceSpec, ManagedSerial
+import pipeline_trace
+from pipeline_trace import trace
 
 # ---------------- CONFIG ----------------
-PORT = "/dev/cu.usbserial-10"  # Arduino/HuskyLens port
+PORT = "/dev/cu.usbserial-10"  # Arduino/HuskyLens port, used as is while the IDs below are None
+VID, PID, SERIAL_NUMBER = None, None, None  # USB IDs of the Arduino, to find it on any port
 BAUD = 115200
-CHECK_INTERVAL = 0.1
-WAVING_FLAG_FILE = Path("waving_flag.txt")
+ABSENT_AFTER = 3.0  # seconds without a sighting before a face counts as gone
+MEMORY_BACKEND = "sqlite"  # per-person memory, same as the conversation side: "sqlite" or "log"
+RESET_MEMORIES = False  # True to forget everyone (memories.db and the recall index) at start
+TRACE = True  # presence and gesture events, written to ../traces/ at exit (see pipeline_trace.py)
 # ----------------------------------------
 
-# Save presence.json in Downloads/combined
-DOWNLOADS = Path.home() / "Downloads"
-PRESENCE_FOLDER = DOWNLOADS / "combined"
-PRESENCE_FOLDER.mkdir(parents=True, exist_ok=True)
-PRESENCE_PATH = PRESENCE_FOLDER / "presence.json"
-
-# Folder to store per-person memory
-MEMORIES_DIR = Path("memories")
-# Clear folder on first run
-if MEMORIES_DIR.exists():
-    shutil.rmtree(MEMORIES_DIR)
-MEMORIES_DIR.mkdir(exist_ok=True)
-
-# Regex patterns to extract face IDs
-id_patterns = [
-    re.compile(r"^DATA\s*,\s*(\d+)\s*,", re.IGNORECASE),
-    re.compile(r"Face\s*ID\s*:\s*(\d+)", re.IGNORECASE),
-    re.compile(r"ID\s*=\s*(\d+)", re.IGNORECASE),
-]
+def reset_memories(store):
+    """Forget everyone. Only when RESET_MEMORIES is set; memory is kept across runs otherwise."""
+    store.reset()
+    MemoryIndex().reset()  # the conversation side's recall vectors
 
-def extract_face_id(text: str):
-    for pat in id_patterns:
-        m = pat.search(text)
-        if m:
-            return int(m.group(1))
-    return None
+def ensure_person(store, fid):
+    """Make sure a person who just came into view has a memory entry."""
+    print(f"Detected: ID {fid}")
+    trace.instant("face entered", face_id=fid)
+    if store.ensure_person(fid):
+        print(f"New person ID {fid} (fill in their details: "
+              f"python3 memory_store.py set {fid} --name ... --degree ...)")
 
-def atomic_write_json(path: Path, obj: dict):
-    """Write JSON atomically to avoid partial writes."""
-    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=path.name, suffix=".tmp")
-    try:
-        with open(fd, "w", encoding="utf-8") as f:
-            json.dump(obj, f, ensure_ascii=False)
-        Path(tmp).replace(path)
-    finally:
-        try:
-            Path(tmp).unlink()
-        except FileNotFoundError:
-            pass
+def make_tracker(bus, store):
+    """Presence tracker that creates memory entries and tells the conversation process who is here.
 
-# ---------------- MAIN LOOP ----------------
-def main():
-    print(f"Listening on {PORT} @ {BAUD}... (checking every {CHECK_INTERVAL}s)")
-    with serial.Serial(PORT, BAUD, timeout=0.05) as ser:
-        buffer = ""
-        while True:
-            start_time = time.monotonic()
-            while time.monotonic() - start_time < CHECK_INTERVAL:
-                data = ser.read(ser.in_waiting or 1)
-                if data:
-                    buffer += data.decode("utf-8", errors="replace")
-                time.sleep(0.01)
+    Only changes reach the bus: one event when the current face changes,
+    and current_id=0 once nobody has been seen for ABSENT_AFTER seconds.
+    """
+    def on_change(fid):
+        trace.instant("presence change", current_id=fid)
+        bus.publish(PresenceEvent(current_id=fid, timestamp_monotonic=time.monotonic()))
+    return PresenceTracker(on_change=on_change, on_enter=lambda fid: ensure_person(store, fid), leave_after=ABSENT_AFTER)
 
-            # Waving flag check
-            if WAVING_FLAG_FILE.exists():
-                flag = WAVING_FLAG_FILE.read_text().strip()
-                if flag == "true":
-                    ser.write(b"WAVE\n")
-                    print("Sent WAVE command to Arduino.")
-                    WAVING_FLAG_FILE.write_text("false")
+def device():
+    """The HuskyLens Arduino, for serial_ports.ManagedSerial."""
+    return DeviceSpec("HuskyLens Arduino", PORT, VID, PID, SERIAL_NUMBER)
 
-            processed_up_to = 0
-            matches = re.finditer(r"Face\s*ID\s*:\s*(\d+)", buffer, re.IGNORECASE)
-            for m in matches:
-                fid = int(m.group(1))
-                print(f"Detected: ID {fid}")
+def speaker_ids(decoder, data, link=None):
+    """Face IDs for the tracker from one read: the closest face of each camera
+    frame, plus "Face ID: n" lines from firmware that still prints text.
+    Ping replies and gesture acks in the text go to link."""
+    ids, text = decoder.feed_ids(data)
+    if link is not None:
+        link.on_text(text)
+    return ids + parse_face_ids(text)
 
-                # ---------------- Create ID file if it doesn't exist ----------------
-                person_file = MEMORIES_DIR / f"ID_{fid}.txt"
-                if not person_file.exists():
-                    with open(person_file, "w", encoding="utf-8") as f:
-                        f.write("name: \n")
-                        f.write("degree: \n")
-                        f.write("count = -1\n\n")  # <-- Added line for count
-                        f.write("--- Conversation Log ---\n")
-                    print(f"Created new memory file: {person_file} (please edit name/degree manually)")
+# ---------------- MAIN LOOP ----------------
+def main(bus, store):
+    print(f"Listening on {PORT} @ {BAUD}...")
+    print(f"Event bus on {BUS_PATH}")
+    # Reads return as soon as bytes arrive. Unplugged, a read waits for the Arduino to come
+    # back; the tracker, the bus and memory carry on as they were.
+    with ManagedSerial(device(), BAUD, timeout=1.0) as ser:
+        ser_lock = threading.Lock()
+        def write(line):
+            with ser_lock:
+                ser.write(line)
 
-                # Update presence.json
-                payload = {
-                    "current_id": fid,
-                    "timestamp_monotonic": time.monotonic()
-                }
-                atomic_write_json(PRESENCE_PATH, payload)
-                processed_up_to = m.end()
+        # Gesture commands arrive on the bus thread ahead of their start time;
+        # queue them on the Arduino, which starts them on its own clock
+        link = GestureLink()
+        def on_gesture(event):
+            line = link.command(event)
+            if line is not None:
+                write(line)
+                trace.instant("gesture queued", command=event.command, lead_s=event.at_monotonic - time.monotonic())
+                print(f"Queued {event.command} command on Arduino.")
+                return
+            at = link.send_at(event)
+            if at is None:
+                return
+            # No clock sync yet (or older firmware): send the plain command at its time
+            plain = f"{event.command}\n".encode("ascii")
+            trace.instant("gesture timer", command=event.command, lead_s=at - time.monotonic())
+            threading.Timer(max(at - time.monotonic(), 0), write, args=(plain,)).start()
+            print(f"Sending {event.command} command to Arduino at playback start.")
+        bus.subscribe("gesture", on_gesture)
 
-            buffer = buffer[processed_up_to:]
+        decoder = TelemetryDecoder()
+        def on_reconnect(port):
+            nonlocal decoder
+            decoder = TelemetryDecoder()  # not half a frame from before
+            link.reset()  # the Arduino restarted, and its clock with it
+        ser.callbacks.append(on_reconnect)
+        tracker = make_tracker(bus, store).start()  # expires faces on its own timer
+        try:
+            while True:
+                ping = link.ping_due()
+                if ping is not None:
+                    write(ping)
+                data = ser.read(ser.in_waiting or 1)
+                for fid in speaker_ids(decoder, data, link):
+                    tracker.seen(fid)
+        finally:
+            tracker.stop()
 
 if __name__ == "__main__":
+    if TRACE:
+        pipeline_trace.enable("presence")
+    store = open_store(MEMORY_BACKEND)
+    if RESET_MEMORIES:
+        reset_memories(store)
+    bus = EventBusServer(BUS_PATH)
     try:
-        main()
+        main(bus, store)
     except KeyboardInterrupt:
         print("\nExiting.")
+    finally:
+        bus.close()
+        store.close()
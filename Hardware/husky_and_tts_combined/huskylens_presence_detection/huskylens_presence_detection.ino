@@ -26,6 +26,155 @@ int X_RIGHT_MIN = 150;
 int nVarA = 2;
 int timer = 0;
 
+// --- face telemetry (decoded by husky_telemetry.py) ---
+// One 14-byte frame per face, little-endian:
+// A5 5A | frame u16 | id u8 | x u16 | y u16 | w u16 | h u16 | checksum u8
+// checksum = low byte of the sum of bytes 2..12
+uint16_t frameCounter = 0;
+
+inline void putU16(uint8_t *p, uint16_t v) {
+  p[0] = v & 0xFF; p[1] = v >> 8;
+}
+
+void sendFaceFrame(uint16_t frame, const HUSKYLENSResult &r) {
+  uint8_t buf[14];
+  buf[0] = 0xA5; buf[1] = 0x5A;
+  putU16(buf + 2, frame);
+  buf[4] = r.ID;
+  putU16(buf + 5, r.xCenter);
+  putU16(buf + 7, r.yCenter);
+  putU16(buf + 9, r.width);
+  putU16(buf + 11, r.height);
+  uint8_t sum = 0;
+  for (int i = 2; i < 13; i++) sum += buf[i];
+  buf[13] = sum;
+  Serial.write(buf, sizeof(buf));
+}
+
+// --- gestures (host side: gesture_sync.py) ---
+// Serial commands, one per line:
+//   G <seq> <millis> <name>   start gesture <name> when millis() reaches <millis>
+//   P <token>                 ping, answered with "P <token> <millis>"
+//   WAVE                      start right away
+// Each G gesture is answered with "K <seq> <late_ms>" when it starts.
+// Gestures are servo steps advanced from loop(), so they never block it.
+struct Step { Servo *servo; uint8_t angle; uint16_t holdMs; };
+
+const Step WAVE_STEPS[] = {
+  {&SERVO_RIGHT, 90, 200}, {&SERVO_RIGHT, 45, 200}, {&SERVO_RIGHT, 90, 200}, {&SERVO_RIGHT, 45, 200},
+  {&SERVO_LEFT, 90, 200}, {&SERVO_LEFT, 135, 200}, {&SERVO_LEFT, 90, 200}, {&SERVO_LEFT, 135, 200},
+};
+const Step WAVE_R_STEPS[] = {
+  {&SERVO_RIGHT, 90, 200}, {&SERVO_RIGHT, 45, 200}, {&SERVO_RIGHT, 90, 200}, {&SERVO_RIGHT, 45, 200},
+};
+const Step WAVE_L_STEPS[] = {
+  {&SERVO_LEFT, 135, 200}, {&SERVO_LEFT, 90, 200}, {&SERVO_LEFT, 135, 200}, {&SERVO_LEFT, 90, 200},
+};
+
+struct Gesture { const char *name; const Step *steps; uint8_t count; };
+const Gesture GESTURES[] = {
+  {"WAVE", WAVE_STEPS, sizeof(WAVE_STEPS) / sizeof(Step)},
+  {"WAVE_R", WAVE_R_STEPS, sizeof(WAVE_R_STEPS) / sizeof(Step)},  // right button
+  {"WAVE_L", WAVE_L_STEPS, sizeof(WAVE_L_STEPS) / sizeof(Step)},  // left button
+};
+const int N_GESTURES = sizeof(GESTURES) / sizeof(Gesture);
+const unsigned long DROP_LATE_MS = 1000;  // too late to still match the audio
+
+struct Pending { bool used; uint16_t seq; unsigned long at; uint8_t gesture; };
+const int QUEUE_LEN = 8;
+Pending queue[QUEUE_LEN];
+
+int active = -1;  // running gesture, -1 when idle
+uint8_t activeStep = 0;
+unsigned long stepStarted = 0;
+
+char line[48];
+uint8_t lineLen = 0;
+
+int findGesture(const char *name) {
+  for (int i = 0; i < N_GESTURES; i++) {
+    if (strcmp(name, GESTURES[i].name) == 0) return i;
+  }
+  return -1;
+}
+
+void startGesture(int g) {
+  active = g;
+  activeStep = 0;
+  stepStarted = millis();
+  const Step &s = GESTURES[g].steps[0];
+  s.servo->write(s.angle);
+}
+
+void runGestures() {
+  unsigned long now = millis();
+  for (int i = 0; i < QUEUE_LEN; i++) {
+    if (!queue[i].used || (long)(now - queue[i].at) < 0) continue;
+    unsigned long late = now - queue[i].at;
+    queue[i].used = false;
+    Serial.print("K "); Serial.print(queue[i].seq); Serial.print(' '); Serial.println(late);
+    if (late < DROP_LATE_MS) startGesture(queue[i].gesture);
+  }
+  if (active < 0) return;
+  const Gesture &g = GESTURES[active];
+  if (now - stepStarted < g.steps[activeStep].holdMs) return;
+  if (++activeStep >= g.count) {
+    if (active == 0) Serial.println("Waving completed.");
+    active = -1;
+    return;
+  }
+  stepStarted = now;
+  g.steps[activeStep].servo->write(g.steps[activeStep].angle);
+}
+
+void handleLine(char *cmd) {
+  if (cmd[0] == 'P' && cmd[1] == ' ') {
+    unsigned long now = millis();  // stamp on arrival, the host keeps the fastest round trips
+    Serial.print("P "); Serial.print(cmd + 2); Serial.print(' '); Serial.println(now);
+  } else if (cmd[0] == 'G' && cmd[1] == ' ') {
+    char *end;
+    uint16_t seq = strtoul(cmd + 2, &end, 10);
+    unsigned long at = strtoul(end, &end, 10);
+    while (*end == ' ') end++;
+    int g = findGesture(end);
+    if (g < 0) return;
+    for (int i = 0; i < QUEUE_LEN; i++) {
+      if (!queue[i].used) {
+        queue[i] = {true, seq, at, (uint8_t)g};
+        return;
+      }
+    }
+  } else {
+    int g = findGesture(cmd);
+    if (g >= 0) startGesture(g);
+  }
+}
+
+// Read whatever serial bytes are there, without waiting for a full line
+void serviceSerial() {
+  while (Serial.available() > 0) {
+    char c = Serial.read();
+    if (c == '\n' || c == '\r') {
+      if (lineLen > 0) {
+        line[lineLen] = '\0';
+        handleLine(line);
+        lineLen = 0;
+      }
+    } else if (lineLen < sizeof(line) - 1) {
+      line[lineLen++] = c;
+    }
+  }
+}
+
+// delay() that keeps serial commands and gestures running
+void serviceDelay(unsigned long ms) {
+  unsigned long start = millis();
+  do {
+    serviceSerial();
+    runGestures();
+  } while (millis() - start < ms);
+}
+
 // clamp helper to keep angles in 0..214 before mapping
 inline void clamp214(int &a) {
   if (a < 0) a = 0; if (a > 214) a = 214;
@@ -47,33 +196,13 @@ void setup() {
 }
 
 void loop() {
-  // New: Check for serial commands (e.g., "WAVE")
-  if (Serial.available() > 0) {
-    String command = Serial.readStringUntil('\n');
-    command.trim();
-    if (command == "WAVE") {
-      // Trigger waving sequence for both arms
-      for (int i = 0; i < 2; i++) {  // Wave right arm
-        SERVO_RIGHT.write(90);
-        delay(200);
-        SERVO_RIGHT.write(45);
-        delay(200);
-      }
-      for (int i = 0; i < 2; i++) {  // Wave left arm
-        SERVO_LEFT.write(90);
-        delay(200);
-        SERVO_LEFT.write(135);
-        delay(200);
-      }
-      SERVO_RIGHT.write(45);  // Reset right
-      SERVO_LEFT.write(135);  // Reset left
-      Serial.println("Waving completed.");  // Optional feedback
-    }
-  }
+  // Serial commands (e.g., "WAVE") and queued gestures
+  serviceSerial();
+  runGestures();
 
   // off-frame → no motion
   if (!huskylens.request()) {
-    delay(30);
+    serviceDelay(30);
     return;
   }
 
@@ -81,14 +210,9 @@ void loop() {
     bHold = true;
   }
   if ((digitalRead(BUTTON_RIGHT) == true) && (bHold == true)) {
-    for (int i = 0; i < 2; i++) {  // runs twice (90→45, 90→45)
-      SERVO_RIGHT.write(90);
-      delay(200);
-      SERVO_RIGHT.write(45);
-      delay(200);
-    }
+    startGesture(findGesture("WAVE_R"));  // twice (90→45, 90→45)
     bHold = false;
-  } else {
+  } else if (active < 0) {
     SERVO_RIGHT.write(45);
   }
 
@@ -96,17 +220,13 @@ void loop() {
     bHold = true;
   }
   if ((digitalRead(BUTTON_LEFT) == false) && (bHold == true)) {
-    for (int i = 0; i < 2; i++) {  // runs twice (90→45, 90→45)
-      SERVO_LEFT.write(135);
-      delay(200);
-      SERVO_LEFT.write(90);
-      delay(200);
-    }
+    startGesture(findGesture("WAVE_L"));  // twice (135→90, 135→90)
     bHold = false;
-  } else {
+  } else if (active < 0) {
     SERVO_LEFT.write(135);
   }
 
+  frameCounter++;  // one camera frame per successful request()
   while (huskylens.available()) {
     timer = 0;
     HUSKYLENSResult r = huskylens.read();
@@ -114,7 +234,7 @@ void loop() {
 
     int x = r.xCenter;
     int y = r.yCenter;
-    Serial.print("Face ID: "); Serial.print(r.ID);
+    sendFaceFrame(frameCounter, r);  // id + box, the host picks the closest face as the speaker
     // Serial.print(" X: "); Serial.print(x);
     // Serial.print(" Y: "); Serial.println(y);
     // Serial.print("X: "); Serial.print(x); Serial.print(" Y: "); Serial.println(y);
@@ -127,20 +247,20 @@ void loop() {
       clamp214(angle_2);
       SERVO_2.write(map(angle_2, 0, 214, 0, 180));
       // Serial.println("right (pan)");
-      delay(MOVE_DELAY);
+      serviceDelay(MOVE_DELAY);
       nVarA = 1;
     } else if (x > X_LEFT_MAX && x < X_RIGHT_MIN) {  // MIDDLE COLUMN
       clamp214(angle_2);
       SERVO_2.write(map(angle_2, 0, 214, 0, 180));
       // Serial.println("right (pan)");
-      delay(MOVE_DELAY);
+      serviceDelay(MOVE_DELAY);
       nVarA = 2;
     } else if (x > X_LEFT_MAX) {  // RIGHT SIDE
       angle_2 -= (int)incrementer;
       clamp214(angle_2);
       SERVO_2.write(map(angle_2, 0, 214, 0, 180));
       // Serial.println("right (pan)");
-      delay(MOVE_DELAY);
+      serviceDelay(MOVE_DELAY);
       nVarA = 3;
     }
   }
@@ -151,23 +271,23 @@ void loop() {
       clamp214(angle_2);
       SERVO_2.write(map(angle_2, 0, 214, 0, 180));
       // Serial.println("right (pan)");
-      delay(MOVE_DELAY);
+      serviceDelay(MOVE_DELAY);
     } else if (nVarA == 2) {
       clamp214(angle_2);
       SERVO_2.write(map(angle_2, 0, 214, 0, 180));
       // Serial.println("right (pan)");
-      delay(MOVE_DELAY);
+      serviceDelay(MOVE_DELAY);
     } else {
       angle_2 -= (int)incrementer;
       clamp214(angle_2);
       SERVO_2.write(map(angle_2, 0, 214, 0, 180));
       // Serial.println("right (pan)");
-      delay(MOVE_DELAY);
+      serviceDelay(MOVE_DELAY);
     }
   } else {
     SERVO_2.write(map(107, 0, 214, 0, 180));
     angle_2 = 107;
   }
 
-  delay(30);
+  serviceDelay(30);
 }
\ No newline at end of file
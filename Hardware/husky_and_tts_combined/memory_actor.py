@@ -0,0 +1,264 @@
+"""
+Single writer in front of a memory store.
+
+Every change to memory goes through one queue and one writer thread, which
+applies whatever has queued up as one store.batch() (one commit for the
+SQLite store). The caller's thread never waits for the disk: a change is
+applied to an in-memory copy of the person at once, so reads and return
+values (the new count, the turn's position) come from that copy.
+
+A person's copy holds their details, turn count and last CACHE_TURNS turns;
+reads further back wait for queued writes and go to the store. Other
+processes may still write to the store (the HuskyLens side creating people,
+memory_store.py set filling in a name), so when nothing of ours is queued
+for a person, a read first compares the store's version number with ours
+and reloads on a difference.
+
+A batch that fails (e.g. "database is locked" while the other process
+holds a transaction past the store's timeout) is retried, then applied one
+change at a time. A change that still fails is reported and the person's
+copy is dropped, so reads go back to what the store actually has.
+
+Same interface as memory_store.MemoryStore:
+    memory = MemoryActor(open_store(MEMORY_BACKEND))
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from memory_store import format_turns
+
+CACHE_TURNS = 200  # most recent turns kept in memory per person
+WRITE_ATTEMPTS = 3  # tries of a whole batch before applying its changes one at a time
+RETRY_WAIT = 0.5    # seconds before retrying a failed batch, doubled each time
+
+class MemoryActor:
+    """Serializes a store's writes on one thread and serves reads from memory."""
+
+    def __init__(self, store, cache_turns=CACHE_TURNS, write_attempts=WRITE_ATTEMPTS, retry_wait=RETRY_WAIT):
+        self.store = store
+        self.cache_turns = cache_turns
+        self.write_attempts = write_attempts
+        self.retry_wait = retry_wait
+        self.failed = 0  # changes that never reached the store
+        self.cache = {}  # fid -> {"person", "turns", "recent", "queued"}
+        self.lock = threading.RLock()
+        self.group = None  # ops of the batch() being built
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(target=self._run, daemon=True)
+        self.writer.start()
+
+    # ---------------- WRITER ----------------
+    def _run(self):
+        while True:
+            items = [self.queue.get()]
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            ops = [op for item in items if isinstance(item, list) for op in item]
+            lost = self._write(ops) if ops else set()
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()  # before taking the lock, a flush() may be waiting while holding it
+            with self.lock:
+                for fid, _, _, _ in ops:
+                    entry = self.cache.get(fid)
+                    if entry is not None:
+                        entry["queued"] = max(0, entry["queued"] - 1)  # 0 if reloaded after a loss
+                if None in lost:
+                    self.cache.clear()  # a reset failed
+                for fid in lost:
+                    self.cache.pop(fid, None)  # its copy has changes the store doesn't
+            if None in items:
+                return
+
+    def _write(self, ops):
+        """Apply ops to the store. Returns the face IDs that lost a change (None for a reset)."""
+        wait = self.retry_wait
+        for attempt in range(1, self.write_attempts + 1):
+            try:
+                with self.store.batch():
+                    for fid, name, args, kwargs in ops:
+                        getattr(self.store, name)(*args, **kwargs)
+                return set()
+            except Exception as e:
+                print(f"⚠️ Memory write failed (try {attempt}/{self.write_attempts}):", repr(e))
+            if attempt < self.write_attempts:
+                time.sleep(wait)
+                wait *= 2
+        # The batch rolled back; one at a time, so one bad change doesn't take the rest with it
+        lost = set()
+        for fid, name, args, kwargs in ops:
+            try:
+                getattr(self.store, name)(*args, **kwargs)
+            except Exception as e:
+                print(f"⚠️ Memory change lost ({name}, ID {fid}):", repr(e))
+                lost.add(fid)
+                self.failed += 1
+        return lost
+
+    def _submit(self, name, fid, *args, **kwargs):
+        """Queue store.name(fid, *args, **kwargs). Caller holds the lock and has updated the cache."""
+        op = (fid, name, args if fid is None else (fid, *args), kwargs)
+        if fid in self.cache:
+            self.cache[fid]["queued"] += 1
+        if self.group is not None:
+            self.group.append(op)
+        else:
+            self.queue.put([op])
+
+    @contextmanager
+    def batch(self):
+        """Changes made inside reach the store together. Nests."""
+        with self.lock:
+            outer = self.group is None
+            if outer:
+                self.group = []
+            try:
+                yield self
+            finally:
+                if outer:
+                    group, self.group = self.group, None
+                    if group:
+                        self.queue.put(group)
+
+    def flush(self):
+        """Wait until everything queued so far is in the store."""
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait()
+
+    def close(self):
+        self.queue.put(None)
+        self.writer.join()
+        self.store.close()
+
+    # ---------------- CACHE ----------------
+    def _load(self, fid):
+        person = self.store.person(fid)
+        if person is None:
+            return None
+        return {"person": person, "turns": self.store.turn_count(fid),
+                "recent": deque(self.store.turns(fid, self.cache_turns), maxlen=self.cache_turns), "queued": 0}
+
+    def _entry(self, fid, create=False):
+        """The cached copy of fid, loaded or refreshed from the store if needed."""
+        entry = self.cache.get(fid)
+        if entry is not None and entry["queued"] == 0 and self.store.version(fid) != entry["person"]["version"]:
+            entry = None  # changed by someone else
+        if entry is None:
+            entry = self._load(fid)
+            if entry is None and create:
+                # What the store creates on the first write for fid
+                entry = {"person": {"fid": fid, "count": -1, "version": 0, "name": None, "degree": None},
+                         "turns": 0, "recent": deque(maxlen=self.cache_turns), "queued": 0}
+            if entry is None:
+                self.cache.pop(fid, None)
+            else:
+                self.cache[fid] = entry
+        return entry
+
+    # ---------------- WRITES ----------------
+    def ensure_person(self, fid):
+        """Create an empty person for fid. Returns True if they were new."""
+        with self.lock:
+            if self._entry(fid) is not None:
+                return False
+            self._entry(fid, create=True)
+            self._submit("ensure_person", fid)
+            return True
+
+    def set_metadata(self, fid, **fields):
+        with self.lock:
+            person = self._entry(fid, create=True)["person"]
+            for key, value in fields.items():
+                person[key] = None if value is None else str(value)
+            person["version"] += 1
+            self._submit("set_metadata", fid, **fields)
+
+    def append_turn(self, fid, user_text, winnie_text, ts=None):
+        """Store one exchange. Returns its position in the person's log (0 for the first)."""
+        ts = time.time() if ts is None else ts
+        with self.lock:
+            entry = self._entry(fid, create=True)
+            position = entry["turns"]
+            entry["turns"] += 1
+            entry["recent"].append((ts, user_text, winnie_text))
+            entry["person"]["version"] += 1
+            self._submit("append_turn", fid, user_text, winnie_text, ts)
+            return position
+
+    def increment_count(self, fid):
+        """count += 1. Returns the new count."""
+        with self.lock:
+            person = self._entry(fid, create=True)["person"]
+            person["count"] += 1
+            person["version"] += 1
+            self._submit("increment_count", fid)
+            return person["count"]
+
+    def set_count(self, fid, count):
+        with self.lock:
+            person = self._entry(fid, create=True)["person"]
+            person["count"] = count
+            person["version"] += 1
+            self._submit("set_count", fid, count)
+
+    def reset(self):
+        """Forget everyone. Waits for the store."""
+        with self.lock:
+            self.cache.clear()
+            self._submit("reset", None)
+        self.flush()
+
+    # ---------------- READS ----------------
+    def person(self, fid):
+        with self.lock:
+            entry = self._entry(fid)
+            return None if entry is None else dict(entry["person"])
+
+    def version(self, fid):
+        with self.lock:
+            entry = self._entry(fid)
+            return None if entry is None else entry["person"]["version"]
+
+    def turn_count(self, fid):
+        with self.lock:
+            entry = self._entry(fid)
+            return 0 if entry is None else entry["turns"]
+
+    def turns(self, fid, limit=None, since=None):
+        with self.lock:
+            entry = self._entry(fid)
+            if entry is None:
+                return []
+            recent = entry["recent"]
+            if since is None and (entry["turns"] <= len(recent) or (limit is not None and limit <= len(recent))):
+                rows = list(recent)
+                return rows if limit is None else rows[len(rows) - min(limit, len(rows)):]
+        self.flush()
+        return self.store.turns(fid, limit, since)
+
+    def turns_at(self, fid, positions):
+        positions = list(positions)
+        with self.lock:
+            entry = self._entry(fid)
+            if entry is None:
+                return []
+            first = entry["turns"] - len(entry["recent"])
+            if all(first <= p < entry["turns"] for p in positions):
+                return [entry["recent"][p - first] for p in positions]
+        self.flush()
+        return self.store.turns_at(fid, positions)
+
+    def conversation(self, fid, limit=None):
+        return format_turns(self.turns(fid, limit))
+
+    def people(self):
+        self.flush()
+        return self.store.people()
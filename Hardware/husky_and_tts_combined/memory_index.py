@@ -0,0 +1,141 @@
+"""
+Recall of a person's older turns that are relevant to what they just said.
+
+Every stored turn gets a hashed TF-IDF vector: its words are hashed into
+DIM buckets (crc32, so the same across runs), weighted 1 + log(tf) and
+normalized. One person's vectors are the rows of a float16 file that is
+memory-mapped for searching; row i is turn i of their memory store (the
+position append_turn() returns). A new turn is one appended row plus an
+update of the person's document frequencies, nothing is rebuilt.
+
+A search scores every row against the transcript in one NumPy pass: only
+the buckets the transcript hits are read, weighted by idf^2 (the query's
+and the rows' idf; row norms are kept from when they were written).
+
+Files, per person, in the index folder:
+    ID_<n>.f16   DIM float16 values per turn
+    ID_<n>.df    DIM int32 document frequencies
+"""
+
+import re
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+MEMORY_INDEX_DIR = Path("memories_index")
+DIM = 512  # hash buckets; 1 KB per turn
+
+WORD_RE = re.compile(r"[a-z0-9']+")
+STOPWORDS = frozenset("""
+a an and are as at be but by do for from had has have he her his i if in is it its me my no not of on or our
+she so that the their them there they this to was we were what when which who will with you your oh
+""".split())
+
+def embed(texts, dim=DIM):
+    """Hashed, log-scaled, L2-normalized term vectors for texts, as a float32 (len(texts), dim) array."""
+    out = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in WORD_RE.findall(text.lower()):
+            if word not in STOPWORDS:
+                out[row, zlib.crc32(word.encode("utf-8")) % dim] += 1
+    hit = out > 0
+    out[hit] = 1 + np.log(out[hit])
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    np.divide(out, norms, out=out, where=norms > 0)
+    return out
+
+class MemoryIndex:
+    """Per-person turn vectors, kept in step with the memory store."""
+
+    def __init__(self, folder=MEMORY_INDEX_DIR, dim=DIM):
+        self.folder = Path(folder)
+        self.dim = dim
+        self.lock = threading.Lock()
+        self.df = {}    # fid -> document frequencies
+        self.maps = {}  # fid -> memmap of their rows, until the file grows
+
+    def _paths(self, fid):
+        return self.folder / f"ID_{fid}.f16", self.folder / f"ID_{fid}.df"
+
+    def _df(self, fid):
+        if fid not in self.df:
+            path = self._paths(fid)[1]
+            self.df[fid] = np.fromfile(path, dtype=np.int32) if path.exists() else np.zeros(self.dim, np.int32)
+        return self.df[fid]
+
+    def rows(self, fid):
+        path = self._paths(fid)[0]
+        return path.stat().st_size // (2 * self.dim) if path.exists() else 0
+
+    def _matrix(self, fid):
+        rows = self.rows(fid)
+        cached = self.maps.get(fid)
+        if cached is None or len(cached) != rows:
+            cached = np.memmap(self._paths(fid)[0], dtype=np.float16, mode="r", shape=(rows, self.dim)) if rows else None
+            self.maps[fid] = cached
+        return cached
+
+    # ---------------- WRITES ----------------
+    def add(self, fid, texts):
+        """Append one row per text (turns in the order they were stored)."""
+        if not texts:
+            return
+        vectors = embed(texts, self.dim)
+        with self.lock:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            rows_path, df_path = self._paths(fid)
+            if not rows_path.exists():
+                self.df.pop(fid, None)  # reset by another process since we read it
+            with open(rows_path, "ab") as f:
+                f.write(vectors.astype(np.float16).tobytes())
+            df = self._df(fid)
+            df += np.count_nonzero(vectors, axis=0).astype(np.int32)
+            df.tofile(df_path)
+
+    def sync(self, fid, store):
+        """Index turns the store has and the index does not (e.g. imported ones). Returns how many."""
+        count = store.turn_count(fid)
+        missing = count - self.rows(fid)
+        if missing < 0:
+            self._drop(fid)  # the store was reset under us
+            missing = count
+        if missing <= 0:
+            return 0
+        self.add(fid, [f"{user}\n{winnie}" for _, user, winnie in store.turns(fid, missing)])
+        return missing
+
+    def _drop(self, fid):
+        with self.lock:
+            self.df.pop(fid, None)
+            self.maps.pop(fid, None)
+            for path in self._paths(fid):
+                path.unlink(missing_ok=True)
+
+    def reset(self):
+        with self.lock:
+            self.df.clear()
+            self.maps.clear()
+            for path in list(self.folder.glob("ID_*.f16")) + list(self.folder.glob("ID_*.df")):
+                path.unlink()
+
+    # ---------------- SEARCH ----------------
+    def search(self, fid, text, k=5, before=None):
+        """[(row, score)] of the k rows most like text, best first, among rows < before."""
+        with self.lock:
+            matrix = self._matrix(fid)
+            df = self._df(fid).copy()
+        if matrix is None:
+            return []
+        n = len(matrix) if before is None else max(min(before, len(matrix)), 0)
+        query = embed([text], self.dim)[0]
+        cols = np.flatnonzero(query)
+        if n == 0 or cols.size == 0:
+            return []
+        idf = np.log((len(matrix) + 1) / (df[cols] + 1)) + 1
+        scores = matrix[:n, cols].astype(np.float32) @ (query[cols] * idf * idf)
+        k = min(k, n)
+        top = np.argpartition(scores, n - k)[n - k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(int(row), float(scores[row])) for row in top if scores[row] > 0]
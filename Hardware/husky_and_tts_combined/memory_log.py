@@ -0,0 +1,265 @@
+"""
+Per-person memory as append-only log files, the other MemoryStore backend.
+
+Each person has two files in the memories folder:
+
+    ID_<n>.log   a fixed-size header, then one record per turn
+    ID_<n>.idx   one 16-byte entry per turn: record offset, timestamp
+
+The header holds the count, a version number and the metadata (name,
+degree, ...) as JSON, and is updated in place with os.pwrite. Turns are
+only ever appended. "Last N turns" reads N index entries from the end of
+the .idx file and then only those records; "turns since T" bisects the
+index by timestamp. Neither depends on how long the log has grown.
+
+A turn is written to the log before its index entry, so a crash in between
+leaves an unindexed record at the end; the next write indexes it (or cuts
+it off if it is incomplete). Writers take an flock on the .log file, so
+the HuskyLens and conversation processes can share the folder.
+
+Same interface as memory_store.MemoryStore; pick one with open_store().
+"""
+
+import fcntl
+import json
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from memory_store import format_turns
+
+MEMORY_LOG_DIR = Path("memories")
+
+MAGIC = b"WLOG"
+FORMAT = 1
+HEADER = struct.Struct("<4sHiQI")  # magic, format, count, version, metadata length
+HEADER_SIZE = 1024                 # metadata JSON has to fit after the fixed part
+RECORD = struct.Struct("<dII")     # ts, user text bytes, winnie text bytes
+INDEX = struct.Struct("<Qd")       # record offset, ts
+
+class LogStore:
+    """Log-file memory store, safe to share between threads and processes."""
+
+    def __init__(self, folder=MEMORY_LOG_DIR):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+
+    # ---------------- FILES ----------------
+    def _paths(self, fid):
+        return self.folder / f"ID_{fid}.log", self.folder / f"ID_{fid}.idx"
+
+    @contextmanager
+    def _open(self, fid, write=False):
+        """(log fd, index fd) for fid under a shared or exclusive lock.
+
+        Writing creates the person; reading someone who does not exist yields (None, None).
+        """
+        log_path, idx_path = self._paths(fid)
+        flags = os.O_RDWR | os.O_CREAT if write else os.O_RDONLY
+        try:
+            log = os.open(log_path, flags, 0o644)
+        except FileNotFoundError:
+            yield None, None
+            return
+        idx = None
+        try:
+            fcntl.flock(log, fcntl.LOCK_EX if write else fcntl.LOCK_SH)
+            if not write and os.fstat(log).st_size < HEADER_SIZE:
+                yield None, None  # created, but its header is not written yet
+                return
+            try:
+                idx = os.open(idx_path, flags, 0o644)
+            except FileNotFoundError:
+                pass  # a reader that got in between the writer's two opens
+            if write:
+                if os.fstat(log).st_size < HEADER_SIZE:
+                    os.pwrite(log, HEADER.pack(MAGIC, FORMAT, -1, 0, 2) + b"{}".ljust(HEADER_SIZE - HEADER.size, b"\0"), 0)
+                self._recover(log, idx)
+            yield log, idx
+        finally:
+            if idx is not None:
+                os.close(idx)
+            os.close(log)  # releases the flock
+
+    def _recover(self, log, idx):
+        """Index records a crash left unindexed and cut off a partial last one."""
+        idx_size = os.fstat(idx).st_size
+        if idx_size % INDEX.size:
+            idx_size -= idx_size % INDEX.size
+            os.ftruncate(idx, idx_size)
+        end = HEADER_SIZE
+        if idx_size:
+            offset, _ = INDEX.unpack(os.pread(idx, INDEX.size, idx_size - INDEX.size))
+            _, user_len, winnie_len = RECORD.unpack(os.pread(log, RECORD.size, offset))
+            end = offset + RECORD.size + user_len + winnie_len
+        log_size = os.fstat(log).st_size
+        while end < log_size:
+            head = os.pread(log, RECORD.size, end)
+            if len(head) < RECORD.size:
+                break
+            ts, user_len, winnie_len = RECORD.unpack(head)
+            if end + RECORD.size + user_len + winnie_len > log_size:
+                break
+            os.pwrite(idx, INDEX.pack(end, ts), idx_size)
+            idx_size += INDEX.size
+            end += RECORD.size + user_len + winnie_len
+        if end < log_size:
+            os.ftruncate(log, end)
+
+    def _header(self, log):
+        """(count, version, metadata) from the top of the log."""
+        raw = os.pread(log, HEADER_SIZE, 0)
+        magic, fmt, count, version, meta_len = HEADER.unpack_from(raw)
+        if magic != MAGIC or fmt != FORMAT:
+            raise ValueError(f"not a memory log (format {fmt})")
+        return count, version, json.loads(raw[HEADER.size:HEADER.size + meta_len])
+
+    def _write_header(self, log, count, version, meta=None):
+        """Update the header in place; only the fixed part if meta is None."""
+        if meta is None:
+            old = HEADER.unpack(os.pread(log, HEADER.size, 0))
+            os.pwrite(log, HEADER.pack(MAGIC, FORMAT, count, version, old[4]), 0)
+            return
+        data = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        if HEADER.size + len(data) > HEADER_SIZE:
+            raise ValueError(f"metadata too long for the {HEADER_SIZE}-byte header")
+        os.pwrite(log, HEADER.pack(MAGIC, FORMAT, count, version, len(data)) + data, 0)
+
+    # ---------------- TRANSACTIONS ----------------
+    @contextmanager
+    def batch(self):
+        """Hold off other threads' writes. Each write still lands on its own."""
+        with self.lock:
+            yield self
+
+    # ---------------- WRITES ----------------
+    def ensure_person(self, fid):
+        """Create an empty person for fid. Returns True if they were new."""
+        if self._paths(fid)[0].exists():
+            return False
+        with self.lock, self._open(fid, write=True):
+            return True
+
+    def set_metadata(self, fid, **fields):
+        """Set name=..., degree=... or any other field; None removes it."""
+        with self.lock, self._open(fid, write=True) as (log, _):
+            count, version, meta = self._header(log)
+            for key, value in fields.items():
+                if value is None:
+                    meta.pop(key, None)
+                else:
+                    meta[key] = str(value)
+            self._write_header(log, count, version + 1, meta)
+
+    def append_turn(self, fid, user_text, winnie_text, ts=None):
+        """Store one exchange. Returns its position in the person's log (0 for the first)."""
+        user, winnie = user_text.encode("utf-8"), winnie_text.encode("utf-8")
+        ts = time.time() if ts is None else ts
+        with self.lock, self._open(fid, write=True) as (log, idx):
+            end = os.fstat(log).st_size
+            os.pwrite(log, RECORD.pack(ts, len(user), len(winnie)) + user + winnie, end)
+            position = os.fstat(idx).st_size // INDEX.size
+            os.pwrite(idx, INDEX.pack(end, ts), position * INDEX.size)
+            count, version, _ = self._header(log)
+            self._write_header(log, count, version + 1)
+            return position
+
+    def increment_count(self, fid):
+        """count += 1 in place. Returns the new count."""
+        with self.lock, self._open(fid, write=True) as (log, _):
+            count, version, _ = self._header(log)
+            self._write_header(log, count + 1, version + 1)
+            return count + 1
+
+    def set_count(self, fid, count):
+        with self.lock, self._open(fid, write=True) as (log, _):
+            _, version, _ = self._header(log)
+            self._write_header(log, count, version + 1)
+
+    def reset(self):
+        """Forget everyone."""
+        with self.lock:
+            for path in list(self.folder.glob("ID_*.log")) + list(self.folder.glob("ID_*.idx")):
+                path.unlink()
+
+    # ---------------- READS ----------------
+    def person(self, fid):
+        """{"fid", "count", "version", "name", "degree", ...} or None."""
+        with self._open(fid) as (log, _):
+            if log is None:
+                return None
+            count, version, meta = self._header(log)
+        person = {"fid": fid, "count": count, "version": version, "name": None, "degree": None}
+        person.update(meta)
+        return person
+
+    def version(self, fid):
+        with self._open(fid) as (log, _):
+            return None if log is None else HEADER.unpack(os.pread(log, HEADER.size, 0))[3]
+
+    def turns(self, fid, limit=None, since=None):
+        """[(ts, user_text, winnie_text)], oldest first: all, the last `limit`, or those after `since`."""
+        with self._open(fid) as (log, idx):
+            if idx is None:
+                return []
+            n = os.fstat(idx).st_size // INDEX.size
+            start = 0
+            if since is not None:
+                lo, hi = 0, n  # first entry with ts > since
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if INDEX.unpack(os.pread(idx, INDEX.size, mid * INDEX.size))[1] > since:
+                        hi = mid
+                    else:
+                        lo = mid + 1
+                start = lo
+            if limit is not None:
+                start = max(start, n - limit)
+            if start >= n:
+                return []
+            first, _ = INDEX.unpack(os.pread(idx, INDEX.size, start * INDEX.size))
+            last, _ = INDEX.unpack(os.pread(idx, INDEX.size, (n - 1) * INDEX.size))
+            _, user_len, winnie_len = RECORD.unpack(os.pread(log, RECORD.size, last))
+            data = os.pread(log, last + RECORD.size + user_len + winnie_len - first, first)
+        rows, pos = [], 0
+        for _ in range(n - start):
+            ts, user_len, winnie_len = RECORD.unpack_from(data, pos)
+            pos += RECORD.size
+            rows.append((ts, data[pos:pos + user_len].decode("utf-8"),
+                         data[pos + user_len:pos + user_len + winnie_len].decode("utf-8")))
+            pos += user_len + winnie_len
+        return rows
+
+    def turns_at(self, fid, positions):
+        """[(ts, user_text, winnie_text)] for the given positions, in that order."""
+        rows = []
+        with self._open(fid) as (log, idx):
+            if idx is None:
+                return rows
+            n = os.fstat(idx).st_size // INDEX.size
+            for position in positions:
+                if not 0 <= position < n:
+                    continue
+                offset, _ = INDEX.unpack(os.pread(idx, INDEX.size, position * INDEX.size))
+                ts, user_len, winnie_len = RECORD.unpack(os.pread(log, RECORD.size, offset))
+                data = os.pread(log, user_len + winnie_len, offset + RECORD.size)
+                rows.append((ts, data[:user_len].decode("utf-8"), data[user_len:].decode("utf-8")))
+        return rows
+
+    def turn_count(self, fid):
+        with self._open(fid) as (_, idx):
+            return 0 if idx is None else os.fstat(idx).st_size // INDEX.size
+
+    def conversation(self, fid, limit=None):
+        """The conversation log as prompt text."""
+        return format_turns(self.turns(fid, limit))
+
+    def people(self):
+        return sorted(int(path.stem[3:]) for path in self.folder.glob("ID_*.log"))
+
+    def close(self):
+        pass
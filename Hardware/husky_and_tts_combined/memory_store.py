@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Per-person memory (name, degree, turn count, conversation log) in SQLite.
+
+Replaces the memories/ID_<n>.txt files, which were re-read and rewritten in
+full for every turn. Here a turn is one INSERT plus one UPDATE of the count,
+lookups go through the primary keys and the (person, turn) index, and WAL
+mode lets the HuskyLens and conversation processes read while the other
+writes. Writes inside `with store.batch():` share one commit.
+
+Tables:
+    person    id (the HuskyLens face ID), count, version, created
+    metadata  (person, key) -> value: name, degree and anything else
+    turn      one row per exchange: person, seq (0, 1, 2... per person), ts,
+              user_text, winnie_text
+
+version goes up on every change to a person, so a cached copy can be
+checked with one indexed lookup.
+
+memory_log.LogStore has the same interface on append-only log files;
+open_store() picks one of the two by name.
+
+Usage:
+    python3 memory_store.py import memories/ [more folders]   # one-shot, from ID_<n>.txt files
+    python3 memory_store.py --backend log import memories/
+    python3 memory_store.py set 3 --name Brian --degree "Mechanical Engineering"
+    python3 memory_store.py show [3]
+"""
+
+import argparse
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+MEMORY_DB = Path("memories.db")
+LOG_HEADER = "--- Conversation Log ---"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS person (
+    id INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT -1,
+    version INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    person_id INTEGER NOT NULL REFERENCES person(id),
+    key TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (person_id, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS turn (
+    id INTEGER PRIMARY KEY,
+    person_id INTEGER NOT NULL REFERENCES person(id),
+    seq INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    user_text TEXT NOT NULL,
+    winnie_text TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS turn_person ON turn(person_id, seq);
+"""
+
+def format_turns(turns):
+    """Turns as the conversation log text the prompt has always used."""
+    if not turns:
+        return ""
+    return LOG_HEADER + "\n" + "".join(f"User: {u}\nWinnie: {w}\n" for _, u, w in turns)
+
+class MemoryStore:
+    """SQLite memory store, safe to share between threads."""
+
+    def __init__(self, path=MEMORY_DB):
+        self.path = Path(path)
+        # Autocommit mode; transactions are opened explicitly in batch()
+        self.db = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints, no fsync per commit
+        self.db.executescript(SCHEMA)
+        self.lock = threading.RLock()
+        self.depth = 0
+
+    # ---------------- TRANSACTIONS ----------------
+    @contextmanager
+    def batch(self):
+        """Group writes into one transaction (and one commit). Nests."""
+        with self.lock:
+            if self.depth == 0:
+                self.db.execute("BEGIN IMMEDIATE")
+            self.depth += 1
+            try:
+                yield self
+            except BaseException:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.db.execute("ROLLBACK")
+                raise
+            self.depth -= 1
+            if self.depth == 0:
+                self.db.execute("COMMIT")
+
+    def _touch(self, fid, now=None):
+        """Create the person if needed and bump their version. Caller is in a batch."""
+        self.db.execute("INSERT OR IGNORE INTO person (id, created) VALUES (?, ?)",
+                        (fid, time.time() if now is None else now))
+        self.db.execute("UPDATE person SET version = version + 1 WHERE id = ?", (fid,))
+
+    # ---------------- WRITES ----------------
+    def ensure_person(self, fid):
+        """Create an empty person for fid. Returns True if they were new."""
+        with self.batch():
+            cur = self.db.execute("INSERT OR IGNORE INTO person (id, created) VALUES (?, ?)", (fid, time.time()))
+            return cur.rowcount > 0
+
+    def set_metadata(self, fid, **fields):
+        """Set name=..., degree=... or any other field; None removes it."""
+        with self.batch():
+            self._touch(fid)
+            for key, value in fields.items():
+                if value is None:
+                    self.db.execute("DELETE FROM metadata WHERE person_id = ? AND key = ?", (fid, key))
+                else:
+                    self.db.execute("INSERT OR REPLACE INTO metadata (person_id, key, value) VALUES (?, ?, ?)",
+                                    (fid, key, str(value)))
+
+    def append_turn(self, fid, user_text, winnie_text, ts=None):
+        """Store one exchange. Returns its position in the person's log (0 for the first)."""
+        with self.batch():
+            self._touch(fid)
+            seq = self.turn_count(fid)
+            self.db.execute("INSERT INTO turn (person_id, seq, ts, user_text, winnie_text) VALUES (?, ?, ?, ?, ?)",
+                            (fid, seq, time.time() if ts is None else ts, user_text, winnie_text))
+            return seq
+
+    def increment_count(self, fid):
+        """count += 1 in place. Returns the new count."""
+        with self.batch():
+            self._touch(fid)
+            self.db.execute("UPDATE person SET count = count + 1 WHERE id = ?", (fid,))
+            return self.db.execute("SELECT count FROM person WHERE id = ?", (fid,)).fetchone()[0]
+
+    def set_count(self, fid, count):
+        with self.batch():
+            self._touch(fid)
+            self.db.execute("UPDATE person SET count = ? WHERE id = ?", (count, fid))
+
+    def reset(self):
+        """Forget everyone (what deleting the memories/ folder used to do)."""
+        with self.batch():
+            self.db.execute("DELETE FROM turn")
+            self.db.execute("DELETE FROM metadata")
+            self.db.execute("DELETE FROM person")
+
+    # ---------------- READS ----------------
+    def person(self, fid):
+        """{"fid", "count", "version", "name", "degree", ...} or None."""
+        with self.lock:
+            row = self.db.execute("SELECT count, version FROM person WHERE id = ?", (fid,)).fetchone()
+            if row is None:
+                return None
+            meta = self.db.execute("SELECT key, value FROM metadata WHERE person_id = ?", (fid,)).fetchall()
+        person = {"fid": fid, "count": row[0], "version": row[1], "name": None, "degree": None}
+        person.update(meta)
+        return person
+
+    def version(self, fid):
+        with self.lock:
+            row = self.db.execute("SELECT version FROM person WHERE id = ?", (fid,)).fetchone()
+        return row[0] if row else None
+
+    def turns(self, fid, limit=None, since=None):
+        """[(ts, user_text, winnie_text)], oldest first: all, the last `limit`, or those after `since`."""
+        query = "SELECT ts, user_text, winnie_text FROM turn WHERE person_id = ?"
+        args = [fid]
+        if since is not None:
+            query += " AND ts > ?"
+            args.append(since)
+        if limit is None:
+            with self.lock:
+                return self.db.execute(query + " ORDER BY seq", args).fetchall()
+        with self.lock:
+            rows = self.db.execute(query + " ORDER BY seq DESC LIMIT ?", args + [limit]).fetchall()
+        rows.reverse()
+        return rows
+
+    def turns_at(self, fid, positions):
+        """[(ts, user_text, winnie_text)] for the given positions, in that order."""
+        positions = list(positions)
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT seq, ts, user_text, winnie_text FROM turn WHERE person_id = ? "
+                f"AND seq IN ({','.join('?' * len(positions))})", [fid, *positions]).fetchall()
+        found = {row[0]: row[1:] for row in rows}
+        return [found[p] for p in positions if p in found]
+
+    def turn_count(self, fid):
+        with self.lock:
+            return self.db.execute("SELECT COALESCE(MAX(seq) + 1, 0) FROM turn WHERE person_id = ?",
+                                   (fid,)).fetchone()[0]
+
+    def conversation(self, fid, limit=None):
+        """The conversation log as prompt text."""
+        return format_turns(self.turns(fid, limit))
+
+    def people(self):
+        with self.lock:
+            return [row[0] for row in self.db.execute("SELECT id FROM person ORDER BY id")]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+def open_store(backend="sqlite", path=None):
+    """A memory store: "sqlite" (memories.db) or "log" (memories/ID_<n>.log files)."""
+    if backend == "sqlite":
+        return MemoryStore(path or MEMORY_DB)
+    if backend == "log":
+        from memory_log import LogStore, MEMORY_LOG_DIR
+        return LogStore(path or MEMORY_LOG_DIR)
+    raise ValueError(f"unknown memory backend {backend!r}")
+
+# ---------------- IMPORT ----------------
+ID_FILE_RE = re.compile(r"ID_(\d+)\.txt$")
+
+def parse_memory_file(text):
+    """(metadata dict, [(user, winnie)]) from any ID_<n>.txt layout so far.
+
+    Handles "count = n" (this folder), "initialisation: true" (william's
+    variant) and files that are only User:/Winnie: lines. A line that starts
+    with neither continues the previous message.
+    """
+    meta, turns = {}, []
+    user, last = None, None
+    for line in text.splitlines():
+        low = line.lower()
+        if last is None and user is None and (low.startswith(("name:", "degree:", "initialisation:"))):
+            key, value = line.split(":", 1)
+            meta[key.strip().lower()] = value.strip()
+        elif last is None and user is None and low.startswith("count"):
+            try:
+                meta["count"] = int(line.split("=", 1)[1].strip())
+            except (IndexError, ValueError):
+                pass
+        elif line.strip() == LOG_HEADER or not line.strip():
+            continue
+        elif line.startswith("User:"):
+            user, last = line[5:].strip(), "user"
+        elif line.startswith("Winnie:"):
+            turns.append([user or "", line[7:].strip()])
+            user, last = None, "winnie"
+        elif last == "user":
+            user += "\n" + line
+        elif last == "winnie":
+            turns[-1][1] += "\n" + line
+    return meta, [tuple(t) for t in turns]
+
+def import_folder(store, folder):
+    """Load every ID_<n>.txt in folder. Returns (people, turns) imported."""
+    people = turns = 0
+    with store.batch():
+        for path in sorted(Path(folder).glob("ID_*.txt")):
+            m = ID_FILE_RE.search(path.name)
+            if m is None:
+                continue
+            fid = int(m.group(1))
+            meta, exchanges = parse_memory_file(path.read_text(encoding="utf-8"))
+            mtime = path.stat().st_mtime
+            store.set_metadata(fid, **{k: (v or None) for k, v in meta.items() if k != "count"})
+            for user_text, winnie_text in exchanges:
+                store.append_turn(fid, user_text, winnie_text, ts=mtime)
+            if "count" in meta:
+                store.set_count(fid, meta["count"])
+            people += 1
+            turns += len(exchanges)
+    return people, turns
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Winnie's memory of the people she has met.")
+    parser.add_argument("--backend", choices=("sqlite", "log"), default="sqlite")
+    parser.add_argument("--db", type=Path, help="database file or log folder (default: memories.db / memories/)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_import = sub.add_parser("import", help="load memories/ folders of ID_<n>.txt files")
+    p_import.add_argument("folders", nargs="+", type=Path)
+    p_set = sub.add_parser("set", help="fill in someone's details")
+    p_set.add_argument("fid", type=int)
+    p_set.add_argument("--name")
+    p_set.add_argument("--degree")
+    p_show = sub.add_parser("show", help="list everyone, or one person's details and log")
+    p_show.add_argument("fid", type=int, nargs="?")
+    args = parser.parse_args()
+
+    store = open_store(args.backend, args.db)
+    if args.cmd == "import":
+        for folder in args.folders:
+            people, turns = import_folder(store, folder)
+            print(f"{folder}: {people} people, {turns} turns")
+    elif args.cmd == "set":
+        store.set_metadata(args.fid, **{k: v for k, v in (("name", args.name), ("degree", args.degree)) if v is not None})
+        print(store.person(args.fid))
+    elif args.fid is None:
+        for fid in store.people():
+            p = store.person(fid)
+            print(f"ID {fid}: {p['name'] or '-'} ({p['degree'] or '-'}), count {p['count']}")
+    else:
+        print(store.person(args.fid))
+        print(store.conversation(args.fid), end="")
+    store.close()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Per-stage tracing for the robot pipeline, viewable in Perfetto.
+
+The ledger (stt_api_tts/turn_ledger.py) gives one number per stage per
+turn; a trace shows where inside a turn the time went, across threads and
+both processes: the serial port opening, the first mic byte, the end of
+the utterance, the STT request, the ChatGPT first token and completion,
+the first TTS chunk, the first speaker byte and the end of playback, and
+on the HuskyLens side presence changes and gesture commands.
+
+Recording is cheap enough to leave on. Each event is one tuple written
+into a fixed-size ring (the oldest events are overwritten) with no lock:
+the slot comes from itertools.count, which the GIL keeps atomic. Times are
+time.monotonic_ns(), which is shared by all processes on the machine, so
+traces from the two processes line up when merged.
+
+At exit each process writes traces/<process>-<pid>.json in Chrome trace
+format. Open one in https://ui.perfetto.dev (or chrome://tracing), or
+merge both processes into a single file first:
+
+    python3 pipeline_trace.py                      # traces/*.json -> traces/merged.json
+    python3 pipeline_trace.py a.json b.json -o turn.json
+
+Usage in code:
+    pipeline_trace.enable("conversation")
+    with trace.span("stt request"):
+        ...
+    trace.instant("first mic byte")
+    trace.complete("utterance", start_ns, end_ns, bytes=n)   # a span timed elsewhere
+"""
+
+import argparse
+import atexit
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+TRACE_DIR = Path(__file__).resolve().parent / "traces"
+CAPACITY = 1 << 16  # events kept per process
+
+now = time.monotonic_ns
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer, self.name, self.args = tracer, name, args
+
+    def __enter__(self):
+        self.start = now()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.complete(self.name, self.start, now(), **self.args)
+        return False
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class Tracer:
+    """Ring buffer of trace events for one process."""
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.enabled = False
+        self.process_name = None
+        self.clear()
+
+    def clear(self):
+        self.events = [None] * self.capacity
+        self.slots = itertools.count()
+        self.threads = {}  # native thread id -> name, as first seen
+
+    def _add(self, kind, name, ts, dur, args):
+        tid = threading.get_native_id()
+        if tid not in self.threads:
+            self.threads[tid] = threading.current_thread().name
+        self.events[next(self.slots) % self.capacity] = (kind, name, ts, dur, tid, args)
+
+    def span(self, name, **args):
+        """Context manager timing its block as one span."""
+        return _Span(self, name, args) if self.enabled else _NULL_SPAN
+
+    def complete(self, name, start_ns, end_ns, **args):
+        """A span whose ends were timed elsewhere (e.g. in two different callbacks)."""
+        if self.enabled:
+            self._add("X", name, start_ns, end_ns - start_ns, args)
+
+    def instant(self, name, **args):
+        if self.enabled:
+            self._add("i", name, now(), 0, args)
+
+    def chrome_events(self):
+        """The recorded events, oldest first, as Chrome trace event dicts."""
+        pid = os.getpid()
+        events = [{"ph": "M", "name": "process_name", "pid": pid, "tid": 0,
+                   "args": {"name": self.process_name or f"pid {pid}"}}]
+        events += [{"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": name}}
+                   for tid, name in list(self.threads.items())]
+        recorded = sorted((e for e in list(self.events) if e is not None), key=lambda e: e[2])
+        for kind, name, ts, dur, tid, args in recorded:
+            event = {"ph": kind, "name": name, "ts": ts / 1000, "pid": pid, "tid": tid}
+            if kind == "X":
+                event["dur"] = dur / 1000
+            else:
+                event["s"] = "t"  # instant on its thread's track
+            if args:
+                event["args"] = args
+            events.append(event)
+        return events
+
+    def export(self, path=None):
+        """Write the ring as a Chrome trace JSON file. Returns its path."""
+        path = Path(path) if path else TRACE_DIR / f"{self.process_name or 'trace'}-{os.getpid()}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.chrome_events(), "displayTimeUnit": "ms"}, f,
+                      separators=(",", ":"), default=str)
+        os.replace(tmp, path)
+        return path
+
+# The process's tracer; modules import it as `from pipeline_trace import trace`
+trace = Tracer()
+
+def enable(process_name, export_at_exit=True):
+    """Start recording in this process, written to TRACE_DIR when it exits."""
+    trace.process_name = process_name
+    if not trace.enabled and export_at_exit:
+        atexit.register(_export_at_exit)
+    trace.enabled = True
+
+def _export_at_exit():
+    try:
+        print(f"Trace written to {trace.export()}")
+    except OSError as e:
+        print("⚠️ Could not write trace:", e)
+
+def merge(paths, out_path):
+    """Several processes' trace files -> one, for a single Perfetto view."""
+    events = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            events += json.load(f)["traceEvents"]
+    out_path = Path(out_path)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, separators=(",", ":"))
+    return len(events)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge per-process traces into one Chrome trace file.")
+    parser.add_argument("paths", nargs="*", type=Path, help=f"trace files (default: {TRACE_DIR}/*.json)")
+    parser.add_argument("-o", "--out", type=Path, default=TRACE_DIR / "merged.json")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(p for p in TRACE_DIR.glob("*.json") if p.resolve() != args.out.resolve())
+    if not paths:
+        print(f"No traces in {TRACE_DIR}")
+        sys.exit(1)
+    n = merge(paths, args.out)
+    print(f"{n} events from {len(paths)} file(s) -> {args.out} (open in https://ui.perfetto.dev)")
@@ -0,0 +1,131 @@
+"""
+Who is in front of the camera, from a stream of Face ID sightings.
+
+A face only counts as present after ENTER_HITS sightings within ENTER_WINDOW
+seconds, so a single misread frame does not switch the speaker. It stays
+present until it has not been seen for LEAVE_AFTER seconds. Expiry runs on
+its own timer thread, so it happens on time even when no lines arrive.
+
+Callbacks only fire on a change:
+    on_enter(fid)        a face became present
+    on_leave(fid)        a face left
+    on_change(fid)       the current face changed (0 when nobody is present)
+The current face stays current until it leaves, so two people in view do not
+flip it back and forth every frame; then the most recently seen face takes over.
+"""
+
+import threading
+import time
+
+ENTER_HITS = 2
+ENTER_WINDOW = 0.5
+LEAVE_AFTER = 3.0
+
+class PresenceTracker:
+    def __init__(self, on_change=None, on_enter=None, on_leave=None,
+                 enter_hits=ENTER_HITS, enter_window=ENTER_WINDOW, leave_after=LEAVE_AFTER,
+                 clock=time.monotonic):
+        self.on_change = on_change
+        self.on_enter = on_enter
+        self.on_leave = on_leave
+        self.enter_hits = enter_hits
+        self.enter_window = enter_window
+        self.leave_after = leave_after
+        self.clock = clock
+
+        self.last_seen = {}   # fid -> last sighting
+        self.candidates = {}  # fid -> (first sighting, hits) while not yet present
+        self.present = set()
+        self.current = 0
+        self.cond = threading.Condition()
+        self.thread = None
+        self.running = False
+
+    # ---------------- INPUT ----------------
+    def seen(self, fid, now=None):
+        """Record one sighting of fid."""
+        now = self.clock() if now is None else now
+        events = []
+        with self.cond:
+            self.last_seen[fid] = now
+            if fid not in self.present:
+                first, hits = self.candidates.get(fid, (now, 0))
+                if now - first > self.enter_window:
+                    first, hits = now, 0
+                hits += 1
+                if hits >= self.enter_hits:
+                    self.candidates.pop(fid, None)
+                    self.present.add(fid)
+                    events.append((self.on_enter, fid))
+                    self.cond.notify()  # a new expiry deadline for the timer
+                else:
+                    self.candidates[fid] = (first, hits)
+            events += self._update_current()
+        self._fire(events)
+
+    def expire(self, now=None):
+        """Drop faces not seen for leave_after. Called by the timer thread."""
+        now = self.clock() if now is None else now
+        events = []
+        with self.cond:
+            gone = [fid for fid in self.present if now - self.last_seen[fid] > self.leave_after]
+            for fid in gone:
+                self.present.discard(fid)
+                events.append((self.on_leave, fid))
+            stale = [fid for fid, (first, _) in self.candidates.items() if now - first > self.enter_window]
+            for fid in stale:
+                del self.candidates[fid]
+            events += self._update_current()
+        self._fire(events)
+
+    def _update_current(self):
+        """Caller holds the lock."""
+        current = self.current
+        if current not in self.present:
+            current = max(self.present, key=self.last_seen.__getitem__) if self.present else 0
+        if current == self.current:
+            return []
+        self.current = current
+        return [(self.on_change, current)]
+
+    @staticmethod
+    def _fire(events):
+        # Outside the lock, so callbacks may call back into the tracker
+        for callback, fid in events:
+            if callback is not None:
+                callback(fid)
+
+    # ---------------- TIMER ----------------
+    def _next_deadline(self):
+        """Caller holds the lock."""
+        if not self.present:
+            return None
+        return min(self.last_seen[fid] for fid in self.present) + self.leave_after
+
+    def _run(self):
+        with self.cond:
+            while self.running:
+                deadline = self._next_deadline()
+                timeout = None if deadline is None else max(deadline - self.clock(), 0) + 0.001
+                self.cond.wait(timeout)
+                if not self.running:
+                    break
+                if deadline is not None and self.clock() >= deadline:
+                    self.cond.release()
+                    try:
+                        self.expire()
+                    finally:
+                        self.cond.acquire()
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join()
@@ -0,0 +1,82 @@
+"""
+Incremental line framing and Face ID parsing for the HuskyLens serial stream.
+
+Bytes go into LineFramer as they come off the port and complete lines come
+out, without decoding to str or rescanning what was already seen. Only the
+unfinished last line is kept, and it is bounded: a run of more than MAX_LINE
+bytes with no newline is thrown away and framing resumes after the next
+newline.
+"""
+
+import re
+
+MAX_LINE = 256
+
+# One pattern covers every format the Arduinos have printed so far, with a
+# single group so findall() hands back the digits without a match object
+# per ID. [ \t] rather than \s so a match never runs across a line break in
+# a block; the lookahead keeps the DATA format's trailing comma required.
+FACE_ID_RE = re.compile(
+    rb"(?:^DATA[ \t]*,(?=[ \t]*\d+[ \t]*,)"   # e.g., DATA,1,123,45
+    rb"|Face[ \t]*ID[ \t]*:"                  # e.g., Face ID: 1
+    rb"|ID[ \t]*=)"                           # e.g., ID=1
+    rb"[ \t]*(\d+)",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+def parse_face_id(line):
+    """Face ID in one line (bytes), or None."""
+    m = FACE_ID_RE.search(line)
+    if m is None:
+        return None
+    return int(m.group(1))
+
+def parse_face_ids(block):
+    """Every Face ID in a block of complete lines, in order, in a single scan."""
+    return list(map(int, FACE_ID_RE.findall(block)))
+
+class LineFramer:
+    """Splits a byte stream into lines, keeping only the unfinished tail."""
+
+    def __init__(self, max_line=MAX_LINE):
+        self.buf = b""  # the unfinished last line, at most max_line bytes
+        self.max_line = max_line
+        self.skipping = False  # inside an over-long line, waiting for its newline
+        self.dropped = 0
+
+    def feed_block(self, data):
+        """Add bytes, return the complete lines as one b"\\n"-terminated block (b"" if none)."""
+        # The tail is short, so joining it to the read is cheap, and a read that
+        # ends on a newline comes back as is, without a copy
+        buf = self.buf + data if self.buf else data
+        start = 0
+        if self.skipping:
+            start = buf.find(b"\n") + 1
+            if not start:
+                return b""
+            self.skipping = False
+
+        end = buf.rfind(b"\n") + 1
+        if end > start:
+            block = buf[start:end]
+            if b"\r" in block:
+                block = block.replace(b"\r\n", b"\n")
+        else:
+            block, end = b"", start
+        self.buf = buf[end:]
+
+        if len(self.buf) > self.max_line:
+            # No newline in sight: noise or a lost terminator, resync on the next one
+            self.buf = b""
+            self.skipping = True
+            self.dropped += 1
+        return block
+
+    def feed(self, data):
+        """Add bytes, return the complete lines (without line endings)."""
+        block = self.feed_block(data)
+        if not block:
+            return []
+        lines = block.split(b"\n")
+        lines.pop()  # empty string after the final newline
+        return lines
@@ -0,0 +1,181 @@
+"""
+Serial ports that survive the Arduino being unplugged or resetting.
+
+Ports used to be hard-coded (/dev/cu.usbserial-1110, COM6, ...), and one
+USB glitch ended the process with a SerialException. Here each Arduino is
+described by a DeviceSpec: its USB vendor/product ID, and its serial
+number where two boards of the same kind need telling apart. It is looked
+up among serial.tools.list_ports.comports() wherever the OS put it this
+time. A spec with no IDs falls back to the configured port path.
+
+ManagedSerial reads and writes like serial.Serial. When the device goes
+away, a read or write fails and ManagedSerial waits for the device to come
+back. It polls the port list every POLL_S, which works the same on macOS,
+Linux and Windows, where udev would only cover Linux. Once the device is
+back it reopens the port, calls its on_reconnect callbacks and repeats
+the call, so the caller just sees a slow read. If the device has not come
+back after reconnect_timeout seconds, DeviceLost is raised.
+
+Usage:
+    spec = DeviceSpec("HuskyLens Arduino", "/dev/cu.usbserial-10", vid=0x1A86, pid=0x7523)
+    with ManagedSerial(spec, 115200, timeout=1.0, on_reconnect=lambda port: link.reset()) as ser:
+        data = ser.read(ser.in_waiting or 1)
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import serial
+from serial.tools import list_ports
+
+from pipeline_trace import trace
+
+POLL_S = 0.05             # between looks at the port list while a device is gone
+RECONNECT_TIMEOUT = 30.0  # seconds a device may stay gone before DeviceLost
+
+class DeviceLost(serial.SerialException):
+    """A device did not come back within its reconnect timeout."""
+
+@dataclass
+class DeviceSpec:
+    name: str                         # for messages
+    port: str = None                  # path to use when no IDs are given, and preferred among matches
+    vid: int = None                   # USB vendor ID, e.g. 0x1A86 (CH340) or 0x2341 (Arduino)
+    pid: int = None                   # USB product ID
+    serial_number: str = None         # to tell two boards with the same VID/PID apart
+
+    @property
+    def by_id(self):
+        return not (self.vid is None and self.pid is None and self.serial_number is None)
+
+    def matches(self, info):
+        return ((self.vid is None or info.vid == self.vid)
+                and (self.pid is None or info.pid == self.pid)
+                and (self.serial_number is None or info.serial_number == self.serial_number))
+
+def find_port(spec, ports=None, prefer=None):
+    """Device path of spec among the ports present now, or None.
+
+    With several matches: prefer (the path it had last), then spec.port, then the first.
+    """
+    ports = list_ports.comports() if ports is None else ports
+    if not spec.by_id:
+        present = spec.port in (p.device for p in ports) or os.path.exists(spec.port)
+        return spec.port if present else None
+    found = sorted(p.device for p in ports if spec.matches(p))
+    for path in (prefer, spec.port):
+        if path in found:
+            return path
+    return found[0] if found else None
+
+class ManagedSerial:
+    """serial.Serial for one device, reopened wherever it reappears."""
+
+    def __init__(self, spec, baudrate, timeout=None, settle=0.0, reconnect_timeout=RECONNECT_TIMEOUT,
+                 on_reconnect=None, poll=POLL_S, ports=list_ports.comports):
+        self.spec = spec
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.settle = settle  # seconds to wait after opening, e.g. for the Arduino's reset
+        self.reconnect_timeout = reconnect_timeout
+        self.callbacks = [on_reconnect] if on_reconnect is not None else []
+        self.poll = poll
+        self.ports = ports
+        self.ser = None
+        self.path = None
+        self.lock = threading.Lock()  # one reconnect at a time, e.g. a reader and a writer thread both failing
+        self.closed = threading.Event()  # set by close(), ends a wait for the device
+        self.reconnects = 0
+        self.last_recovery_s = None
+        with trace.span("serial open", port=spec.name):
+            self._open(time.monotonic() + reconnect_timeout)
+
+    def _open(self, deadline):
+        while True:
+            if self.closed.is_set():
+                raise DeviceLost(f"{self.spec.name} closed while waiting for it")
+            path = find_port(self.spec, self.ports(), self.path)
+            if path is not None:
+                try:
+                    ser = serial.Serial(path, self.baudrate, timeout=self.timeout)
+                    break
+                except (serial.SerialException, OSError):
+                    pass  # listed but not ready yet
+            if time.monotonic() >= deadline:
+                raise DeviceLost(f"{self.spec.name} not found ({self._described()})")
+            self.closed.wait(self.poll)
+        self.ser, self.path = ser, path
+        if self.settle:
+            time.sleep(self.settle)
+
+    def _described(self):
+        if not self.spec.by_id:
+            return f"port {self.spec.port}"
+        ids = [f"{k} {v:04X}" for k, v in (("VID", self.spec.vid), ("PID", self.spec.pid)) if v is not None]
+        if self.spec.serial_number is not None:
+            ids.append(f"serial {self.spec.serial_number}")
+        return ", ".join(ids)
+
+    def reconnect(self, failed=None):
+        """Wait for the device to come back and reopen it. Raises DeviceLost after reconnect_timeout.
+
+        failed: the port object that failed; if another thread has replaced it already, nothing to do.
+        """
+        with self.lock:
+            if failed is None or self.ser is failed:
+                self._reconnect()
+
+    def _reconnect(self):
+        start = time.monotonic()
+        print(f"⚠️ {self.spec.name} disconnected from {self.path}; waiting for it...")
+        trace.instant("device lost", device=self.spec.name)
+        try:
+            if self.ser is not None:
+                self.ser.close()
+        except (serial.SerialException, OSError):
+            pass
+        with trace.span("reconnect", device=self.spec.name):
+            self._open(start + self.reconnect_timeout)
+        self.reconnects += 1
+        self.last_recovery_s = time.monotonic() - start
+        print(f"{self.spec.name} back on {self.path} after {self.last_recovery_s:.2f}s")
+        for callback in self.callbacks:
+            callback(self)
+
+    def _call(self, fn):
+        if self.ser is None:
+            raise serial.SerialException(f"{self.spec.name} is closed")
+        ser = self.ser
+        try:
+            return fn(ser)
+        except (serial.SerialException, OSError):
+            self.reconnect(ser)
+            return fn(self.ser)
+
+    def read(self, size=1):
+        return self._call(lambda ser: ser.read(size))
+
+    def write(self, data):
+        return self._call(lambda ser: ser.write(data))
+
+    @property
+    def in_waiting(self):
+        return self._call(lambda ser: ser.in_waiting)
+
+    def fileno(self):
+        return self.ser.fileno()
+
+    def close(self):
+        self.closed.set()
+        ser, self.ser = self.ser, None
+        if ser is not None:
+            ser.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
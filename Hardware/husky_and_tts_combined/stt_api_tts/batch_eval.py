@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Batch evaluation of the Winnie prompt against a corpus of cases.
+
+Each line of the corpus is a JSON object:
+    {"id": "c1", "name": "Iwami", "degree": "Mechatronics", "count": 2,
+     "history": "User: ...\\nWinnie: ...", "transcript": "what is torque"}
+
+Cases are sent exactly as the robot sends a turn (winnie_prompt.CHAT_PARAMS),
+so the replies are the ones Winnie would give. They run concurrently,
+throttled by a token bucket for both requests and tokens per minute. Finished cases are journaled to <out>.progress.jsonl so
+an interrupted run picks up where it stopped. The final results are written
+as Parquet (needs pyarrow) or CSV, chosen by the output file extension.
+
+Usage:
+    python3 batch_eval.py cases.jsonl results.parquet [--workers 16] [--rpm 500] [--tpm 200000]
+    python3 batch_eval.py cases.jsonl results.csv --mock     # local fake endpoint, no API key
+"""
+
+import argparse
+import csv
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from openai import OpenAI
+from winnie_prompt import CHAT_PARAMS, build_prompt_prefix, build_messages
+
+# ---------------- CONFIG ----------------
+API_KEY_FILE = "apikey_test.txt"
+PROMPT_FILE = "prompt_test.txt"
+REPLY_TOKENS = 60  # reply length assumed for the TPM budget until real replies come back
+RESULT_FIELDS = [
+    "id", "name", "degree", "count", "transcript", "reply",
+    "prompt_tokens", "completion_tokens", "latency_s", "error",
+]
+# ----------------------------------------
+
+# ---------------- RATE LIMIT ----------------
+class TokenBucket:
+    """Refills at rate_per_min / 60 per second, holds at most one minute's worth."""
+
+    def __init__(self, rate_per_min):
+        self.capacity = float(rate_per_min)
+        self.tokens = self.capacity
+        self.rate = rate_per_min / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount is available (0 if it is now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+class RateLimiter:
+    """Blocks callers until both the RPM and the TPM bucket allow the request.
+
+    The robot sets no max_tokens, so a request's reply size is not known up
+    front: it is taken as the mean of the replies so far, and the bucket is
+    corrected by the difference once a response reports its usage.
+    """
+
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.lock = threading.Lock()
+        self.replies = 0
+        self.reply_tokens = REPLY_TOKENS
+
+    def settle(self, estimated, prompt_tokens, completion_tokens):
+        """Charge what a request really used instead of its estimate."""
+        with self.lock:
+            self.tokens.tokens -= prompt_tokens + completion_tokens - estimated
+            self.replies += 1
+            self.reply_tokens += (completion_tokens - self.reply_tokens) / self.replies
+
+    def acquire(self, tokens):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+                if wait == 0:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    return
+            time.sleep(wait)
+
+def estimate_prompt_tokens(messages):
+    """Rough prompt size, about 4 characters per token."""
+    return sum(len(m["content"]) for m in messages) // 4
+
+# ---------------- CORPUS / PROGRESS ----------------
+def load_cases(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            case = json.loads(line)
+            case.setdefault("id", str(n))
+            case["id"] = str(case["id"])
+            yield case
+
+def load_done(progress_path):
+    """Results already journaled by an earlier (possibly interrupted) run."""
+    done = {}
+    if progress_path.exists():
+        with open(progress_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash
+                if not rec.get("error"):
+                    done[rec["id"]] = rec
+    return done
+
+def write_results(rows, out_path):
+    if out_path.suffix == ".parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Writing .parquet needs pyarrow (pip install pyarrow), or use a .csv output")
+        table = pa.table({field: [row.get(field) for row in rows] for field in RESULT_FIELDS})
+        pq.write_table(table, out_path)
+    else:
+        with open(out_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+
+# ---------------- RUN ----------------
+def run_case(client, limiter, system_prompt, case):
+    prefix = build_prompt_prefix(system_prompt, case.get("name"), case.get("degree"), case.get("history", ""))
+    messages = build_messages(prefix, case["transcript"], case.get("count", -1))
+    estimated = estimate_prompt_tokens(messages) + round(limiter.reply_tokens)
+    limiter.acquire(estimated)
+
+    result = {field: case.get(field) for field in ("id", "name", "degree", "count", "transcript")}
+    start = time.monotonic()
+    try:
+        response = client.chat.completions.create(**CHAT_PARAMS, messages=messages)
+        result["reply"] = response.choices[0].message.content.strip()
+        if response.usage is not None:
+            result["prompt_tokens"] = response.usage.prompt_tokens
+            result["completion_tokens"] = response.usage.completion_tokens
+            limiter.settle(estimated, response.usage.prompt_tokens, response.usage.completion_tokens)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["latency_s"] = time.monotonic() - start
+    return result
+
+def run_batch(cases_path, out_path, client, system_prompt, workers, rpm, tpm):
+    out_path = Path(out_path)
+    progress_path = out_path.with_name(out_path.name + ".progress.jsonl")
+    done = load_done(progress_path)
+    cases = [c for c in load_cases(cases_path) if c["id"] not in done]
+    print(f"{len(done)} cases already done, {len(cases)} to run with {workers} workers")
+
+    limiter = RateLimiter(rpm, tpm)
+    finished = failed = 0
+    start = time.monotonic()
+    with open(progress_path, "a", encoding="utf-8") as journal, ThreadPoolExecutor(workers) as pool:
+        futures = [pool.submit(run_case, client, limiter, system_prompt, c) for c in cases]
+        for future in as_completed(futures):
+            result = future.result()
+            # Only this thread writes the journal, one flushed line per finished case
+            journal.write(json.dumps(result, ensure_ascii=False) + "\n")
+            journal.flush()
+            if result.get("error"):
+                failed += 1
+            else:
+                done[result["id"]] = result
+            finished += 1
+            if finished % 100 == 0 or finished == len(cases):
+                rate = finished / max(time.monotonic() - start, 1e-9)
+                print(f"  {finished}/{len(cases)} ({rate:.1f} cases/s, {failed} failed)")
+
+    write_results(list(done.values()), out_path)
+    print(f"Wrote {len(done)} results to {out_path} ({failed} failed, rerun to retry them)")
+
+# ---------------- MOCK ENDPOINT ----------------
+class MockChatHandler(BaseHTTPRequestHandler):
+    """Answers /chat/completions with a canned reply, for offline runs."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        user_text = next(m["content"] for m in reversed(body["messages"]) if m["role"] == "user")
+        reply = json.dumps({
+            "id": "mock", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": f"You asked about {user_text}. Honey!"}}],
+            "usage": {"prompt_tokens": estimate_prompt_tokens(body["messages"]),
+                      "completion_tokens": 8, "total_tokens": 0},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+def start_mock_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Winnie prompt over a corpus of cases.")
+    parser.add_argument("cases", help="JSONL corpus of cases")
+    parser.add_argument("out", help="results file (.parquet or .csv)")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--rpm", type=float, default=500, help="requests per minute limit")
+    parser.add_argument("--tpm", type=float, default=200000, help="tokens per minute limit")
+    parser.add_argument("--prompt", default=PROMPT_FILE)
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint, e.g. a local mock")
+    parser.add_argument("--mock", action="store_true", help="start a local mock endpoint and use it")
+    args = parser.parse_args()
+
+    with open(args.prompt, "r") as f:
+        system_prompt = f.read().strip()
+
+    base_url = args.base_url
+    if args.mock:
+        server, base_url = start_mock_server()
+        api_key = "mock"
+    else:
+        with open(API_KEY_FILE, "r") as f:
+            api_key = f.read().strip()
+    client = OpenAI(api_key=api_key, base_url=base_url)
+
+    run_batch(args.cases, args.out, client, system_prompt, args.workers, args.rpm, args.tpm)
@@ -1,20 +1,37 @@
-import serial
 import time
 import wave
-import speech_recognition as sr
-from gtts import gTTS
-from pydub import AudioSegment
-from openai import OpenAI
 import sys
 import select
 import termios
 import tty
 from pathlib import Path
-import json
+import hashlib
+import os
+import queue
+import socket
+import sqlite3
+import threading
+# openai, httpx, speech_recognition, gtts and pydub are imported where they are
+# used (and ahead of time by warm_up), not here: the first recording needs none of them
+from winnie_prompt import CHAT_PARAMS, build_prompt_prefix, build_messages
+from turn_ledger import TurnLedger
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from event_bus import EventBusClient, GestureEvent, BUS_PATH
+from memory_store import open_store
+from memory_actor import MemoryActor
+from memory_index import MemoryIndex
+from serial_ports import DeviceLost, DeviceSpec, ManagedSerial
+import pipeline_trace
+from pipeline_trace import trace
 
 # ---------------- CONFIG ----------------
 MIC_PORT = "/dev/cu.usbserial-1110"
 SPK_PORT = "/dev/cu.usbserial-1110"
+# The Arduino is found by USB VID/PID (and serial number) wherever it comes back after being
+# unplugged; with these left None, the ports above are used as they are
+MIC_VID, MIC_PID, MIC_SERIAL = None, None, None
+SPK_VID, SPK_PID, SPK_SERIAL = MIC_VID, MIC_PID, MIC_SERIAL
 BAUDRATE = 115200
 SAMPLE_RATE = 8000
 CHANNELS = 1
@@ -24,14 +41,30 @@ TTS_MP3 = "response.mp3"
 TTS_WAV = "response.wav"
 API_KEY_FILE = "apikey_test.txt"
 PROMPT_FILE = "prompt_test.txt"
-PRESENCE_FILE = Path.home() / "Downloads/combined/presence.json"
-MEMORIES_DIR = Path("memories")
-WAVING_FLAG_FILE = Path("waving_flag.txt")
+MEMORY_BACKEND = "sqlite"    # Same as the HuskyLens side: "sqlite" (memories.db) or "log" (memories/ID_<n>.log)
+HISTORY_TURNS = 20           # Most recent turns of the conversation log put in the prompt (None = all)
+RECALL_TURNS = 5             # Older turns most like the transcript added as well (0 = off)
+PREWARM = True               # Start loading context/connections on the first mic bytes
+KEEPALIVE_S = 60             # Keep warmed API connections open this long
+TTS_HOST = "translate.google.com"
+LEDGER_DIR = Path("ledger")  # Per-turn timings/tokens, one JSONL file per day
+PREFETCH = True              # Load context and synthesize a greeting as soon as a face appears
+GREETING = "Hello {name}! It's me, Winnie the Pooh. Shall we have a little chat over some honey?"
+AUDIO_CACHE_DIR = Path("audio_cache")  # Synthesized phrases that repeat, e.g. greetings
+GESTURES = [("WAVE", 0.0)]   # (command, seconds after the audio starts)
+GESTURE_LEAD_S = 0.15        # How far ahead gestures are sent when there is no port reset wait
+WARM_UP = True               # Import later stages' libraries and build the API client during the first recording
+TRACE = True                 # Per-stage spans, written to ../traces/ at exit (see pipeline_trace.py)
 # ----------------------------------------
 
 # Terminal setup for non-blocking input
-old_settings = termios.tcgetattr(sys.stdin)
-tty.setcbreak(sys.stdin.fileno())
+def setup_terminal():
+    old_settings = termios.tcgetattr(sys.stdin)
+    tty.setcbreak(sys.stdin.fileno())
+    return old_settings
+
+def restore_terminal(old_settings):
+    termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
 
 def is_key_pressed():
     return select.select([sys.stdin], [], [], 0)[0] != []
@@ -39,35 +72,81 @@ def is_key_pressed():
 def get_key():
     return sys.stdin.read(1)
 
-# Load API key and client
+# Set by a 'q' keypress, or by the supervisor when it shuts down
+stop_event = threading.Event()
+
+def stop_requested():
+    if not stop_event.is_set() and is_key_pressed():
+        if get_key().lower() == 'q':
+            stop_event.set()
+    return stop_event.is_set()
+
+# Load API key; the client is built on first use (get_client)
 with open(API_KEY_FILE, "r") as f:
     api_key = f.read().strip()
-client = OpenAI(api_key=api_key)
+http_client = None
+client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """The OpenAI client, built once. Importing openai alone takes about half a second."""
+    global http_client, client
+    with _client_lock:
+        if client is None:
+            import httpx
+            from openai import OpenAI
+            # Own the HTTP client so warmed keep-alive connections are reused by the API calls
+            http_client = httpx.Client(limits=httpx.Limits(keepalive_expiry=KEEPALIVE_S))
+            client = OpenAI(api_key=api_key, http_client=http_client)
+        return client
 
 with open(PROMPT_FILE, "r") as f:
     SYSTEM_PROMPT = f.read().strip()
 
+# Presence comes in from the HuskyLens process and gestures go out to it.
+# Connected in main, or replaced by the supervisor's in-process bus.
+bus = None
+# Per-person memory. Opened in main, or shared by the supervisor.
+memory = None
+# Vectors of everyone's past turns, for recalling the relevant ones
+recall = MemoryIndex() if RECALL_TURNS else None
+
 # ---------------- AUDIO ----------------
-def record_audio():
-    ser = serial.Serial(MIC_PORT, BAUDRATE, timeout=1)
-    time.sleep(2)
+def record_audio(on_first_bytes=None, on_idle=None):
+    """Record until the button is released.
+
+    on_first_bytes() runs once when audio starts; on_idle(ser) runs while
+    waiting for the button, with the open mic port.
+    """
+    # A short timeout, so on_idle runs between reads. Unplugged mid-recording, the
+    # read waits for the Arduino to come back and the recording carries on.
+    ser = ManagedSerial(DeviceSpec("mic Arduino", MIC_PORT, MIC_VID, MIC_PID, MIC_SERIAL), BAUDRATE,
+                        timeout=0.2, settle=2)
     print("Hold button to record... release to stop.")
     data = b''
     last_data_time = time.time()
     while True:
-        if is_key_pressed():
-            key = get_key()
-            if key.lower() == 'q':
-                ser.close()
-                return None
+        if stop_requested():
+            ser.close()
+            return None
         chunk = ser.read(ser.in_waiting or 1)
         if chunk:
+            if not data:
+                first_ns = pipeline_trace.now()
+                trace.instant("first mic byte")
+                if on_first_bytes is not None:
+                    on_first_bytes()
             data += chunk
             last_data_time = time.time()
+            last_ns = pipeline_trace.now()
+        elif not data and on_idle is not None:
+            on_idle(ser)
         else:
             if time.time() - last_data_time > 1 and len(data) > 0:
                 break
     ser.close()
+    trace.complete("utterance", first_ns, last_ns, bytes=len(data))
+    trace.complete("end-of-utterance wait", last_ns, pipeline_trace.now())
     with wave.open(RECORD_WAV, 'wb') as wf:
         wf.setnchannels(CHANNELS)
         wf.setsampwidth(SAMPLE_WIDTH)
@@ -77,6 +156,7 @@ def record_audio():
     return RECORD_WAV
 
 def transcribe_audio(wav_file):
+    import speech_recognition as sr
     recognizer = sr.Recognizer()
     with sr.AudioFile(wav_file) as source:
         audio_data = recognizer.record(source)
@@ -93,167 +173,404 @@ def transcribe_audio(wav_file):
 
 # ---------------- PRESENCE / MEMORY ----------------
 def get_current_presence():
-    if PRESENCE_FILE.exists():
+    event = bus.latest("presence")
+    # current_id is 0 once the tracker has seen everyone leave
+    return (event.current_id or None) if event is not None else None
+
+def append_to_memory(fid, user_text, winnie_text):
+    memory.append_turn(fid, user_text, winnie_text)
+    if recall is not None:
+        recall.sync(fid, memory)  # just the new turn, unless the index fell behind
+
+def recall_turns(fid, user_text):
+    """Older turns (before the ones already in the prompt) most like user_text, as prompt text."""
+    if recall is None or HISTORY_TURNS is None:
+        return ""
+    before = recall.rows(fid) - HISTORY_TURNS
+    rows = sorted(row for row, _ in recall.search(fid, user_text, RECALL_TURNS, before))
+    return "".join(f"User: {u}\nWinnie: {w}\n" for _, u, w in memory.turns_at(fid, rows))
+
+def load_person(fid):
+    """Everything a turn needs to know about a person, read from the memory store."""
+    stored = memory.person(fid) or {"version": None, "name": None, "degree": None, "count": -1}
+    name, degree = stored["name"], stored["degree"]
+    conv = memory.conversation(fid, HISTORY_TURNS)
+    if recall is not None:
+        recall.sync(fid, memory)  # e.g. turns imported since the last run
+    return {
+        "fid": fid,
+        "version": stored["version"],
+        "name": name,
+        "degree": degree,
+        "count": stored["count"],
+        "conv": conv,
+        "prefix": build_prompt_prefix(SYSTEM_PROMPT, name, degree, conv),
+    }
+
+# ---------------- PRE-WARM ----------------
+def warm_connections():
+    """Open (or refresh) the keep-alive connection to the API and resolve the TTS host."""
+    import httpx
+    with trace.span("warm connections"):
+        try:
+            # Any response will do, the point is the TCP + TLS handshake left in the pool
+            base_url = get_client().base_url
+            http_client.head(str(base_url) + "models", timeout=5)
+        except httpx.HTTPError as e:
+            print("⚠️ API pre-warm failed:", e)
         try:
-            with open(PRESENCE_FILE, "r") as f:
-                data = json.load(f)
-                return data.get("current_id")
+            # gTTS opens a fresh session per request, so only DNS can be warmed here
+            socket.getaddrinfo(TTS_HOST, 443)
+        except OSError as e:
+            print("⚠️ TTS pre-warm failed:", e)
+
+def warm_up():
+    """Start threads that get the stages after the first recording ready while it happens.
+
+    One imports the STT and TTS libraries, the other builds the API client and
+    warms its connection. A stage that runs before they finish imports or
+    builds what it needs itself (the import lock makes it wait for the thread).
+    """
+    def imports():
+        with trace.span("warm up imports"):
+            try:
+                import speech_recognition, gtts, pydub
+            except ImportError as e:
+                print("⚠️ Warm-up import failed:", e)
+
+    def api():
+        with trace.span("warm up client"):
+            get_client()
+        warm_connections()
+
+    threads = [threading.Thread(target=imports, name="warm-up imports", daemon=True),
+               threading.Thread(target=api, name="warm-up client", daemon=True)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+class TurnPrewarm:
+    """Speculative work for the next turn, started on the first mic bytes.
+
+    Loads the present person's memory, builds their prompt prefix and warms
+    the API/TTS connections while they are still speaking. With a prefetch,
+    a person it already loaded is used instead of reading them again.
+    """
+
+    def __init__(self, prefetch=None):
+        self.thread = None
+        self.person = None
+        self.prefetch = prefetch
+
+    def start(self):
+        self.person = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        with trace.span("prewarm"):
+            self._prewarm()
+
+    def _prewarm(self):
+        fid = get_current_presence()
+        if fid is not None:
+            try:
+                self.person = (self.prefetch and self.prefetch.take(fid)) or load_person(fid)
+            except (OSError, sqlite3.Error) as e:
+                print("⚠️ Could not preload memory:", e)
+        warm_connections()
+
+    def take(self, fid):
+        """Return the preloaded person if it is still valid for fid, else None."""
+        if self.thread is None:
+            return None
+        self.thread.join()
+        self.thread = None
+        person, self.person = self.person, None
+        return person if is_current(person, fid) else None
+
+def is_current(person, fid):
+    """True if person was loaded for fid and their memory has not changed since."""
+    if person is None or person["fid"] != fid:
+        return False
+    return memory.version(fid) == person["version"]
+
+class PresencePrefetch:
+    """Speculative work for a person who just came into view.
+
+    Subscribed to presence events. When a new face becomes current, a worker
+    thread loads their memory and prompt prefix and synthesizes a greeting
+    with their name, so the greeting can play while they are still waiting
+    and their first turn does not have to load them.
+    """
+
+    def __init__(self):
+        self.people = {}     # fid -> load_person() result
+        self.greetings = {}  # fid -> (audio, face-enter time), until played or skipped
+        self.last_id = None
+        self.pending = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def on_presence(self, event):
+        # Only a change of face; a reconnect can repeat the last event
+        trace.instant("presence", current_id=event.current_id)
+        if event.current_id and event.current_id != self.last_id:
+            self.pending.put((event.current_id, time.monotonic()))
+        self.last_id = event.current_id
+
+    def _run(self):
+        while True:
+            fid, entered = self.pending.get()
+            with trace.span("prefetch", face_id=fid):
+                self._prefetch(fid, entered)
+
+    def _prefetch(self, fid, entered):
+        try:
+            person = load_person(fid)
+        except (OSError, sqlite3.Error) as e:
+            print("⚠️ Could not prefetch memory:", e)
+            return
+        person["prefetched"] = True
+        self.people[fid] = person
+        warm_connections()
+        if not person["name"]:
+            return  # nothing to greet them with until their details are filled in
+        try:
+            audio = cached_speech(GREETING.format(name=person["name"]))
         except Exception as e:
-            print("⚠️ Could not read presence.json:", e)
-    return None
-
-def get_memory_file(fid):
-    return MEMORIES_DIR / f"ID_{fid}.txt"
-
-def parse_metadata(mem_file):
-    """Read name, degree, and count from the top of ID_x.txt"""
-    name, degree = None, None
-    count = -1
-    if mem_file.exists():
-        with open(mem_file, "r", encoding="utf-8") as f:
-            for line in f:
-                line_lower = line.lower()
-                if line_lower.startswith("name:"):
-                    name = line.split(":", 1)[1].strip()
-                elif line_lower.startswith("degree:"):
-                    degree = line.split(":", 1)[1].strip()
-                elif line_lower.startswith("count"):
-                    try:
-                        count = int(line.split("=",1)[1].strip())
-                    except:
-                        count = -1
-    return name, degree, count
-
-def update_count(mem_file, new_count):
-    """Update the count variable in ID file."""
-    if not mem_file.exists():
-        return
-    lines = mem_file.read_text(encoding="utf-8").splitlines()
-    new_lines = []
-    count_updated = False
-    for line in lines:
-        if line.lower().startswith("count"):
-            new_lines.append(f"count = {new_count}")
-            count_updated = True
-        else:
-            new_lines.append(line)
-    if not count_updated:
-        # Append count at top if missing
-        for i, line in enumerate(new_lines):
-            if line.lower().startswith("degree:"):
-                new_lines.insert(i+1, f"count = {new_count}")
-                break
-    mem_file.write_text("\n".join(new_lines), encoding="utf-8")
+            print("⚠️ Could not synthesize greeting:", e)
+            return
+        self.greetings[fid] = (audio, entered)
+        print(f"Greeting for {person['name']} ready {time.monotonic() - entered:.2f}s after they appeared")
 
-def get_conversation(mem_file):
-    """Read conversation part (skip metadata)."""
-    if mem_file.exists():
-        lines = mem_file.read_text(encoding="utf-8").splitlines()
-        conv_lines = [l for l in lines if not l.lower().startswith(("name:", "degree:", "count"))]
-        return "\n".join(conv_lines)
-    return ""
+    def take(self, fid):
+        """Return the prefetched person if it is still valid for fid, else None."""
+        person = self.people.pop(fid, None)
+        return person if is_current(person, fid) else None
 
-def append_to_memory(fid, user_text, winnie_text):
-    mem_file = get_memory_file(fid)
-    with open(mem_file, "a", encoding="utf-8") as f:
-        f.write(f"User: {user_text}\n")
-        f.write(f"Winnie: {winnie_text}\n")
+    def take_greeting(self, fid):
+        """Return (audio, face-enter time) for fid once, or None."""
+        return self.greetings.pop(fid, None)
+
+    def skip_greetings(self):
+        self.greetings.clear()
 
 # ---------------- CHATGPT ----------------
-def query_chatgpt(user_text, name, degree, memory_content, count):
-    messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "system", "content": f"You are talking to {name or 'Unknown'} who studies {degree or 'Unknown degree'}."}
-    ]
-    if memory_content.strip():
-        messages.append({"role": "system", "content": f"Conversation so far:\n{memory_content}"})
-    messages.append({"role": "user", "content": user_text})
-
-    # ✅ Add feedback prompt if count is a multiple of 3 and not 0
-    if count > 0 and count % 3 == 0:
-        messages.append({"role": "system", "content": "Provide feedback on how the user did in the interview. Give a brief comment and a rating out of 10."})
-
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
+def query_chatgpt(user_text, prefix, count, turn=None, recalled=""):
+    """Ask ChatGPT for a reply. Timings and token usage go into turn if given."""
+    messages = build_messages(prefix, user_text, count, recalled)
+
+    start = time.monotonic()
+    start_ns = pipeline_trace.now()
+    stream = get_client().chat.completions.create(
+        **CHAT_PARAMS,
         messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},
     )
-    reply = response.choices[0].message.content.strip()
+    parts = []
+    usage = None
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            if not parts:
+                trace.complete("llm first token", start_ns, pipeline_trace.now())
+                if turn is not None:
+                    turn["llm_ttft_s"] = time.monotonic() - start
+            parts.append(chunk.choices[0].delta.content)
+        if chunk.usage is not None:
+            usage = chunk.usage
+    reply = "".join(parts).strip()
+    trace.complete("llm completion", start_ns, pipeline_trace.now(),
+                   completion_tokens=usage.completion_tokens if usage is not None else None)
+    if turn is not None:
+        turn["llm_total_s"] = time.monotonic() - start
+        if usage is not None:
+            turn["prompt_tokens"] = usage.prompt_tokens
+            turn["completion_tokens"] = usage.completion_tokens
+            details = getattr(usage, "prompt_tokens_details", None)
+            turn["cached_tokens"] = getattr(details, "cached_tokens", None) or 0
     print("ChatGPT says:", reply)
     return reply
 
 # ---------------- TTS ----------------
-def synthesize_speech(text):
+def synthesize_speech(text, mp3_path=TTS_MP3, wav_path=TTS_WAV):
+    from gtts import gTTS
+    from pydub import AudioSegment
     tts = gTTS(text)
-    tts.save(TTS_MP3)
-    audio = AudioSegment.from_file(TTS_MP3, format="mp3")
-    audio = audio.set_frame_rate(8000).set_channels(1).set_sample_width(1)
-    audio.export(TTS_WAV, format="wav")
-    with open(TTS_WAV, "rb") as f:
+    start = pipeline_trace.now()
+    with open(mp3_path, "wb") as f:
+        # What tts.save() does, with the first chunk's arrival noted
+        for i, chunk in enumerate(tts.stream()):
+            if i == 0:
+                trace.complete("tts first chunk", start, pipeline_trace.now())
+            f.write(chunk)
+    trace.complete("tts request", start, pipeline_trace.now(), chars=len(text))
+    with trace.span("tts decode"):
+        audio = AudioSegment.from_file(mp3_path, format="mp3")
+        audio = audio.set_frame_rate(8000).set_channels(1).set_sample_width(1)
+        audio.export(wav_path, format="wav")
+    with open(wav_path, "rb") as f:
         f.seek(44)
         data = f.read()
     return data
 
-def play_audio(raw_bytes):
-    with open(WAVING_FLAG_FILE, "w") as f:
-        f.write("true")
-    ser = serial.Serial(SPK_PORT, BAUDRATE, timeout=1)
-    time.sleep(2)
+def cached_speech(text):
+    """synthesize_speech for phrases that repeat, kept in AUDIO_CACHE_DIR by text hash."""
+    AUDIO_CACHE_DIR.mkdir(exist_ok=True)
+    path = AUDIO_CACHE_DIR / (hashlib.sha1(text.encode("utf-8")).hexdigest() + ".raw")
+    if path.exists():
+        return path.read_bytes()
+    # Own scratch files, so this can run next to a turn's synthesize_speech
+    mp3, wav = path.with_suffix(".mp3"), path.with_suffix(".wav")
+    try:
+        data = synthesize_speech(text, mp3, wav)
+    finally:
+        for scratch in (mp3, wav):
+            scratch.unlink(missing_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return data
+
+def play_audio(raw_bytes, ser=None):
+    """Send audio to the speaker. With an already open port, there is no reset wait."""
+    own_port = ser is None
+    if own_port:
+        # Unplugged mid-playback, the write waits for the Arduino (and its reset) and playback carries on
+        ser = ManagedSerial(DeviceSpec("speaker Arduino", SPK_PORT, SPK_VID, SPK_PID, SPK_SERIAL), BAUDRATE,
+                            timeout=1, on_reconnect=lambda port: time.sleep(2))
+    # Gestures go out now, timed against the moment the first audio bytes do
+    start = time.monotonic() + (2 if own_port else GESTURE_LEAD_S)
+    for command, offset in GESTURES:
+        trace.instant("gesture", command=command, offset_s=offset)
+        if not bus.publish(GestureEvent(command, time.monotonic(), start + offset)):
+            print(f"⚠️ Presence process not connected; no {command}.")
+    with trace.span("wait for audio start"):
+        time.sleep(max(start - time.monotonic(), 0))
     print(f"Sending {len(raw_bytes)} bytes to speaker...")
-    for i in range(0, len(raw_bytes), 256):
-        if is_key_pressed():
-            key = get_key()
-            if key.lower() == 'q':
-                ser.close()
-                return
-        ser.write(raw_bytes[i:i+256])
-        time.sleep(0.01)
-    ser.close()
-    with open(WAVING_FLAG_FILE, "w") as f:
-        f.write("false")
+    try:
+        with trace.span("playback", bytes=len(raw_bytes)):
+            for i in range(0, len(raw_bytes), 256):
+                if stop_requested():
+                    return
+                ser.write(raw_bytes[i:i+256])
+                if i == 0:
+                    trace.instant("first speaker byte")
+                time.sleep(0.01)
+    finally:
+        if own_port:
+            ser.close()
 
 # ---------------- MAIN LOOP ----------------
-if __name__ == "__main__":
-    try:
-        while True:
-            if is_key_pressed():
-                key = get_key()
-                if key.lower() == 'q':
-                    break
-            print("\n--- New Conversation ---")
-            wav_file = record_audio()
-            if wav_file is None:
-                break
+def greet(prefetch, ser):
+    """Play a prefetched greeting for whoever is in view, on the open mic port if it is also the speaker."""
+    fid = get_current_presence()
+    greeting = prefetch.take_greeting(fid) if fid is not None else None
+    if greeting is None:
+        return
+    audio, entered = greeting
+    print(f"Greeting ID {fid}, {time.monotonic() - entered:.2f}s after they appeared")
+    play_audio(audio, ser if MIC_PORT == SPK_PORT else None)
+
+def conversation_loop(prewarm=None, ledger=None, prefetch=None):
+    """Record, answer and speak until 'q' is pressed or stop_event is set."""
+    ledger = ledger or TurnLedger(LEDGER_DIR)
+
+    def on_first_bytes():
+        if prefetch:
+            prefetch.skip_greetings()  # they are already talking
+        if prewarm:
+            prewarm.start()
+    on_idle = (lambda ser: greet(prefetch, ser)) if prefetch else None
+
+    while not stop_requested():
+        print("\n--- New Conversation ---")
+        try:
+            wav_file = record_audio(on_first_bytes, on_idle)
+        except DeviceLost as e:
+            print(f"⚠️ {e}; trying again.")
+            continue
+        if wav_file is None:
+            break
+        released_at = time.monotonic()
+        released_ns = pipeline_trace.now()
+        turn = ledger.new_turn()
+        turn["capture_bytes"] = max(Path(wav_file).stat().st_size - 44, 0)
+        turn["capture_s"] = turn["capture_bytes"] / (SAMPLE_RATE * SAMPLE_WIDTH * CHANNELS)
+        with trace.span("stt request"):
             user_text = transcribe_audio(wav_file)
-            if not user_text:
-                continue
-            fid = get_current_presence()
-            if fid is None:
-                print("No registered person detected; skipping.")
-                continue
+        turn["stt_s"] = time.monotonic() - released_at
+        if not user_text:
+            ledger.log(turn)
+            continue
+        fid = get_current_presence()
+        turn["face_id"] = fid
+        if fid is None:
+            print("No registered person detected; skipping.")
+            ledger.log(turn)
+            continue
 
-            memory_file = get_memory_file(fid)
-            name, degree, count = parse_metadata(memory_file)
+        context_start = time.monotonic()
+        with trace.span("context", face_id=fid):
+            person = prewarm.take(fid) if prewarm else None
+            if person is None and prefetch:
+                person = prefetch.take(fid)
+            if person is None:
+                person = load_person(fid)
+        turn["context_s"] = time.monotonic() - context_start
+        turn["prefetched"] = person.get("prefetched", False)
+        name, degree, count = person["name"], person["degree"], person["count"]
+        turn["first_turn"] = count < 0
 
-            # Check for empty name/degree
-            if not name or not degree:
-                print(f"⚠️ Cannot start conversation: Name or degree fields are empty for ID {fid}.")
-                continue
+        # Check for empty name/degree
+        if not name or not degree:
+            print(f"⚠️ Cannot start conversation: Name or degree fields are empty for ID {fid}.")
+            ledger.log(turn)
+            continue
 
-            conv = get_conversation(memory_file)
-            print(f"Talking to {name} ({degree})")
+        print(f"Talking to {name} ({degree})")
 
-            reply = query_chatgpt(user_text, name, degree, conv, count)
+        recall_start = time.monotonic()
+        with trace.span("recall"):
+            recalled = recall_turns(fid, user_text)
+        turn["recall_s"] = time.monotonic() - recall_start
+        reply = query_chatgpt(user_text, person["prefix"], count, turn, recalled)
+        # The turn and the count after a valid conversation, in one commit
+        with memory.batch():
             append_to_memory(fid, user_text, reply)
+            count = memory.increment_count(fid)
+        print(f"Conversation count for {name}: {count}")
 
-            # Increment count after valid conversation
-            count += 1
-            update_count(memory_file, count)
-            print(f"Conversation count for {name}: {count}")
-
-            audio_bytes = synthesize_speech(reply)
+        tts_start = time.monotonic()
+        audio_bytes = synthesize_speech(reply)
+        turn["tts_s"] = time.monotonic() - tts_start
+        print(f"Post-release latency: {time.monotonic() - released_at:.2f}s (prewarm {'on' if prewarm else 'off'})")
+        playback_start = time.monotonic()
+        try:
             play_audio(audio_bytes)
+        except DeviceLost as e:
+            print(f"⚠️ {e}; reply not played.")  # the turn is already in memory
+        turn["playback_s"] = time.monotonic() - playback_start
+        turn["turn_s"] = time.monotonic() - released_at
+        trace.complete("turn", released_ns, pipeline_trace.now(), face_id=fid)
+        ledger.log(turn)
+
+if __name__ == "__main__":
+    old_settings = setup_terminal()
+    if TRACE:
+        pipeline_trace.enable("conversation")
+    if WARM_UP:
+        warm_up()
+    bus = EventBusClient(BUS_PATH)
+    memory = MemoryActor(open_store(MEMORY_BACKEND))  # turns are saved off the conversation thread
+    prefetch = PresencePrefetch() if PREFETCH else None
+    bus.subscribe("presence", prefetch.on_presence if prefetch else None)
+    try:
+        conversation_loop(TurnPrewarm(prefetch) if PREWARM else None, prefetch=prefetch)
     except KeyboardInterrupt:
         print("\n🛑 Interrupted by user")
     finally:
-        termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
+        bus.close()
+        memory.close()
+        restore_terminal(old_settings)
         print("Terminal restored, exiting cleanly.")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Per-turn latency and token ledger.
+
+Every conversation turn appends one JSON line to ledger/<YYYY-MM-DD>.jsonl.
+Run this file to get p50/p95/p99 per stage for a day's ledger:
+
+Usage:
+    python3 turn_ledger.py                      # today's ledger
+    python3 turn_ledger.py ledger/2025-09-20.jsonl [more.jsonl ...]
+    python3 turn_ledger.py --first --by prefetched   # first turns, with vs. without prefetch
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+LEDGER_DIR = Path("ledger")
+
+# Stages reported as percentiles (seconds, bytes or tokens)
+STAGES = [
+    "capture_s", "capture_bytes", "stt_s", "context_s", "recall_s",
+    "llm_ttft_s", "llm_total_s",
+    "prompt_tokens", "completion_tokens", "cached_tokens",
+    "tts_s", "playback_s", "turn_s",
+]
+PERCENTILES = (50, 95, 99)
+
+# Histogram buckets grow by 1% so reported percentiles are within ~1% of exact
+BUCKET_GROWTH = 1.01
+_LOG_GROWTH = math.log(BUCKET_GROWTH)
+
+def ledger_path(day=None):
+    day = day or time.strftime("%Y-%m-%d")
+    return LEDGER_DIR / f"{day}.jsonl"
+
+# ---------------- WRITER ----------------
+class TurnLedger:
+    """Append-only JSONL writer, one record per turn."""
+
+    def __init__(self, directory=LEDGER_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def new_turn(self, face_id=None):
+        return {"ts": time.time(), "face_id": face_id}
+
+    def log(self, turn):
+        path = self.directory / f"{time.strftime('%Y-%m-%d', time.localtime(turn['ts']))}.jsonl"
+        line = json.dumps(turn, separators=(",", ":")) + "\n"
+        # One write per record in append mode, so concurrent writers never interleave a line
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+# ---------------- REPORT ----------------
+class StreamingPercentiles:
+    """Log-bucketed histogram: memory depends on the value range, not the count."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if value <= 0:
+            self.zeros += 1
+            return
+        b = math.floor(math.log(value) / _LOG_GROWTH)
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+
+    def percentile(self, p):
+        if self.count == 0:
+            return None
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = self.zeros
+        if seen >= rank:
+            return 0.0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen >= rank:
+                # Midpoint of the bucket, capped by the true maximum
+                return min(BUCKET_GROWTH ** (b + 0.5), self.max)
+        return self.max
+
+def read_ledger(paths):
+    """Yield records one line at a time, skipping torn or malformed lines."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(rec, dict):  # a torn line can still parse, e.g. as a bare 123
+                    yield rec
+
+class Summary:
+    """Turn count and per-stage percentiles, filled one record at a time."""
+
+    def __init__(self):
+        self.turns = 0
+        self.stats = {stage: StreamingPercentiles() for stage in STAGES}
+
+    def add(self, rec):
+        self.turns += 1
+        for stage, hist in self.stats.items():
+            value = rec.get(stage)
+            if isinstance(value, (int, float)):
+                hist.add(value)
+
+def summarize(records):
+    summary = Summary()
+    for rec in records:
+        summary.add(rec)
+    return summary.turns, summary.stats
+
+def summarize_by(records, field):
+    """One Summary per value of field, in a single pass without keeping the records."""
+    groups = {}
+    for rec in records:
+        value = str(rec.get(field))
+        if value not in groups:
+            groups[value] = Summary()
+        groups[value].add(rec)
+    return groups
+
+def print_report(turns, stats):
+    print(f"{turns} turns")
+    header = f"{'stage':<18}{'n':>8}{'mean':>10}" + "".join(f"{'p' + str(p):>10}" for p in PERCENTILES)
+    print(header)
+    print("-" * len(header))
+    for stage, hist in stats.items():
+        if hist.count == 0:
+            continue
+        row = f"{stage:<18}{hist.count:>8}{hist.total / hist.count:>10.3f}"
+        row += "".join(f"{hist.percentile(p):>10.3f}" for p in PERCENTILES)
+        print(row)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage percentiles from turn ledgers.")
+    parser.add_argument("paths", nargs="*", type=Path, help="ledger files (default: today's)")
+    parser.add_argument("--first", action="store_true", help="only each person's first turn")
+    parser.add_argument("--by", metavar="FIELD", help="one report per value of FIELD, e.g. prefetched")
+    args = parser.parse_args()
+
+    paths = args.paths or [ledger_path()]
+    missing = [p for p in paths if not p.exists()]
+    if missing:
+        print("No ledger at:", ", ".join(str(p) for p in missing))
+        sys.exit(1)
+    records = read_ledger(paths)
+    if args.first:
+        records = (rec for rec in records if rec.get("first_turn"))
+    if not args.by:
+        print_report(*summarize(records))
+        sys.exit(0)
+    for value, summary in sorted(summarize_by(records, args.by).items()):
+        print(f"\n{args.by} = {value}")
+        print_report(summary.turns, summary.stats)
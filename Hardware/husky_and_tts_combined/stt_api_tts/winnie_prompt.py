@@ -0,0 +1,37 @@
+"""Builds the ChatGPT message list for a Winnie conversation turn.
+
+The prefix (system prompt, who we are talking to, conversation so far) only
+depends on the person, so it can be built before the transcript is known.
+"""
+
+# Sent with every turn's messages. batch_eval.py uses the same, so its runs
+# measure the replies Winnie actually gives: no max_tokens or temperature,
+# the API's defaults, as the robot has always run.
+CHAT_PARAMS = {"model": "gpt-4o-mini"}
+
+FEEDBACK_PROMPT = "Provide feedback on how the user did in the interview. Give a brief comment and a rating out of 10."
+
+def build_prompt_prefix(system_prompt, name, degree, memory_content):
+    """Messages that come before the user's words."""
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": f"You are talking to {name or 'Unknown'} who studies {degree or 'Unknown degree'}."}
+    ]
+    if memory_content.strip():
+        messages.append({"role": "system", "content": f"Conversation so far:\n{memory_content}"})
+    return messages
+
+def build_messages(prefix, user_text, count, recalled=""):
+    """Full message list for one turn, given a prefix from build_prompt_prefix().
+
+    recalled is older conversation that looks relevant to user_text.
+    """
+    messages = list(prefix)
+    if recalled.strip():
+        messages.append({"role": "system", "content": f"From earlier conversations:\n{recalled}"})
+    messages.append({"role": "user", "content": user_text})
+
+    # ✅ Add feedback prompt if count is a multiple of 3 and not 0
+    if count > 0 and count % 3 == 0:
+        messages.append({"role": "system", "content": FEEDBACK_PROMPT})
+    return messages
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Runs the HuskyLens presence tracking, the conversation pipeline and the
+gesture commands in one process, instead of the two scripts side by side.
+
+Presence and gestures are asyncio tasks driven by the HuskyLens serial port
+becoming readable, so they cost nothing while the camera is quiet. The
+conversation pipeline (serial audio, STT, ChatGPT, TTS) uses blocking
+libraries, so it runs in a worker thread. Everything shares one in-process
+event bus, so presence and gesture events are plain function calls.
+
+The HuskyLens port is non-blocking, so its reads and writes run on the
+loop. When it is unplugged, the wait for it to come back (serial_ports.py)
+runs on a worker thread, so gesture timers, pings and the stop signal keep
+going meanwhile.
+
+'q' or Ctrl-C stops all of it: the tasks are cancelled and the conversation
+thread finishes at its next stop check.
+
+Usage (from this folder, next to apikey_test.txt and prompt_test.txt):
+    python3 supervisor.py
+"""
+
+import asyncio
+import signal
+import sys
+import time
+from pathlib import Path
+
+import serial
+
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE / "huskylens_presence_detection"))
+sys.path.insert(0, str(HERE / "stt_api_tts"))
+
+import husky_presence_test as presence
+import pipeline_trace
+import stt_api_tts as conversation
+from event_bus import LocalEventBus
+from memory_store import open_store
+from memory_actor import MemoryActor
+from husky_telemetry import TelemetryDecoder
+from gesture_sync import GestureLink, PING_EVERY
+from pipeline_trace import trace
+from serial_ports import ManagedSerial
+
+# ---------------- PORT ----------------
+PORT_ERRORS = (serial.SerialException, OSError)
+
+async def port_io(husky, fn, before_wait=None):
+    """fn(port) on the loop. If the HuskyLens has gone away, wait for it on a
+    worker thread (calling before_wait first) and retry on the reopened port.
+
+    husky is a serial_ports.ManagedSerial, or a plain serial.Serial that just raises.
+    """
+    port = getattr(husky, "ser", husky)
+    try:
+        return fn(port)
+    except PORT_ERRORS:
+        if not isinstance(husky, ManagedSerial) or port is None:
+            raise
+        if before_wait is not None:
+            before_wait()
+        await asyncio.to_thread(husky.reconnect, port)  # DeviceLost after its reconnect timeout
+        return fn(husky.ser)
+
+def read_available(port):
+    return port.read(port.in_waiting or 1)  # port opened with timeout=0
+
+# ---------------- TASKS ----------------
+async def presence_task(husky, bus, link, store):
+    """Parse Face IDs (and gesture link replies) as soon as the HuskyLens port has bytes."""
+    loop = asyncio.get_running_loop()
+    readable = asyncio.Event()
+    fd, reconnects = husky.fileno(), getattr(husky, "reconnects", 0)
+    loop.add_reader(fd, readable.set)
+    watching = True
+    def unwatch():
+        nonlocal watching
+        if watching:
+            loop.remove_reader(fd)  # a gone port reads as always ready
+            watching = False
+    # Reopened by another task's read or write: wake up to watch the new port
+    on_reconnect = lambda port: loop.call_soon_threadsafe(readable.set)
+    callbacks = getattr(husky, "callbacks", [])
+    callbacks.append(on_reconnect)
+    decoder = TelemetryDecoder()
+    tracker = presence.make_tracker(bus, store).start()  # leaves are timed on the tracker's own thread
+    try:
+        while True:
+            await readable.wait()
+            readable.clear()
+            data = await port_io(husky, read_available, before_wait=unwatch)
+            if getattr(husky, "reconnects", 0) != reconnects:
+                # Unplugged and reopened: watch the new port, with a fresh
+                # decoder and clock sync, as the Arduino restarted
+                reconnects = husky.reconnects
+                unwatch()
+                fd = husky.fileno()
+                loop.add_reader(fd, readable.set)
+                watching = True
+                decoder = TelemetryDecoder()
+                link.reset()
+            for fid in presence.speaker_ids(decoder, data, link):
+                tracker.seen(fid)
+    finally:
+        callbacks.remove(on_reconnect)
+        unwatch()
+        tracker.stop()
+
+async def send_later(husky, gestures, delay, line):
+    """A gesture command sent at its time. A lost port goes to gesture_task, to reach the supervisor."""
+    await asyncio.sleep(delay)
+    try:
+        await port_io(husky, lambda port: port.write(line))
+    except PORT_ERRORS as e:
+        gestures.put_nowait(e)
+
+async def gesture_task(husky, gestures, link):
+    """Queue gesture commands on the HuskyLens Arduino ahead of their start time."""
+    timers = set()
+    try:
+        while True:
+            event = await gestures.get()
+            if isinstance(event, Exception):
+                raise event  # from a timed send
+            line = link.command(event)
+            if line is not None:
+                await port_io(husky, lambda port: port.write(line))
+                trace.instant("gesture queued", command=event.command, lead_s=event.at_monotonic - time.monotonic())
+                print(f"Queued {event.command} command on Arduino.")
+                continue
+            at = link.send_at(event)
+            if at is None:
+                continue
+            # No clock sync yet (or older firmware): send the plain command at its time
+            trace.instant("gesture timer", command=event.command, lead_s=at - time.monotonic())
+            timer = asyncio.create_task(
+                send_later(husky, gestures, max(at - time.monotonic(), 0), f"{event.command}\n".encode("ascii")))
+            timers.add(timer)
+            timer.add_done_callback(timers.discard)
+            print(f"Sending {event.command} command to Arduino at playback start.")
+    finally:
+        for timer in timers:
+            timer.cancel()
+
+async def sync_task(husky, link):
+    """Ping the HuskyLens Arduino so gesture times can be given in its clock."""
+    while True:
+        ping = link.sync.ping()
+        await port_io(husky, lambda port: port.write(ping))
+        await asyncio.sleep(PING_EVERY)
+
+def device_tasks(husky, bus, store):
+    """Presence, gesture and clock sync tasks on an open HuskyLens port, sharing bus and the memory store."""
+    loop = asyncio.get_running_loop()
+    gestures = asyncio.Queue()
+    link = GestureLink()
+    # play_audio publishes from the conversation thread, so hop back onto the loop
+    bus.subscribe("gesture", lambda event: loop.call_soon_threadsafe(gestures.put_nowait, event))
+    return [
+        asyncio.create_task(presence_task(husky, bus, link, store), name="presence"),
+        asyncio.create_task(gesture_task(husky, gestures, link), name="gestures"),
+        asyncio.create_task(sync_task(husky, link), name="sync"),
+    ]
+
+# ---------------- SUPERVISOR ----------------
+async def supervise():
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    bus = LocalEventBus()
+    conversation.bus = bus
+    store = MemoryActor(open_store(presence.MEMORY_BACKEND))  # the one writer for both sides
+    conversation.memory = store
+    if presence.RESET_MEMORIES:
+        presence.reset_memories(store)
+
+    if conversation.WARM_UP:
+        conversation.warm_up()
+    print(f"HuskyLens on {presence.PORT}, mic/speaker on {conversation.MIC_PORT}")
+    with ManagedSerial(presence.device(), presence.BAUD, timeout=0) as husky:
+        tasks = device_tasks(husky, bus, store)
+        prefetch = conversation.PresencePrefetch() if conversation.PREFETCH else None
+        if prefetch:
+            bus.subscribe("presence", prefetch.on_presence)
+        prewarm = conversation.TurnPrewarm(prefetch) if conversation.PREWARM else None
+        talk = asyncio.create_task(
+            asyncio.to_thread(conversation.conversation_loop, prewarm, None, prefetch), name="conversation")
+        stopper = asyncio.create_task(stop.wait(), name="stop")
+
+        done, _ = await asyncio.wait([talk, stopper, *tasks], return_when=asyncio.FIRST_COMPLETED)
+
+        # ---------------- SHUTDOWN ----------------
+        conversation.stop_event.set()
+        for task in [stopper, *tasks]:
+            task.cancel()
+        await asyncio.gather(stopper, *tasks, return_exceptions=True)
+        print("Waiting for the conversation to finish its current step...")
+        await asyncio.gather(talk, return_exceptions=True)
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                print(f"⚠️ {task.get_name()} failed:", repr(task.exception()))
+    store.close()
+
+if __name__ == "__main__":
+    old_settings = conversation.setup_terminal()
+    if conversation.TRACE or presence.TRACE:
+        pipeline_trace.enable("supervisor")  # both sides in one trace
+    try:
+        asyncio.run(supervise())
+    finally:
+        conversation.restore_terminal(old_settings)
+        print("Terminal restored, exiting cleanly.")
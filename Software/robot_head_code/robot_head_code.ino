@@ -54,7 +54,7 @@ void loop() {
 
     int x = r.xCenter;
     int y = r.yCenter;
-    Serial.print("Face ID: "); Serial.print(r.ID);
+    Serial.print("Face ID: "); Serial.println(r.ID);  // one line per face, the host frames on newlines
     // Serial.print("  X: "); Serial.print(x);
     // Serial.print("  Y: "); Serial.println(y);
     // Serial.print("X: "); Serial.print(x); Serial.print("  Y: "); Serial.println(y);